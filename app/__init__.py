@@ -1,19 +1,27 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 import os
 
 from app.config import Config
 from app.database import init_db
+from app.migrations import check_schema
 from app.routes import register_routes
+from app.services.pricing_service import PricingError
+from app.utils.compression import init_compression
+from app.utils.conditional import init_conditional
+from app.utils.helpers import is_token_revoked
+from app.utils.json_provider import FastJSONProvider
+from app.utils.pagination import PaginationError
 
 jwt = JWTManager()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(config_class)
     
     # Get allowed origins from environment
@@ -40,9 +48,21 @@ def create_app(config_class=Config):
     }, supports_credentials=True)
     
     jwt.init_app(app)
+    jwt.token_in_blocklist_loader(is_token_revoked)
     
     init_db(app)
+    check_schema(app)
     
     register_routes(app)
+    init_conditional(app)
+    init_compression(app)
+    
+    @app.errorhandler(PaginationError)
+    def handle_pagination_error(error):
+        return jsonify({'error': str(error)}), 400
+    
+    @app.errorhandler(PricingError)
+    def handle_pricing_error(error):
+        return jsonify({'error': str(error)}), error.status_code
     
     return app
@@ -13,6 +13,13 @@ class Config:
     MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
     MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'shiv_furniture_budget')
     
+    # Connection pool, per worker process
+    MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', 20))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', 0))
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', 60000))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 10000))
+    MONGODB_COMPRESSORS = os.getenv('MONGODB_COMPRESSORS')
+    
     AZURE_STORAGE_CONNECTION_STRING = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
     AZURE_STORAGE_CONTAINER_NAME = os.getenv('AZURE_STORAGE_CONTAINER_NAME', 'files')
     
@@ -20,10 +27,57 @@ class Config:
     SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
     EMAIL_ADDRESS = os.getenv('EMAIL_ADDRESS')
     EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+    SMTP_TIMEOUT_SECONDS = int(os.getenv('SMTP_TIMEOUT_SECONDS', 30))
+    
+    # Email worker (email_worker.py); see app.services.email_delivery
+    EMAIL_POOL_SIZE = int(os.getenv('EMAIL_POOL_SIZE', 3))
+    EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 50))
+    EMAIL_POLL_SECONDS = float(os.getenv('EMAIL_POLL_SECONDS', 5))
+    EMAIL_CONNECTION_MAX_MESSAGES = int(os.getenv('EMAIL_CONNECTION_MAX_MESSAGES', 100))
+    EMAIL_CONNECTION_IDLE_CHECK_SECONDS = int(os.getenv('EMAIL_CONNECTION_IDLE_CHECK_SECONDS', 60))
+    EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 6))
+    EMAIL_RETRY_BASE_SECONDS = int(os.getenv('EMAIL_RETRY_BASE_SECONDS', 30))
+    EMAIL_RETRY_MAX_SECONDS = int(os.getenv('EMAIL_RETRY_MAX_SECONDS', 3600))
+    EMAIL_LEASE_SECONDS = int(os.getenv('EMAIL_LEASE_SECONDS', 300))
+    # Directory for compiled email template bytecode shared by new processes; unset keeps it in memory only
+    EMAIL_TEMPLATE_CACHE_DIR = os.getenv('EMAIL_TEMPLATE_CACHE_DIR')
     
     FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+    
+    LIST_COUNT_CACHE_SECONDS = int(os.getenv('LIST_COUNT_CACHE_SECONDS', 30))
+    
+    # Process-wide cache of contacts, products and analytical accounts; see app.utils.loader
+    REFERENCE_CACHE_ENTRIES = int(os.getenv('REFERENCE_CACHE_ENTRIES', 2048))
+    REFERENCE_CACHE_TTL_SECONDS = int(os.getenv('REFERENCE_CACHE_TTL_SECONDS', 300))
+    REFERENCE_CACHE_VERSION_CHECK_SECONDS = float(os.getenv('REFERENCE_CACHE_VERSION_CHECK_SECONDS', 2))
+    
+    # Document numbers: per-process block size, and comma-separated prefixes
+    # (INV, BILL, PO, SO, PAY) that must take one number at a time from the counter
+    SEQUENCE_BLOCK_SIZE = int(os.getenv('SEQUENCE_BLOCK_SIZE', 20))
+    SEQUENCE_GAPLESS_PREFIXES = os.getenv('SEQUENCE_GAPLESS_PREFIXES', 'INV')
+    
+    # How long a worker trusts its cached copy of a user's token_version/is_active
+    USER_STAMP_CACHE_SECONDS = int(os.getenv('USER_STAMP_CACHE_SECONDS', 15))
+    
+    # Response compression; see app.utils.compression
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+    COMPRESS_CACHE_ENTRIES = int(os.getenv('COMPRESS_CACHE_ENTRIES', 256))
+    
+    # Notification retention; see app.services.notification_service. Policy is
+    # 'delete' (TTL index) or 'archive' (moved to notifications_archive by the scheduler).
+    # 0 days keeps notifications forever.
+    NOTIFICATION_RETENTION_POLICY = os.getenv('NOTIFICATION_RETENTION_POLICY', 'delete')
+    NOTIFICATION_READ_RETENTION_DAYS = int(os.getenv('NOTIFICATION_READ_RETENTION_DAYS', 30))
+    NOTIFICATION_UNREAD_RETENTION_DAYS = int(os.getenv('NOTIFICATION_UNREAD_RETENTION_DAYS', 180))
+    
+    # warn | strict | migrate | off; see app.migrations.check_schema
+    SCHEMA_CHECK = os.getenv('SCHEMA_CHECK', 'warn')
 
 
 class TestConfig(Config):
     TESTING = True
     MONGODB_DB_NAME = 'shiv_furniture_budget_test'
+    SCHEMA_CHECK = 'migrate'
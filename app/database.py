@@ -1,84 +1,162 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
 from flask import current_app, g
+import os
 import ssl
+import threading
+import time
 
 client = None
 db = None
 
-def init_db(app):
-    global client, db
-    mongo_uri = app.config['MONGODB_URI']
-    
+_settings = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Per-process connection pool counters, including how long callers waited to check out a connection"""
+    
+    WAIT_BUCKETS_MS = [1, 10, 100, 1000]
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checked_out = 0
+        self.open_connections = 0
+        self.connections_created = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.wait_buckets = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+    
+    def _record_wait(self):
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        wait_ms = (time.monotonic() - started) * 1000 if started else 0.0
+        
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+        bucket = next((i for i, limit in enumerate(self.WAIT_BUCKETS_MS) if wait_ms < limit), len(self.WAIT_BUCKETS_MS))
+        self.wait_buckets[bucket] += 1
+    
+    def connection_check_out_started(self, event):
+        self._local.started = time.monotonic()
+    
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._record_wait()
+            self.checkouts += 1
+            self.checked_out += 1
+    
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._record_wait()
+            self.checkout_failures += 1
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+            self.connections_created += 1
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+    
+    def connection_ready(self, event):
+        pass
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+    
+    def snapshot(self):
+        with self._lock:
+            attempts = self.checkouts + self.checkout_failures
+            labels = [f'<{limit}ms' for limit in self.WAIT_BUCKETS_MS] + [f'>={self.WAIT_BUCKETS_MS[-1]}ms']
+            return {
+                'pid': os.getpid(),
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'checked_out': self.checked_out,
+                'open_connections': self.open_connections,
+                'connections_created': self.connections_created,
+                'wait_ms_avg': round(self.wait_ms_total / attempts, 3) if attempts else 0,
+                'wait_ms_max': round(self.wait_ms_max, 3),
+                'wait_histogram': dict(zip(labels, self.wait_buckets))
+            }
+
+
+pool_metrics = PoolMetrics()
+
+def _client_options(config):
+    options = {
+        'maxPoolSize': config['MONGODB_MAX_POOL_SIZE'],
+        'minPoolSize': config['MONGODB_MIN_POOL_SIZE'],
+        'maxIdleTimeMS': config['MONGODB_MAX_IDLE_TIME_MS'],
+        'waitQueueTimeoutMS': config['MONGODB_WAIT_QUEUE_TIMEOUT_MS']
+    }
+    if config.get('MONGODB_COMPRESSORS'):
+        options['compressors'] = config['MONGODB_COMPRESSORS']
+    
+    mongo_uri = config['MONGODB_URI']
     if 'mongodb+srv' in mongo_uri or 'mongodb.net' in mongo_uri:
-        client = MongoClient(
-            mongo_uri,
-            tls=True,
-            tlsAllowInvalidCertificates=True
-        )
-    else:
-        client = MongoClient(mongo_uri)
-    
-    db = client[app.config['MONGODB_DB_NAME']]
+        options['tls'] = True
+        options['tlsAllowInvalidCertificates'] = True
     
-    create_indexes()
-    
-    return db
+    return options
+
+def init_db(app):
+    """Record connection settings; the client itself is created lazily in each process"""
+    global _settings, _client_pid
+    settings = {
+        'uri': app.config['MONGODB_URI'],
+        'db_name': app.config['MONGODB_DB_NAME'],
+        'options': _client_options(app.config)
+    }
+    if settings != _settings:
+        _settings = settings
+        _client_pid = None
+
+def _connect():
+    global client, db, pool_metrics, _client_pid
+    # A client inherited across fork() is unusable; it is dropped rather than
+    # closed so the parent's sockets are left alone.
+    pool_metrics = PoolMetrics()
+    client = MongoClient(_settings['uri'], event_listeners=[pool_metrics], **_settings['options'])
+    db = client[_settings['db_name']]
+    _client_pid = os.getpid()
+
+def _reset_after_fork():
+    global _client_lock
+    # The lock may have been held by another thread at fork time.
+    _client_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 def get_db():
     global db
+    if _settings is not None and _client_pid != os.getpid():
+        with _client_lock:
+            if _client_pid != os.getpid():
+                _connect()
     return db
 
-def create_indexes():
-    global db
-    if db is None:
-        return
-    
-    db.users.create_index('email', unique=True)
-    db.users.create_index('role')
-    
-    db.contacts.create_index('email')
-    db.contacts.create_index('contact_type')
-    db.contacts.create_index('is_archived')
-    
-    db.products.create_index('sku', unique=True)
-    db.products.create_index('category')
-    db.products.create_index('is_archived')
-    
-    db.analytical_accounts.create_index('code', unique=True)
-    db.analytical_accounts.create_index('is_archived')
-    
-    db.budgets.create_index('analytical_account_id')
-    db.budgets.create_index([('period_start', 1), ('period_end', 1)])
-    db.budgets.create_index('is_archived')
-    
-    db.auto_analytical_models.create_index('is_active')
-    
-    db.purchase_orders.create_index('po_number', unique=True)
-    db.purchase_orders.create_index('vendor_id')
-    db.purchase_orders.create_index('status')
-    db.purchase_orders.create_index('created_at')
-    
-    db.vendor_bills.create_index('bill_number', unique=True)
-    db.vendor_bills.create_index('vendor_id')
-    db.vendor_bills.create_index('purchase_order_id')
-    db.vendor_bills.create_index('payment_status')
-    db.vendor_bills.create_index('created_at')
-    
-    db.sales_orders.create_index('so_number', unique=True)
-    db.sales_orders.create_index('customer_id')
-    db.sales_orders.create_index('status')
-    db.sales_orders.create_index('created_at')
-    
-    db.customer_invoices.create_index('invoice_number', unique=True)
-    db.customer_invoices.create_index('customer_id')
-    db.customer_invoices.create_index('sales_order_id')
-    db.customer_invoices.create_index('payment_status')
-    db.customer_invoices.create_index('created_at')
-    
-    db.payments.create_index('payment_number', unique=True)
-    db.payments.create_index('payment_type')
-    db.payments.create_index('contact_id')
-    db.payments.create_index('created_at')
-    
-    db.budget_revisions.create_index('budget_id')
-    db.budget_revisions.create_index('created_at')
+def get_pool_metrics():
+    """Pool metrics for this process, or None before it has connected"""
+    if _client_pid != os.getpid():
+        return None
+    return pool_metrics.snapshot()
@@ -0,0 +1,40 @@
+"""
+Apply pending schema migrations
+Usage: python -m app.migrate [--status]
+"""
+import sys
+import argparse
+
+from app import create_app
+from app.config import Config
+from app.database import get_db
+from app.migrations import MIGRATIONS, migrate, pending_migrations, current_version
+
+
+class MigrateConfig(Config):
+    SCHEMA_CHECK = 'off'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply pending schema migrations')
+    parser.add_argument('--status', action='store_true', help='list pending migrations without applying them')
+    args = parser.parse_args()
+    
+    app = create_app(MigrateConfig)
+    with app.app_context():
+        db = get_db()
+        
+        if args.status:
+            pending = pending_migrations(db)
+            print(f"Schema version: {current_version(db)} (latest {MIGRATIONS[-1][0]})")
+            for version, name, _ in pending:
+                print(f"  pending {version:04d} {name}")
+            return 1 if pending else 0
+        
+        applied = migrate(db)
+        print(f"Applied {len(applied)} migration(s); schema version is {current_version(db)}")
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
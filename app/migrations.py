@@ -0,0 +1,220 @@
+"""
+Versioned schema migrations.
+
+Each migration is a (version, name, function) step applied in order by
+`python -m app.migrate`. Applied versions are recorded in the schema_migrations
+collection; web and scheduler processes only check the recorded version at startup.
+"""
+from datetime import datetime
+import time
+
+from pymongo.errors import DuplicateKeyError
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def baseline_indexes(db):
+    db.users.create_index('email', unique=True)
+    db.users.create_index('role')
+    
+    db.contacts.create_index('email')
+    db.contacts.create_index('contact_type')
+    db.contacts.create_index('is_archived')
+    db.contacts.create_index([('name', 1), ('_id', 1)])
+    
+    db.products.create_index('sku', unique=True)
+    db.products.create_index('category')
+    db.products.create_index('is_archived')
+    db.products.create_index([('name', 1), ('_id', 1)])
+    
+    db.analytical_accounts.create_index('code', unique=True)
+    db.analytical_accounts.create_index('is_archived')
+    
+    db.budgets.create_index('analytical_account_id')
+    db.budgets.create_index([('period_start', 1), ('period_end', 1)])
+    db.budgets.create_index('is_archived')
+    db.budgets.create_index([('created_at', -1), ('_id', -1)])
+    
+    db.auto_analytical_models.create_index('is_active')
+    db.auto_analytical_models.create_index([('priority', -1), ('_id', -1)])
+    
+    db.purchase_orders.create_index('po_number', unique=True)
+    db.purchase_orders.create_index([('vendor_id', 1), ('order_date', -1), ('_id', -1)])
+    db.purchase_orders.create_index('status')
+    db.purchase_orders.create_index([('created_at', -1), ('_id', -1)])
+    
+    db.vendor_bills.create_index('bill_number', unique=True)
+    db.vendor_bills.create_index([('vendor_id', 1), ('bill_date', -1), ('_id', -1)])
+    db.vendor_bills.create_index('purchase_order_id')
+    db.vendor_bills.create_index('payment_status')
+    db.vendor_bills.create_index([('created_at', -1), ('_id', -1)])
+    db.vendor_bills.create_index([('status', 1), ('bill_date', 1)])
+    db.vendor_bills.create_index([('analytical_account_id', 1), ('status', 1), ('bill_date', 1)])
+    db.vendor_bills.create_index([('vendor_id', 1), ('status', 1), ('bill_date', -1)])
+    db.vendor_bills.create_index(
+        [('payment_status', 1), ('due_date', 1)],
+        name='open_bills',
+        partialFilterExpression={'status': 'posted'}
+    )
+    
+    db.sales_orders.create_index('so_number', unique=True)
+    db.sales_orders.create_index([('customer_id', 1), ('order_date', -1), ('_id', -1)])
+    db.sales_orders.create_index([('customer_id', 1), ('status', 1)])
+    db.sales_orders.create_index('status')
+    db.sales_orders.create_index([('created_at', -1), ('_id', -1)])
+    
+    db.customer_invoices.create_index('invoice_number', unique=True)
+    db.customer_invoices.create_index([('customer_id', 1), ('invoice_date', -1), ('_id', -1)])
+    db.customer_invoices.create_index('sales_order_id')
+    db.customer_invoices.create_index('payment_status')
+    db.customer_invoices.create_index([('created_at', -1), ('_id', -1)])
+    db.customer_invoices.create_index([('status', 1), ('invoice_date', 1)])
+    db.customer_invoices.create_index([('analytical_account_id', 1), ('status', 1), ('invoice_date', 1)])
+    db.customer_invoices.create_index([('customer_id', 1), ('status', 1), ('invoice_date', -1)])
+    db.customer_invoices.create_index(
+        [('payment_status', 1), ('due_date', 1)],
+        name='open_invoices',
+        partialFilterExpression={'status': 'posted'}
+    )
+    db.customer_invoices.create_index(
+        [('customer_id', 1), ('payment_status', 1)],
+        name='open_invoices_by_customer',
+        partialFilterExpression={'status': 'posted'}
+    )
+    
+    db.payments.create_index('payment_number', unique=True)
+    db.payments.create_index('payment_type')
+    db.payments.create_index('contact_id')
+    db.payments.create_index([('created_at', -1), ('_id', -1)])
+    db.payments.create_index([('contact_id', 1), ('created_at', -1)])
+    db.payments.create_index('invoice_id')
+    db.payments.create_index('bill_id')
+    
+    db.budget_revisions.create_index('budget_id')
+    db.budget_revisions.create_index('created_at')
+    
+    for collection in ['products', 'contacts', 'payments', 'customer_invoices', 'vendor_bills',
+                       'sales_orders', 'purchase_orders']:
+        db[collection].create_index('search_prefixes')
+    
+    db.daily_rollups.create_index([('analytical_account_id', 1), ('date', 1), ('kind', 1)], unique=True)
+    db.daily_rollups.create_index([('kind', 1), ('date', 1)])
+    
+    db.open_items.create_index([('kind', 1), ('due_date', 1)])
+    db.open_items.create_index('contact_id')
+
+
+def email_outbox_indexes(db):
+    db.email_outbox.create_index([('status', 1), ('next_attempt_at', 1)])
+    db.email_outbox.create_index([('status', 1), ('lease_expires_at', 1)])
+    # Delivered messages are kept for 30 days; failed ones stay until handled.
+    db.email_outbox.create_index('sent_at', expireAfterSeconds=30 * 24 * 3600)
+
+
+def notification_indexes(db):
+    db.notifications.create_index([('user_id', 1), ('created_at', -1)])
+    db.notifications.create_index([('user_id', 1), ('is_read', 1), ('created_at', -1)])
+    db.notifications.create_index([('audience_role', 1), ('created_at', -1)])
+    db.notifications.create_index('expires_at', expireAfterSeconds=0)
+    db.notifications.create_index('archive_at')
+    db.notifications_archive.create_index([('user_id', 1), ('created_at', -1)])
+    db.collection_stats.create_index('taken_at')
+
+
+def backfill_notification_retention(db):
+    from app.services.notification_service import NotificationService
+    NotificationService.backfill_retention()
+
+
+def backfill_search_prefixes(db):
+    from app.services.search_service import SearchService
+    SearchService.rebuild()
+
+
+def build_daily_rollups(db):
+    from app.services.rollup_service import RollupService
+    RollupService.rebuild()
+
+
+def build_open_items(db):
+    from app.services.open_items_service import OpenItemsService
+    OpenItemsService.rebuild()
+
+
+MIGRATIONS = [
+    (1, 'baseline_indexes', baseline_indexes),
+    (2, 'backfill_search_prefixes', backfill_search_prefixes),
+    (3, 'build_daily_rollups', build_daily_rollups),
+    (4, 'build_open_items', build_open_items),
+    (5, 'email_outbox_indexes', email_outbox_indexes),
+    (6, 'notification_indexes', notification_indexes),
+    (7, 'backfill_notification_retention', backfill_notification_retention),
+    (8, 'rebuild_unicode_search_prefixes', backfill_search_prefixes),
+    (9, 'backfill_search_values', backfill_search_prefixes)
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(db):
+    latest = db.schema_migrations.find_one(sort=[('_id', -1)], projection={'_id': 1})
+    return latest['_id'] if latest else 0
+
+
+def pending_migrations(db):
+    applied = {doc['_id'] for doc in db.schema_migrations.find({}, {'_id': 1})}
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+
+def migrate(db, log=print):
+    """Apply every pending migration in order; returns the versions applied"""
+    applied = []
+    for version, name, step in pending_migrations(db):
+        log(f"Applying migration {version:04d} {name}...")
+        started = time.monotonic()
+        step(db)
+        try:
+            db.schema_migrations.insert_one({
+                '_id': version,
+                'name': name,
+                'applied_at': datetime.utcnow(),
+                'duration_ms': int((time.monotonic() - started) * 1000)
+            })
+        except DuplicateKeyError:
+            # Another migrate run recorded it first; steps are idempotent.
+            pass
+        applied.append(version)
+    return applied
+
+
+def check_schema(app):
+    """Startup check: one read of schema_migrations instead of re-running index builds.
+    
+    SCHEMA_CHECK controls the behaviour: 'migrate' applies pending migrations
+    (tests and local development), 'strict' refuses to start when behind, 'warn'
+    prints a warning and 'off' skips the check.
+    """
+    mode = app.config.get('SCHEMA_CHECK', 'warn')
+    if mode == 'off':
+        return
+    
+    from app.database import get_db
+    db = get_db()
+    
+    if mode == 'migrate':
+        # Some steps read retention settings from the app config.
+        with app.app_context():
+            migrate(db, log=lambda message: None)
+        return
+    
+    version = current_version(db)
+    if version >= LATEST_VERSION:
+        return
+    
+    message = (f"Database schema is at version {version}, code expects {LATEST_VERSION}. "
+               f"Run `python -m app.migrate`.")
+    if mode == 'strict':
+        raise SchemaVersionError(message)
+    print(f"Warning: {message}")
@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class AnalyticalAccount:
     TYPE_INCOME = 'income'
@@ -8,6 +9,16 @@ class AnalyticalAccount:
     
     ACCOUNT_TYPES = [TYPE_INCOME, TYPE_EXPENSE, TYPE_BOTH]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=['code', 'name', 'description', 'account_type', 'is_archived'],
+        ids=['_id', 'parent_id', 'created_by'],
+        dates=['created_at', 'updated_at'],
+        defaults={
+            'account_type': TYPE_BOTH,
+            'is_archived': False
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -64,3 +75,8 @@ class AnalyticalAccount:
         if data:
             return AnalyticalAccount(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return AnalyticalAccount.RESPONSE_FIELDS(data)
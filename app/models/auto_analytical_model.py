@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class AutoAnalyticalModel:
     RULE_TYPE_PRODUCT_CATEGORY = 'product_category'
@@ -9,6 +10,16 @@ class AutoAnalyticalModel:
     
     RULE_TYPES = [RULE_TYPE_PRODUCT_CATEGORY, RULE_TYPE_PRODUCT, RULE_TYPE_CONTACT, RULE_TYPE_AMOUNT_RANGE]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=['name', 'description', 'rule_type', 'rule_value', 'priority', 'is_active'],
+        ids=['_id', 'analytical_account_id', 'created_by'],
+        dates=['created_at', 'updated_at'],
+        defaults={
+            'priority': 0,
+            'is_active': True
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -69,3 +80,8 @@ class AutoAnalyticalModel:
         if data:
             return AutoAnalyticalModel(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return AutoAnalyticalModel.RESPONSE_FIELDS(data)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class Budget:
     TYPE_INCOME = 'income'
@@ -7,6 +8,17 @@ class Budget:
     
     BUDGET_TYPES = [TYPE_INCOME, TYPE_EXPENSE]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=['name', 'budget_type', 'budgeted_amount', 'description', 'is_archived'],
+        ids=['_id', 'analytical_account_id', 'created_by'],
+        dates=['period_start', 'period_end', 'created_at', 'updated_at'],
+        defaults={
+            'budget_type': TYPE_EXPENSE,
+            'budgeted_amount': 0,
+            'is_archived': False
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -71,9 +83,24 @@ class Budget:
         if data:
             return Budget(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return Budget.RESPONSE_FIELDS(data)
 
 
 class BudgetRevision:
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=['previous_amount', 'new_amount', 'reason'],
+        ids=['_id', 'budget_id', 'revised_by'],
+        dates=['created_at'],
+        defaults={
+            'previous_amount': 0,
+            'new_amount': 0
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -118,3 +145,8 @@ class BudgetRevision:
         if data:
             return BudgetRevision(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return BudgetRevision.RESPONSE_FIELDS(data)
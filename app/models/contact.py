@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class Contact:
     TYPE_CUSTOMER = 'customer'
@@ -8,6 +9,24 @@ class Contact:
     
     CONTACT_TYPES = [TYPE_CUSTOMER, TYPE_VENDOR, TYPE_BOTH]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=[
+            'name', 'email', 'phone', 'contact_type', 'company_name', 'gstin', 'pan',
+            'billing_address', 'shipping_address', 'credit_limit', 'payment_terms', 'notes',
+            'is_archived'
+        ],
+        ids=['_id', 'created_by'],
+        dates=['created_at', 'updated_at'],
+        defaults={
+            'contact_type': TYPE_CUSTOMER,
+            'billing_address': dict,
+            'shipping_address': dict,
+            'credit_limit': 0,
+            'payment_terms': 30,
+            'is_archived': False
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -92,3 +111,8 @@ class Contact:
         if data:
             return Contact(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return Contact.RESPONSE_FIELDS(data)
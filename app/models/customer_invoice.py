@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class CustomerInvoice:
     STATUS_DRAFT = 'draft'
@@ -13,6 +14,26 @@ class CustomerInvoice:
     STATUSES = [STATUS_DRAFT, STATUS_POSTED, STATUS_CANCELLED]
     PAYMENT_STATUSES = [PAYMENT_STATUS_NOT_PAID, PAYMENT_STATUS_PARTIALLY_PAID, PAYMENT_STATUS_PAID]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=[
+            'invoice_number', 'status', 'payment_status', 'items', 'subtotal', 'tax_amount',
+            'discount_amount', 'total_amount', 'amount_paid', 'amount_due', 'notes', 'document_url'
+        ],
+        ids=['_id', 'customer_id', 'sales_order_id', 'analytical_account_id', 'created_by'],
+        dates=['invoice_date', 'due_date', 'created_at', 'updated_at'],
+        defaults={
+            'status': STATUS_DRAFT,
+            'payment_status': PAYMENT_STATUS_NOT_PAID,
+            'items': list,
+            'subtotal': 0,
+            'tax_amount': 0,
+            'discount_amount': 0,
+            'total_amount': 0,
+            'amount_paid': 0,
+            'amount_due': 0
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -128,3 +149,8 @@ class CustomerInvoice:
         if data:
             return CustomerInvoice(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return CustomerInvoice.RESPONSE_FIELDS(data)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class Payment:
     TYPE_INCOMING = 'incoming'
@@ -15,6 +16,20 @@ class Payment:
     PAYMENT_TYPES = [TYPE_INCOMING, TYPE_OUTGOING]
     PAYMENT_METHODS = [METHOD_CASH, METHOD_BANK_TRANSFER, METHOD_CHEQUE, METHOD_UPI, METHOD_CARD, METHOD_ONLINE]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=[
+            'payment_number', 'payment_type', 'payment_method', 'amount', 'reference_number',
+            'notes', 'is_reconciled'
+        ],
+        ids=['_id', 'contact_id', 'invoice_id', 'bill_id', 'created_by'],
+        dates=['payment_date', 'created_at', 'updated_at'],
+        defaults={
+            'payment_method': METHOD_BANK_TRANSFER,
+            'amount': 0,
+            'is_reconciled': False
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -91,3 +106,8 @@ class Payment:
         if data:
             return Payment(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return Payment.RESPONSE_FIELDS(data)
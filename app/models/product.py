@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class Product:
     TYPE_GOODS = 'goods'
@@ -7,6 +8,23 @@ class Product:
     
     PRODUCT_TYPES = [TYPE_GOODS, TYPE_SERVICE]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=[
+            'name', 'sku', 'description', 'product_type', 'category', 'unit', 'purchase_price',
+            'sale_price', 'tax_rate', 'hsn_code', 'is_archived'
+        ],
+        ids=['_id', 'default_analytical_account_id', 'created_by'],
+        dates=['created_at', 'updated_at'],
+        defaults={
+            'product_type': TYPE_GOODS,
+            'unit': 'pcs',
+            'purchase_price': 0,
+            'sale_price': 0,
+            'tax_rate': 18,
+            'is_archived': False
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -87,3 +105,8 @@ class Product:
         if data:
             return Product(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return Product.RESPONSE_FIELDS(data)
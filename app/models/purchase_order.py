@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class PurchaseOrder:
     STATUS_DRAFT = 'draft'
@@ -9,6 +10,22 @@ class PurchaseOrder:
     
     STATUSES = [STATUS_DRAFT, STATUS_CONFIRMED, STATUS_RECEIVED, STATUS_CANCELLED]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=[
+            'po_number', 'status', 'items', 'subtotal', 'tax_amount', 'total_amount', 'notes',
+            'document_url'
+        ],
+        ids=['_id', 'vendor_id', 'analytical_account_id', 'created_by'],
+        dates=['order_date', 'expected_date', 'created_at', 'updated_at'],
+        defaults={
+            'status': STATUS_DRAFT,
+            'items': list,
+            'subtotal': 0,
+            'tax_amount': 0,
+            'total_amount': 0
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -94,3 +111,8 @@ class PurchaseOrder:
         if data:
             return PurchaseOrder(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return PurchaseOrder.RESPONSE_FIELDS(data)
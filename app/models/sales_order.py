@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class SalesOrder:
     STATUS_DRAFT = 'draft'
@@ -9,6 +10,24 @@ class SalesOrder:
     
     STATUSES = [STATUS_DRAFT, STATUS_CONFIRMED, STATUS_DELIVERED, STATUS_CANCELLED]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=[
+            'so_number', 'status', 'items', 'subtotal', 'tax_amount', 'discount_amount',
+            'total_amount', 'shipping_address', 'notes', 'document_url'
+        ],
+        ids=['_id', 'customer_id', 'analytical_account_id', 'created_by'],
+        dates=['order_date', 'delivery_date', 'created_at', 'updated_at'],
+        defaults={
+            'status': STATUS_DRAFT,
+            'items': list,
+            'subtotal': 0,
+            'tax_amount': 0,
+            'discount_amount': 0,
+            'total_amount': 0,
+            'shipping_address': dict
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -102,3 +121,8 @@ class SalesOrder:
         if data:
             return SalesOrder(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return SalesOrder.RESPONSE_FIELDS(data)
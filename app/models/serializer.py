@@ -0,0 +1,39 @@
+_MISSING = object()
+
+def _object_id(value):
+    return str(value) if value else None
+
+def _datetime(value):
+    return value.isoformat() if value else None
+
+
+class ResponseSerializer:
+    """Turns raw Mongo documents straight into response dicts in one pass.
+    
+    The field plan is compiled once per model into (name, converter, default) tuples,
+    so serializing a row is a single loop over the document with no intermediate model
+    instance. Output matches the model's to_dict(); callable defaults (list, dict) are
+    called per row so responses never share mutable defaults.
+    """
+    
+    __slots__ = ('plan',)
+    
+    def __init__(self, values=(), ids=(), dates=(), defaults=None):
+        defaults = defaults or {}
+        plan = [(name, None, defaults.get(name)) for name in values]
+        plan += [(name, _object_id, None) for name in ids]
+        plan += [(name, _datetime, None) for name in dates]
+        self.plan = tuple(plan)
+    
+    def __call__(self, document):
+        get = document.get
+        result = {}
+        for name, convert, default in self.plan:
+            value = get(name, _MISSING)
+            if value is _MISSING:
+                value = default() if callable(default) else default
+            result[name] = convert(value) if convert else value
+        return result
+    
+    def many(self, documents):
+        return [self(document) for document in documents]
@@ -1,6 +1,7 @@
 from datetime import datetime
 from bson import ObjectId
 import bcrypt
+from app.models.serializer import ResponseSerializer
 
 class User:
     ROLE_ADMIN = 'admin'
@@ -9,6 +10,17 @@ class User:
     
     ROLES = [ROLE_ADMIN, ROLE_PORTAL_USER, ROLE_VENDOR]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=['email', 'full_name', 'phone', 'role', 'is_active'],
+        ids=['_id', 'contact_id'],
+        dates=['created_at', 'updated_at', 'last_login'],
+        defaults={
+            'phone': '',
+            'role': ROLE_PORTAL_USER,
+            'is_active': True
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -24,6 +36,7 @@ class User:
             self.last_login = data.get('last_login')
             self.password_reset_token = data.get('password_reset_token')
             self.password_reset_expires = data.get('password_reset_expires')
+            self.token_version = data.get('token_version', 0)
         else:
             self._id = None
             self.email = None
@@ -38,6 +51,7 @@ class User:
             self.last_login = None
             self.password_reset_token = None
             self.password_reset_expires = None
+            self.token_version = 0
     
     def set_password(self, password):
         self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -75,12 +89,30 @@ class User:
             'updated_at': self.updated_at,
             'last_login': self.last_login,
             'password_reset_token': self.password_reset_token,
-            'password_reset_expires': self.password_reset_expires
+            'password_reset_expires': self.password_reset_expires,
+            'token_version': self.token_version
         }
         return data
     
+    def token_claims(self):
+        """Extra JWT claims so requests can authorize without loading the user.
+        
+        ver is checked against token_version, which is bumped whenever the role,
+        active flag or linked contact changes; see app.utils.helpers.is_token_revoked.
+        """
+        return {
+            'role': self.role,
+            'contact_id': str(self.contact_id) if self.contact_id else None,
+            'ver': self.token_version
+        }
+    
     @staticmethod
     def from_db(data):
         if data:
             return User(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return User.RESPONSE_FIELDS(data)
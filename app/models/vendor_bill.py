@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from app.models.serializer import ResponseSerializer
 
 class VendorBill:
     STATUS_DRAFT = 'draft'
@@ -13,6 +14,25 @@ class VendorBill:
     STATUSES = [STATUS_DRAFT, STATUS_POSTED, STATUS_CANCELLED]
     PAYMENT_STATUSES = [PAYMENT_STATUS_NOT_PAID, PAYMENT_STATUS_PARTIALLY_PAID, PAYMENT_STATUS_PAID]
     
+    RESPONSE_FIELDS = ResponseSerializer(
+        values=[
+            'bill_number', 'vendor_bill_number', 'status', 'payment_status', 'items', 'subtotal',
+            'tax_amount', 'total_amount', 'amount_paid', 'amount_due', 'notes', 'document_url'
+        ],
+        ids=['_id', 'vendor_id', 'purchase_order_id', 'analytical_account_id', 'created_by'],
+        dates=['bill_date', 'due_date', 'created_at', 'updated_at'],
+        defaults={
+            'status': STATUS_DRAFT,
+            'payment_status': PAYMENT_STATUS_NOT_PAID,
+            'items': list,
+            'subtotal': 0,
+            'tax_amount': 0,
+            'total_amount': 0,
+            'amount_paid': 0,
+            'amount_due': 0
+        }
+    )
+    
     def __init__(self, data=None):
         if data:
             self._id = data.get('_id')
@@ -128,3 +148,8 @@ class VendorBill:
         if data:
             return VendorBill(data)
         return None
+    
+    @staticmethod
+    def serialize(data):
+        """Response dict straight from a Mongo document, same shape as to_dict()"""
+        return VendorBill.RESPONSE_FIELDS(data)
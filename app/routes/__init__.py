@@ -14,6 +14,8 @@ from app.routes.reports import reports_bp
 from app.routes.portal import portal_bp
 from app.routes.files import files_bp
 from app.routes.notifications import notifications_bp
+from app.routes.system import system_bp
+from app.routes.imports import imports_bp
 
 def register_routes(app):
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -32,3 +34,5 @@ def register_routes(app):
     app.register_blueprint(portal_bp, url_prefix='/api/portal')
     app.register_blueprint(files_bp, url_prefix='/api/files')
     app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
+    app.register_blueprint(system_bp, url_prefix='/api/system')
+    app.register_blueprint(imports_bp, url_prefix='/api/imports')
@@ -6,6 +6,8 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.analytical_account import AnalyticalAccount
 from app.utils.helpers import admin_required
+from app.utils.pagination import paginate, page_count
+from app.utils.loader import reference_cache
 
 analytical_accounts_bp = Blueprint('analytical_accounts', __name__)
 
@@ -16,6 +18,8 @@ def get_analytical_accounts():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 50))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     account_type = request.args.get('type', '')
     include_archived = request.args.get('include_archived', 'false').lower() == 'true'
@@ -35,15 +39,15 @@ def get_analytical_accounts():
     if account_type:
         query['account_type'] = {'$in': [account_type, 'both']}
     
-    total = db.analytical_accounts.count_documents(query)
-    accounts = list(db.analytical_accounts.find(query).sort('code', 1).skip((page - 1) * per_page).limit(per_page))
+    accounts, total, next_cursor = paginate(db.analytical_accounts, query, 'code', 1, page, per_page, cursor, include_total)
     
     return jsonify({
-        'analytical_accounts': [AnalyticalAccount.from_db(a).to_dict() for a in accounts],
+        'analytical_accounts': [AnalyticalAccount.serialize(a) for a in accounts],
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
     }), 200
 
 @analytical_accounts_bp.route('/<account_id>', methods=['GET'])
@@ -146,12 +150,13 @@ def update_analytical_account(account_id):
         update_data['parent_id'] = ObjectId(data['parent_id']) if data['parent_id'] else None
     
     db.analytical_accounts.update_one({'_id': ObjectId(account_id)}, {'$set': update_data})
+    reference_cache.invalidate('analytical_accounts', ObjectId(account_id))
     
     updated_account = db.analytical_accounts.find_one({'_id': ObjectId(account_id)})
     
     return jsonify({
         'message': 'Analytical account updated successfully',
-        'analytical_account': AnalyticalAccount.from_db(updated_account).to_dict()
+        'analytical_account': AnalyticalAccount.serialize(updated_account)
     }), 200
 
 @analytical_accounts_bp.route('/<account_id>/archive', methods=['POST'])
@@ -170,6 +175,7 @@ def archive_analytical_account(account_id):
         {'_id': ObjectId(account_id)},
         {'$set': {'is_archived': new_status, 'updated_at': datetime.utcnow()}}
     )
+    reference_cache.invalidate('analytical_accounts', ObjectId(account_id))
     
     return jsonify({
         'message': f"Analytical account {'archived' if new_status else 'unarchived'} successfully",
@@ -189,6 +195,7 @@ def delete_analytical_account(account_id):
         return jsonify({'error': 'Cannot delete account with budgets or child accounts. Archive instead.'}), 400
     
     result = db.analytical_accounts.delete_one({'_id': ObjectId(account_id)})
+    reference_cache.invalidate('analytical_accounts', ObjectId(account_id))
     
     if result.deleted_count == 0:
         return jsonify({'error': 'Analytical account not found'}), 404
@@ -35,7 +35,7 @@ def register():
     
     EmailService.send_welcome_email(user.email, user.full_name)
     
-    access_token = create_access_token(identity=str(user._id))
+    access_token = create_access_token(identity=str(user._id), additional_claims=user.token_claims())
     refresh_token = create_refresh_token(identity=str(user._id))
     
     return jsonify({
@@ -71,7 +71,7 @@ def login():
         {'$set': {'last_login': datetime.utcnow()}}
     )
     
-    access_token = create_access_token(identity=str(user._id))
+    access_token = create_access_token(identity=str(user._id), additional_claims=user.token_claims())
     refresh_token = create_refresh_token(identity=str(user._id))
     
     return jsonify({
@@ -85,7 +85,13 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     user_id = get_jwt_identity()
-    access_token = create_access_token(identity=user_id)
+    db = get_db()
+    
+    user = User.from_db(db.users.find_one({'_id': ObjectId(user_id)}))
+    if not user or not user.is_active:
+        return jsonify({'error': 'Account is deactivated'}), 401
+    
+    access_token = create_access_token(identity=user_id, additional_claims=user.token_claims())
     return jsonify({'access_token': access_token}), 200
 
 @auth_bp.route('/me', methods=['GET'])
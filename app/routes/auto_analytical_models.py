@@ -6,6 +6,8 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.auto_analytical_model import AutoAnalyticalModel
 from app.utils.helpers import admin_required
+from app.utils.loader import get_loader
+from app.utils.pagination import paginate, page_count
 from app.services.openai_service import OpenAIService
 
 auto_analytical_models_bp = Blueprint('auto_analytical_models', __name__)
@@ -17,6 +19,8 @@ def get_models():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     rule_type = request.args.get('rule_type', '')
     is_active = request.args.get('is_active', '')
@@ -32,22 +36,21 @@ def get_models():
     if is_active:
         query['is_active'] = is_active.lower() == 'true'
     
-    total = db.auto_analytical_models.count_documents(query)
-    models = list(db.auto_analytical_models.find(query).sort('priority', -1).skip((page - 1) * per_page).limit(per_page))
+    models, total, next_cursor = paginate(db.auto_analytical_models, query, 'priority', -1, page, per_page, cursor, include_total)
+    
+    accounts = get_loader().load_many('analytical_accounts', [m.get('analytical_account_id') for m in models], ['code', 'name'])
     
     model_list = []
     for model_data in models:
-        model = AutoAnalyticalModel.from_db(model_data)
-        model_dict = model.to_dict()
+        model_dict = AutoAnalyticalModel.serialize(model_data)
         
-        if model.analytical_account_id:
-            account = db.analytical_accounts.find_one({'_id': ObjectId(model.analytical_account_id)})
-            if account:
-                model_dict['analytical_account'] = {
-                    '_id': str(account['_id']),
-                    'code': account.get('code'),
-                    'name': account.get('name')
-                }
+        account = accounts.get(model_data.get('analytical_account_id'))
+        if account:
+            model_dict['analytical_account'] = {
+                '_id': str(account['_id']),
+                'code': account.get('code'),
+                'name': account.get('name')
+            }
         
         model_list.append(model_dict)
     
@@ -56,7 +59,8 @@ def get_models():
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
     }), 200
 
 @auto_analytical_models_bp.route('/<model_id>', methods=['GET'])
@@ -72,7 +76,7 @@ def get_model(model_id):
     response = model.to_dict()
     
     if model.analytical_account_id:
-        account = db.analytical_accounts.find_one({'_id': ObjectId(model.analytical_account_id)})
+        account = get_loader().load('analytical_accounts', model.analytical_account_id)
         if account:
             response['analytical_account'] = {
                 '_id': str(account['_id']),
@@ -99,7 +103,7 @@ def create_model():
     
     db = get_db()
     
-    if not db.analytical_accounts.find_one({'_id': ObjectId(data['analytical_account_id'])}):
+    if not get_loader().load('analytical_accounts', data['analytical_account_id']):
         return jsonify({'error': 'Analytical account not found'}), 404
     
     model = AutoAnalyticalModel()
@@ -150,7 +154,7 @@ def update_model(model_id):
         update_data['rule_value'] = data['rule_value']
     
     if 'analytical_account_id' in data:
-        if not db.analytical_accounts.find_one({'_id': ObjectId(data['analytical_account_id'])}):
+        if not get_loader().load('analytical_accounts', data['analytical_account_id']):
             return jsonify({'error': 'Analytical account not found'}), 404
         update_data['analytical_account_id'] = ObjectId(data['analytical_account_id'])
     
@@ -166,7 +170,7 @@ def update_model(model_id):
     
     return jsonify({
         'message': 'Model updated successfully',
-        'model': AutoAnalyticalModel.from_db(updated_model).to_dict()
+        'model': AutoAnalyticalModel.serialize(updated_model)
     }), 200
 
 @auto_analytical_models_bp.route('/<model_id>', methods=['DELETE'])
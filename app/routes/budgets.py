@@ -6,6 +6,9 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.budget import Budget, BudgetRevision
 from app.utils.helpers import admin_required, parse_date
+from app.utils.loader import get_loader
+from app.utils.pagination import paginate, page_count
+from app.utils.conditional import conditional
 from app.services.analytics_service import AnalyticsService
 
 budgets_bp = Blueprint('budgets', __name__)
@@ -17,6 +20,8 @@ def get_budgets():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     budget_type = request.args.get('type', '')
     analytical_account_id = request.args.get('analytical_account_id', '')
@@ -36,28 +41,28 @@ def get_budgets():
     if analytical_account_id:
         query['analytical_account_id'] = ObjectId(analytical_account_id)
     
-    total = db.budgets.count_documents(query)
-    budgets = list(db.budgets.find(query).sort('created_at', -1).skip((page - 1) * per_page).limit(per_page))
+    budgets, total, next_cursor = paginate(db.budgets, query, 'created_at', -1, page, per_page, cursor, include_total)
+    
+    actuals = AnalyticsService.calculate_budgets_actuals(budgets)
+    
+    accounts = get_loader().load_many('analytical_accounts', [b.get('analytical_account_id') for b in budgets], ['code', 'name'])
     
     budget_list = []
     for budget_data in budgets:
-        budget = Budget.from_db(budget_data)
-        budget_dict = budget.to_dict()
+        budget_dict = Budget.serialize(budget_data)
         
-        if budget.analytical_account_id:
-            account = db.analytical_accounts.find_one({'_id': ObjectId(budget.analytical_account_id)})
-            if account:
-                budget_dict['analytical_account'] = {
-                    '_id': str(account['_id']),
-                    'code': account.get('code'),
-                    'name': account.get('name')
-                }
+        account = accounts.get(budget_data.get('analytical_account_id'))
+        if account:
+            budget_dict['analytical_account'] = {
+                '_id': str(account['_id']),
+                'code': account.get('code'),
+                'name': account.get('name')
+            }
         
-        performance = AnalyticsService.calculate_budget_actuals(budget._id)
-        if performance:
-            budget_dict['actual_amount'] = performance['actual_amount']
-            budget_dict['remaining_balance'] = performance['remaining_balance']
-            budget_dict['achievement_percentage'] = performance['achievement_percentage']
+        performance = AnalyticsService.build_budget_performance(budget_data, actuals[budget_data['_id']])
+        budget_dict['actual_amount'] = performance['actual_amount']
+        budget_dict['remaining_balance'] = performance['remaining_balance']
+        budget_dict['achievement_percentage'] = performance['achievement_percentage']
         
         budget_list.append(budget_dict)
     
@@ -66,11 +71,13 @@ def get_budgets():
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
     }), 200
 
 @budgets_bp.route('/<budget_id>', methods=['GET'])
 @jwt_required()
+@conditional('budgets', 'analytical_accounts', 'budget_revisions', 'daily_rollups', entity_arg='budget_id')
 def get_budget(budget_id):
     db = get_db()
     
@@ -82,7 +89,7 @@ def get_budget(budget_id):
     response = budget.to_dict()
     
     if budget.analytical_account_id:
-        account = db.analytical_accounts.find_one({'_id': ObjectId(budget.analytical_account_id)})
+        account = get_loader().load('analytical_accounts', budget.analytical_account_id)
         if account:
             response['analytical_account'] = {
                 '_id': str(account['_id']),
@@ -98,7 +105,7 @@ def get_budget(budget_id):
         response['variance'] = performance['variance']
     
     revisions = list(db.budget_revisions.find({'budget_id': ObjectId(budget_id)}).sort('created_at', -1))
-    response['revisions'] = [BudgetRevision.from_db(r).to_dict() for r in revisions]
+    response['revisions'] = [BudgetRevision.serialize(r) for r in revisions]
     
     return jsonify(response), 200
 
@@ -119,7 +126,7 @@ def create_budget():
     
     db = get_db()
     
-    if not db.analytical_accounts.find_one({'_id': ObjectId(data['analytical_account_id'])}):
+    if not get_loader().load('analytical_accounts', data['analytical_account_id']):
         return jsonify({'error': 'Analytical account not found'}), 404
     
     budget = Budget()
@@ -166,7 +173,7 @@ def update_budget(budget_id):
         update_data['description'] = data['description']
     
     if 'analytical_account_id' in data:
-        if not db.analytical_accounts.find_one({'_id': ObjectId(data['analytical_account_id'])}):
+        if not get_loader().load('analytical_accounts', data['analytical_account_id']):
             return jsonify({'error': 'Analytical account not found'}), 404
         update_data['analytical_account_id'] = ObjectId(data['analytical_account_id'])
     
@@ -204,7 +211,7 @@ def update_budget(budget_id):
     
     return jsonify({
         'message': 'Budget updated successfully',
-        'budget': Budget.from_db(updated_budget).to_dict()
+        'budget': Budget.serialize(updated_budget)
     }), 200
 
 @budgets_bp.route('/<budget_id>/archive', methods=['POST'])
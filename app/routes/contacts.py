@@ -5,7 +5,12 @@ from bson import ObjectId
 
 from app.database import get_db
 from app.models.contact import Contact
-from app.utils.helpers import admin_required
+from app.utils.helpers import admin_required, user_stamps
+from app.utils.pagination import paginate, page_count
+from app.utils.conditional import conditional
+from app.utils.loader import reference_cache
+from app.services.open_items_service import OpenItemsService
+from app.services.search_service import SearchService
 
 contacts_bp = Blueprint('contacts', __name__)
 
@@ -16,6 +21,8 @@ def get_contacts():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     contact_type = request.args.get('type', '')
     include_archived = request.args.get('include_archived', 'false').lower() == 'true'
@@ -25,13 +32,10 @@ def get_contacts():
     if not include_archived:
         query['is_archived'] = False
     
+    rank = None
     if search:
-        query['$or'] = [
-            {'name': {'$regex': search, '$options': 'i'}},
-            {'email': {'$regex': search, '$options': 'i'}},
-            {'company_name': {'$regex': search, '$options': 'i'}},
-            {'phone': {'$regex': search, '$options': 'i'}}
-        ]
+        query.update(SearchService.build_filter('contacts', search))
+        rank = SearchService.rank_stages('contacts', search)
     
     if contact_type:
         if contact_type in ['customer', 'vendor']:
@@ -39,19 +43,20 @@ def get_contacts():
         else:
             query['contact_type'] = contact_type
     
-    total = db.contacts.count_documents(query)
-    contacts = list(db.contacts.find(query).sort('name', 1).skip((page - 1) * per_page).limit(per_page))
+    contacts, total, next_cursor = paginate(db.contacts, query, 'name', 1, page, per_page, cursor, include_total, rank)
     
     return jsonify({
-        'contacts': [Contact.from_db(c).to_dict() for c in contacts],
+        'contacts': [Contact.serialize(c) for c in contacts],
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
     }), 200
 
 @contacts_bp.route('/<contact_id>', methods=['GET'])
 @jwt_required()
+@conditional('contacts', 'users', entity_arg='contact_id')
 def get_contact(contact_id):
     db = get_db()
     
@@ -103,7 +108,7 @@ def create_contact():
     contact.created_at = datetime.utcnow()
     contact.updated_at = datetime.utcnow()
     
-    result = db.contacts.insert_one(contact.to_db_dict())
+    result = db.contacts.insert_one(SearchService.with_search_keys('contacts', contact.to_db_dict()))
     contact._id = result.inserted_id
     
     return jsonify({
@@ -139,13 +144,19 @@ def update_contact(contact_id):
             else:
                 update_data[field] = data[field]
     
+    update_data.update(SearchService.search_keys('contacts', {**contact_data, **update_data}))
+    
     db.contacts.update_one({'_id': ObjectId(contact_id)}, {'$set': update_data})
+    reference_cache.invalidate('contacts', ObjectId(contact_id))
+    
+    if 'name' in update_data and update_data['name'] != contact_data.get('name'):
+        OpenItemsService.rename_contact(contact_data['_id'], update_data['name'])
     
     updated_contact = db.contacts.find_one({'_id': ObjectId(contact_id)})
     
     return jsonify({
         'message': 'Contact updated successfully',
-        'contact': Contact.from_db(updated_contact).to_dict()
+        'contact': Contact.serialize(updated_contact)
     }), 200
 
 @contacts_bp.route('/<contact_id>/archive', methods=['POST'])
@@ -164,6 +175,7 @@ def archive_contact(contact_id):
         {'_id': ObjectId(contact_id)},
         {'$set': {'is_archived': new_status, 'updated_at': datetime.utcnow()}}
     )
+    reference_cache.invalidate('contacts', ObjectId(contact_id))
     
     return jsonify({
         'message': f"Contact {'archived' if new_status else 'unarchived'} successfully",
@@ -187,11 +199,15 @@ def delete_contact(contact_id):
         return jsonify({'error': 'Cannot delete contact with existing transactions. Archive instead.'}), 400
     
     result = db.contacts.delete_one({'_id': ObjectId(contact_id)})
+    reference_cache.invalidate('contacts', ObjectId(contact_id))
     
     if result.deleted_count == 0:
         return jsonify({'error': 'Contact not found'}), 404
     
-    db.users.delete_many({'contact_id': ObjectId(contact_id)})
+    portal_user_ids = [u['_id'] for u in db.users.find({'contact_id': ObjectId(contact_id)}, {'_id': 1})]
+    db.users.delete_many({'_id': {'$in': portal_user_ids}})
+    for user_id in portal_user_ids:
+        user_stamps.forget(user_id)
     
     return jsonify({'message': 'Contact deleted successfully'}), 200
 
@@ -208,7 +224,7 @@ def get_customers():
     contacts = list(db.contacts.find(query).sort('name', 1))
     
     return jsonify({
-        'customers': [Contact.from_db(c).to_dict() for c in contacts]
+        'customers': [Contact.serialize(c) for c in contacts]
     }), 200
 
 @contacts_bp.route('/vendors', methods=['GET'])
@@ -224,5 +240,5 @@ def get_vendors():
     contacts = list(db.contacts.find(query).sort('name', 1))
     
     return jsonify({
-        'vendors': [Contact.from_db(c).to_dict() for c in contacts]
+        'vendors': [Contact.serialize(c) for c in contacts]
     }), 200
@@ -6,10 +6,18 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.customer_invoice import CustomerInvoice
 from app.utils.helpers import admin_required, generate_number, parse_date
+from app.utils.loader import get_loader
+from app.utils.pagination import paginate, page_count
+from app.utils.json_provider import stream_json
+from app.utils.conditional import conditional, bump_versions
 from app.services.analytics_service import AnalyticsService
+from app.services.rollup_service import RollupService
+from app.services.open_items_service import OpenItemsService
 from app.services.pdf_service import PDFService
 from app.services.file_service import FileService
 from app.services.email_service import EmailService
+from app.services.search_service import SearchService
+from app.services.pricing_service import PricingService
 
 customer_invoices_bp = Blueprint('customer_invoices', __name__)
 
@@ -20,6 +28,8 @@ def get_customer_invoices():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     status = request.args.get('status', '')
     payment_status = request.args.get('payment_status', '')
@@ -27,8 +37,10 @@ def get_customer_invoices():
     
     query = {}
     
+    rank = None
     if search:
-        query['invoice_number'] = {'$regex': search, '$options': 'i'}
+        query.update(SearchService.build_filter('customer_invoices', search))
+        rank = SearchService.rank_stages('customer_invoices', search)
     
     if status:
         query['status'] = status
@@ -39,35 +51,35 @@ def get_customer_invoices():
     if customer_id:
         query['customer_id'] = ObjectId(customer_id)
     
-    total = db.customer_invoices.count_documents(query)
-    invoices = list(db.customer_invoices.find(query).sort('created_at', -1).skip((page - 1) * per_page).limit(per_page))
+    invoices, total, next_cursor = paginate(db.customer_invoices, query, 'created_at', -1, page, per_page, cursor, include_total, rank)
     
-    invoice_list = []
-    for invoice_data in invoices:
-        invoice = CustomerInvoice.from_db(invoice_data)
-        invoice_dict = invoice.to_dict()
-        
-        if invoice.customer_id:
-            customer = db.contacts.find_one({'_id': ObjectId(invoice.customer_id)})
+    customers = get_loader().load_many('contacts', [i.get('customer_id') for i in invoices], ['name', 'company_name'])
+    
+    def rows():
+        for invoice_data in invoices:
+            invoice_dict = CustomerInvoice.serialize(invoice_data)
+            
+            customer = customers.get(invoice_data.get('customer_id'))
             if customer:
                 invoice_dict['customer'] = {
-                    '_id': str(customer['_id']),
+                    '_id': customer['_id'],
                     'name': customer.get('name'),
                     'company_name': customer.get('company_name')
                 }
-        
-        invoice_list.append(invoice_dict)
+            
+            yield invoice_dict
     
-    return jsonify({
-        'customer_invoices': invoice_list,
+    return stream_json({
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
-    }), 200
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
+    }, 'customer_invoices', rows()), 200
 
 @customer_invoices_bp.route('/<invoice_id>', methods=['GET'])
 @jwt_required()
+@conditional('customer_invoices', 'contacts', 'payments', 'sales_orders', 'analytical_accounts', entity_arg='invoice_id')
 def get_customer_invoice(invoice_id):
     db = get_db()
     
@@ -79,7 +91,7 @@ def get_customer_invoice(invoice_id):
     response = invoice.to_dict()
     
     if invoice.customer_id:
-        customer = db.contacts.find_one({'_id': ObjectId(invoice.customer_id)})
+        customer = get_loader().load('contacts', invoice.customer_id)
         if customer:
             response['customer'] = {
                 '_id': str(customer['_id']),
@@ -99,7 +111,7 @@ def get_customer_invoice(invoice_id):
             }
     
     if invoice.analytical_account_id:
-        account = db.analytical_accounts.find_one({'_id': ObjectId(invoice.analytical_account_id)})
+        account = get_loader().load('analytical_accounts', invoice.analytical_account_id)
         if account:
             response['analytical_account'] = {
                 '_id': str(account['_id']),
@@ -133,7 +145,7 @@ def create_customer_invoice():
     
     db = get_db()
     
-    customer = db.contacts.find_one({'_id': ObjectId(data['customer_id'])})
+    customer = get_loader().load('contacts', data['customer_id'])
     if not customer:
         return jsonify({'error': 'Customer not found'}), 404
     
@@ -151,50 +163,24 @@ def create_customer_invoice():
     invoice.created_at = datetime.utcnow()
     invoice.updated_at = datetime.utcnow()
     
-    items = []
-    for item_data in data['items']:
-        product = db.products.find_one({'_id': ObjectId(item_data['product_id'])})
-        if not product:
-            return jsonify({'error': f"Product {item_data['product_id']} not found"}), 404
-        
-        quantity = float(item_data.get('quantity', 1))
-        unit_price = float(item_data.get('unit_price', product.get('sale_price', 0)))
-        tax_rate = float(item_data.get('tax_rate', product.get('tax_rate', 18)))
-        subtotal = quantity * unit_price
-        tax_amount = subtotal * (tax_rate / 100)
-        
-        item = {
-            'product_id': str(product['_id']),
-            'product_name': product.get('name'),
-            'product_sku': product.get('sku'),
-            'quantity': quantity,
-            'unit': item_data.get('unit', product.get('unit', 'pcs')),
-            'unit_price': unit_price,
-            'tax_rate': tax_rate,
-            'subtotal': subtotal,
-            'tax_amount': tax_amount,
-            'total': subtotal + tax_amount
-        }
-        items.append(item)
-    
-    invoice.items = items
+    priced = PricingService.price_items(data['items'], PricingService.SALE_PRICE)
+    invoice.items = priced.items
     invoice.calculate_totals()
     
     analytical_account_id = data.get('analytical_account_id')
-    if not analytical_account_id and items:
-        first_product = db.products.find_one({'_id': ObjectId(items[0]['product_id'])})
-        if first_product:
-            analytical_account_id = AnalyticsService.get_analytical_account_for_transaction(
-                product_id=first_product['_id'],
-                category=first_product.get('category'),
-                contact_id=data['customer_id'],
-                amount=invoice.total_amount
-            )
+    first_product = priced.first_product
+    if not analytical_account_id and first_product:
+        analytical_account_id = AnalyticsService.get_analytical_account_for_transaction(
+            product_id=first_product['_id'],
+            category=first_product.get('category'),
+            contact_id=data['customer_id'],
+            amount=invoice.total_amount
+        )
     
     if analytical_account_id:
         invoice.analytical_account_id = str(analytical_account_id)
     
-    result = db.customer_invoices.insert_one(invoice.to_db_dict())
+    result = db.customer_invoices.insert_one(SearchService.with_search_keys('customer_invoices', invoice.to_db_dict()))
     invoice._id = result.inserted_id
     
     return jsonify({
@@ -219,7 +205,7 @@ def update_customer_invoice(invoice_id):
     update_data = {'updated_at': datetime.utcnow()}
     
     if 'customer_id' in data:
-        customer = db.contacts.find_one({'_id': ObjectId(data['customer_id'])})
+        customer = get_loader().load('contacts', data['customer_id'])
         if not customer:
             return jsonify({'error': 'Customer not found'}), 404
         update_data['customer_id'] = ObjectId(data['customer_id'])
@@ -240,42 +226,13 @@ def update_customer_invoice(invoice_id):
         update_data['analytical_account_id'] = ObjectId(data['analytical_account_id']) if data['analytical_account_id'] else None
     
     if 'items' in data:
-        items = []
-        subtotal = 0
-        tax_amount = 0
-        
-        for item_data in data['items']:
-            product = db.products.find_one({'_id': ObjectId(item_data['product_id'])})
-            if not product:
-                return jsonify({'error': f"Product {item_data['product_id']} not found"}), 404
-            
-            quantity = float(item_data.get('quantity', 1))
-            unit_price = float(item_data.get('unit_price', product.get('sale_price', 0)))
-            tax_rate = float(item_data.get('tax_rate', product.get('tax_rate', 18)))
-            item_subtotal = quantity * unit_price
-            item_tax = item_subtotal * (tax_rate / 100)
-            
-            item = {
-                'product_id': str(product['_id']),
-                'product_name': product.get('name'),
-                'product_sku': product.get('sku'),
-                'quantity': quantity,
-                'unit': item_data.get('unit', product.get('unit', 'pcs')),
-                'unit_price': unit_price,
-                'tax_rate': tax_rate,
-                'subtotal': item_subtotal,
-                'tax_amount': item_tax,
-                'total': item_subtotal + item_tax
-            }
-            items.append(item)
-            subtotal += item_subtotal
-            tax_amount += item_tax
+        priced = PricingService.price_items(data['items'], PricingService.SALE_PRICE)
         
         discount = update_data.get('discount_amount', invoice_data.get('discount_amount', 0))
-        total = subtotal + tax_amount - discount
-        update_data['items'] = items
-        update_data['subtotal'] = subtotal
-        update_data['tax_amount'] = tax_amount
+        total = priced.total(discount)
+        update_data['items'] = priced.items
+        update_data['subtotal'] = priced.subtotal
+        update_data['tax_amount'] = priced.tax_amount
         update_data['total_amount'] = total
         update_data['amount_due'] = total - invoice_data.get('amount_paid', 0)
     
@@ -285,7 +242,7 @@ def update_customer_invoice(invoice_id):
     
     return jsonify({
         'message': 'Invoice updated successfully',
-        'customer_invoice': CustomerInvoice.from_db(updated_invoice).to_dict()
+        'customer_invoice': CustomerInvoice.serialize(updated_invoice)
     }), 200
 
 @customer_invoices_bp.route('/<invoice_id>/post', methods=['POST'])
@@ -301,12 +258,18 @@ def post_customer_invoice(invoice_id):
     if invoice_data.get('status') != CustomerInvoice.STATUS_DRAFT:
         return jsonify({'error': 'Only draft invoices can be posted'}), 400
     
-    db.customer_invoices.update_one(
-        {'_id': ObjectId(invoice_id)},
+    result = db.customer_invoices.update_one(
+        {'_id': ObjectId(invoice_id), 'status': CustomerInvoice.STATUS_DRAFT},
         {'$set': {'status': CustomerInvoice.STATUS_POSTED, 'updated_at': datetime.utcnow()}}
     )
+    if result.modified_count == 0:
+        return jsonify({'error': 'Only draft invoices can be posted'}), 400
+    
+    RollupService.refresh_documents(RollupService.KIND_INCOME, [invoice_data])
+    
+    customer = get_loader().load('contacts', invoice_data.get('customer_id'))
+    OpenItemsService.refresh(OpenItemsService.KIND_RECEIVABLE, invoice_data['_id'], customer)
     
-    customer = db.contacts.find_one({'_id': invoice_data.get('customer_id')})
     if customer and customer.get('email'):
         due_date = invoice_data.get('due_date')
         due_date_str = due_date.strftime('%Y-%m-%d') if due_date else 'N/A'
@@ -336,10 +299,16 @@ def cancel_customer_invoice(invoice_id):
     if invoice_data.get('amount_paid', 0) > 0:
         return jsonify({'error': 'Cannot cancel invoice with payments'}), 400
     
-    db.customer_invoices.update_one(
-        {'_id': ObjectId(invoice_id)},
+    result = db.customer_invoices.update_one(
+        {'_id': ObjectId(invoice_id), 'status': invoice_data.get('status')},
         {'$set': {'status': CustomerInvoice.STATUS_CANCELLED, 'updated_at': datetime.utcnow()}}
     )
+    if result.modified_count == 0:
+        return jsonify({'error': 'Invoice was modified concurrently, please retry'}), 409
+    
+    if invoice_data.get('status') == CustomerInvoice.STATUS_POSTED:
+        RollupService.refresh_documents(RollupService.KIND_INCOME, [invoice_data])
+        OpenItemsService.refresh(OpenItemsService.KIND_RECEIVABLE, invoice_data['_id'])
     
     return jsonify({'message': 'Invoice cancelled successfully'}), 200
 
@@ -353,7 +322,7 @@ def generate_invoice_pdf(invoice_id):
         return jsonify({'error': 'Invoice not found'}), 404
     
     invoice = CustomerInvoice.from_db(invoice_data)
-    customer = db.contacts.find_one({'_id': ObjectId(invoice.customer_id)}) if invoice.customer_id else {}
+    customer = get_loader().load('contacts', invoice.customer_id) if invoice.customer_id else {}
     
     invoice_dict = invoice.to_dict()
     invoice_dict['invoice_date'] = invoice.invoice_date.strftime('%Y-%m-%d') if invoice.invoice_date else ''
@@ -371,8 +340,10 @@ def generate_invoice_pdf(invoice_id):
     if result['success']:
         db.customer_invoices.update_one(
             {'_id': ObjectId(invoice_id)},
-            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name']}}
+            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name'], 'updated_at': datetime.utcnow()}}
         )
+        # GET handler: the after_request hook only bumps versions for write methods.
+        bump_versions('customer_invoices')
         return jsonify({'url': result['url']}), 200
     else:
         return jsonify({'error': 'Failed to generate PDF'}), 500
@@ -387,7 +358,7 @@ def send_invoice_email(invoice_id):
     if not invoice_data:
         return jsonify({'error': 'Invoice not found'}), 404
     
-    customer = db.contacts.find_one({'_id': invoice_data.get('customer_id')})
+    customer = get_loader().load('contacts', invoice_data.get('customer_id'))
     if not customer or not customer.get('email'):
         return jsonify({'error': 'Customer email not found'}), 400
     
@@ -403,9 +374,9 @@ def send_invoice_email(invoice_id):
     )
     
     if success:
-        return jsonify({'message': 'Invoice email sent successfully'}), 200
+        return jsonify({'message': 'Invoice email queued for delivery'}), 200
     else:
-        return jsonify({'error': 'Failed to send email'}), 500
+        return jsonify({'error': 'Failed to queue email'}), 500
 
 @customer_invoices_bp.route('/<invoice_id>', methods=['DELETE'])
 @jwt_required()
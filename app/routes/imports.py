@@ -0,0 +1,33 @@
+import io
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.utils.helpers import admin_required
+from app.services.import_service import ImportService
+
+imports_bp = Blueprint('imports', __name__)
+
+@imports_bp.route('/<kind>', methods=['POST'])
+@jwt_required()
+@admin_required
+def import_documents(kind):
+    """Bulk-create documents from an NDJSON (default) or CSV request body.
+    
+    The body is read line by line as it arrives. ?format=csv selects CSV (also
+    implied by a text/csv Content-Type) and ?dry_run=true only validates.
+    """
+    if kind not in ImportService.KINDS:
+        return jsonify({'error': f'Unknown import kind. Must be one of: {list(ImportService.KINDS)}'}), 404
+    
+    data_format = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    if data_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+    lines = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    rows = ImportService.parse_csv(lines) if data_format == 'csv' else ImportService.parse_ndjson(lines)
+    
+    result = ImportService.run(kind, rows, user_id=get_jwt_identity(), dry_run=dry_run)
+    
+    status_code = 200 if dry_run or not result['imported'] else 201
+    return jsonify(result), status_code
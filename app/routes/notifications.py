@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 from app.services.notification_service import NotificationService
 
@@ -10,12 +10,13 @@ notifications_bp = Blueprint('notifications', __name__)
 def get_notifications():
     """Get notifications for the current user"""
     user_id = get_jwt_identity()
+    role = get_jwt().get('role')
     
     limit = int(request.args.get('limit', 20))
     unread_only = request.args.get('unread_only', 'false').lower() == 'true'
     
-    notifications = NotificationService.get_user_notifications(user_id, limit, unread_only)
-    unread_count = NotificationService.get_unread_count(user_id)
+    notifications = NotificationService.get_user_notifications(user_id, limit, unread_only, role)
+    unread_count = NotificationService.get_unread_count(user_id, role)
     
     return jsonify({
         'notifications': notifications,
@@ -27,7 +28,8 @@ def get_notifications():
 def get_unread_count():
     """Get count of unread notifications"""
     user_id = get_jwt_identity()
-    count = NotificationService.get_unread_count(user_id)
+    role = get_jwt().get('role')
+    count = NotificationService.get_unread_count(user_id, role)
     
     return jsonify({'unread_count': count}), 200
 
@@ -36,8 +38,9 @@ def get_unread_count():
 def mark_notification_read(notification_id):
     """Mark a notification as read"""
     user_id = get_jwt_identity()
+    role = get_jwt().get('role')
     
-    success = NotificationService.mark_as_read(notification_id, user_id)
+    success = NotificationService.mark_as_read(notification_id, user_id, role)
     
     if success:
         return jsonify({'message': 'Notification marked as read'}), 200
@@ -48,8 +51,9 @@ def mark_notification_read(notification_id):
 def mark_all_read():
     """Mark all notifications as read"""
     user_id = get_jwt_identity()
+    role = get_jwt().get('role')
     
-    count = NotificationService.mark_all_as_read(user_id)
+    count = NotificationService.mark_all_as_read(user_id, role)
     
     return jsonify({
         'message': f'{count} notifications marked as read',
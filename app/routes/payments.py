@@ -6,7 +6,11 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.payment import Payment
 from app.utils.helpers import admin_required, generate_number, parse_date
+from app.utils.loader import get_loader
+from app.utils.pagination import paginate, page_count
 from app.services.email_service import EmailService
+from app.services.open_items_service import OpenItemsService
+from app.services.search_service import SearchService
 
 payments_bp = Blueprint('payments', __name__)
 
@@ -17,17 +21,18 @@ def get_payments():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     payment_type = request.args.get('type', '')
     contact_id = request.args.get('contact_id', '')
     
     query = {}
     
+    rank = None
     if search:
-        query['$or'] = [
-            {'payment_number': {'$regex': search, '$options': 'i'}},
-            {'reference_number': {'$regex': search, '$options': 'i'}}
-        ]
+        query.update(SearchService.build_filter('payments', search))
+        rank = SearchService.rank_stages('payments', search)
     
     if payment_type:
         query['payment_type'] = payment_type
@@ -35,38 +40,38 @@ def get_payments():
     if contact_id:
         query['contact_id'] = ObjectId(contact_id)
     
-    total = db.payments.count_documents(query)
-    payments = list(db.payments.find(query).sort('created_at', -1).skip((page - 1) * per_page).limit(per_page))
+    payments, total, next_cursor = paginate(db.payments, query, 'created_at', -1, page, per_page, cursor, include_total, rank)
+    
+    loader = get_loader()
+    contacts = loader.load_many('contacts', [p.get('contact_id') for p in payments], ['name', 'company_name'])
+    invoices = loader.load_many('customer_invoices', [p.get('invoice_id') for p in payments], ['invoice_number'])
+    bills = loader.load_many('vendor_bills', [p.get('bill_id') for p in payments], ['bill_number'])
     
     payment_list = []
     for payment_data in payments:
-        payment = Payment.from_db(payment_data)
-        payment_dict = payment.to_dict()
+        payment_dict = Payment.serialize(payment_data)
         
-        if payment.contact_id:
-            contact = db.contacts.find_one({'_id': ObjectId(payment.contact_id)})
-            if contact:
-                payment_dict['contact'] = {
-                    '_id': str(contact['_id']),
-                    'name': contact.get('name'),
-                    'company_name': contact.get('company_name')
-                }
+        contact = contacts.get(payment_data.get('contact_id'))
+        if contact:
+            payment_dict['contact'] = {
+                '_id': str(contact['_id']),
+                'name': contact.get('name'),
+                'company_name': contact.get('company_name')
+            }
         
-        if payment.invoice_id:
-            invoice = db.customer_invoices.find_one({'_id': ObjectId(payment.invoice_id)})
-            if invoice:
-                payment_dict['invoice'] = {
-                    '_id': str(invoice['_id']),
-                    'invoice_number': invoice.get('invoice_number')
-                }
+        invoice = invoices.get(payment_data.get('invoice_id'))
+        if invoice:
+            payment_dict['invoice'] = {
+                '_id': str(invoice['_id']),
+                'invoice_number': invoice.get('invoice_number')
+            }
         
-        if payment.bill_id:
-            bill = db.vendor_bills.find_one({'_id': ObjectId(payment.bill_id)})
-            if bill:
-                payment_dict['bill'] = {
-                    '_id': str(bill['_id']),
-                    'bill_number': bill.get('bill_number')
-                }
+        bill = bills.get(payment_data.get('bill_id'))
+        if bill:
+            payment_dict['bill'] = {
+                '_id': str(bill['_id']),
+                'bill_number': bill.get('bill_number')
+            }
         
         payment_list.append(payment_dict)
     
@@ -75,7 +80,8 @@ def get_payments():
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
     }), 200
 
 @payments_bp.route('/<payment_id>', methods=['GET'])
@@ -91,7 +97,7 @@ def get_payment(payment_id):
     response = payment.to_dict()
     
     if payment.contact_id:
-        contact = db.contacts.find_one({'_id': ObjectId(payment.contact_id)})
+        contact = get_loader().load('contacts', payment.contact_id)
         if contact:
             response['contact'] = {
                 '_id': str(contact['_id']),
@@ -178,7 +184,7 @@ def create_payment():
         
         payment.contact_id = str(invoice.get('customer_id'))
         
-        result = db.payments.insert_one(payment.to_db_dict())
+        result = db.payments.insert_one(SearchService.with_search_keys('payments', payment.to_db_dict()))
         payment._id = result.inserted_id
         
         db.customer_invoices.update_one(
@@ -190,8 +196,9 @@ def create_payment():
                 'updated_at': datetime.utcnow()
             }}
         )
+        OpenItemsService.refresh(OpenItemsService.KIND_RECEIVABLE, invoice['_id'])
         
-        customer = db.contacts.find_one({'_id': invoice.get('customer_id')})
+        customer = get_loader().load('contacts', invoice.get('customer_id'))
         if customer and customer.get('email'):
             EmailService.send_payment_confirmation_email(
                 customer.get('email'),
@@ -224,7 +231,7 @@ def create_payment():
         
         payment.contact_id = str(bill.get('vendor_id'))
         
-        result = db.payments.insert_one(payment.to_db_dict())
+        result = db.payments.insert_one(SearchService.with_search_keys('payments', payment.to_db_dict()))
         payment._id = result.inserted_id
         
         db.vendor_bills.update_one(
@@ -236,8 +243,9 @@ def create_payment():
                 'updated_at': datetime.utcnow()
             }}
         )
+        OpenItemsService.refresh(OpenItemsService.KIND_PAYABLE, bill['_id'])
     else:
-        result = db.payments.insert_one(payment.to_db_dict())
+        result = db.payments.insert_one(SearchService.with_search_keys('payments', payment.to_db_dict()))
         payment._id = result.inserted_id
     
     return jsonify({
@@ -275,13 +283,15 @@ def update_payment(payment_id):
     if 'notes' in data:
         update_data['notes'] = data['notes']
     
+    update_data.update(SearchService.search_keys('payments', {**payment_data, **update_data}))
+    
     db.payments.update_one({'_id': ObjectId(payment_id)}, {'$set': update_data})
     
     updated_payment = db.payments.find_one({'_id': ObjectId(payment_id)})
     
     return jsonify({
         'message': 'Payment updated successfully',
-        'payment': Payment.from_db(updated_payment).to_dict()
+        'payment': Payment.serialize(updated_payment)
     }), 200
 
 @payments_bp.route('/<payment_id>/reconcile', methods=['POST'])
@@ -341,6 +351,7 @@ def delete_payment(payment_id):
                     'updated_at': datetime.utcnow()
                 }}
             )
+            OpenItemsService.refresh(OpenItemsService.KIND_RECEIVABLE, invoice['_id'])
     
     if payment_data.get('bill_id'):
         bill = db.vendor_bills.find_one({'_id': payment_data['bill_id']})
@@ -364,6 +375,7 @@ def delete_payment(payment_id):
                     'updated_at': datetime.utcnow()
                 }}
             )
+            OpenItemsService.refresh(OpenItemsService.KIND_PAYABLE, bill['_id'])
     
     db.payments.delete_one({'_id': ObjectId(payment_id)})
     
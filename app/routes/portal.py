@@ -1,23 +1,30 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from datetime import datetime
 from bson import ObjectId
 import os
 
 from app.database import get_db
 from app.models.user import User
+from app.utils.pagination import paginate
+from app.utils.conditional import conditional, bump_versions
+from app.utils.loader import reference_cache
 from app.services.pdf_service import PDFService
 from app.services.file_service import FileService
 from app.services.razorpay_service import RazorpayService
+from app.services.open_items_service import OpenItemsService
+from app.services.search_service import SearchService
 
 portal_bp = Blueprint('portal', __name__)
 
 def get_portal_user_contact(user_id):
-    """Get user and their linked contact for portal users and vendors"""
-    db = get_db()
-    user = db.users.find_one({'_id': ObjectId(user_id)})
-    if not user:
-        return None, None
+    """Get the caller's claims (role, contact_id) and linked contact for portal users and vendors"""
+    user = get_jwt()
+    if 'role' not in user:
+        # Token issued before role claims were added
+        user = get_db().users.find_one({'_id': ObjectId(user_id)})
+        if not user:
+            return None, None
     
     # Allow both portal_user (customer) and vendor roles
     if user.get('role') not in [User.ROLE_PORTAL_USER, User.ROLE_VENDOR]:
@@ -27,11 +34,12 @@ def get_portal_user_contact(user_id):
     if not contact_id:
         return None, None
     
-    contact = db.contacts.find_one({'_id': ObjectId(contact_id)})
+    contact = reference_cache.get('contacts', contact_id)
     return user, contact
 
 @portal_bp.route('/invoices', methods=['GET'])
 @jwt_required()
+@conditional('customer_invoices', 'users', 'contacts')
 def get_my_invoices():
     user_id = get_jwt_identity()
     db = get_db()
@@ -46,6 +54,8 @@ def get_my_invoices():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     payment_status = request.args.get('payment_status', '')
     
     # Query by contact_id - also check by contact email for matching
@@ -61,8 +71,7 @@ def get_my_invoices():
     if payment_status:
         query['payment_status'] = payment_status
     
-    total = db.customer_invoices.count_documents(query)
-    invoices = list(db.customer_invoices.find(query).sort('invoice_date', -1).skip((page - 1) * per_page).limit(per_page))
+    invoices, total, next_cursor = paginate(db.customer_invoices, query, 'invoice_date', -1, page, per_page, cursor, include_total)
     
     invoice_list = []
     for inv in invoices:
@@ -83,7 +92,8 @@ def get_my_invoices():
         'invoices': invoice_list,
         'total': total,
         'page': page,
-        'per_page': per_page
+        'per_page': per_page,
+        'next_cursor': next_cursor
     }), 200
 
 @portal_bp.route('/invoices/<invoice_id>', methods=['GET'])
@@ -214,14 +224,17 @@ def download_my_invoice(invoice_id):
     if result['success']:
         db.customer_invoices.update_one(
             {'_id': ObjectId(invoice_id)},
-            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name']}}
+            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name'], 'updated_at': datetime.utcnow()}}
         )
+        # GET handler: the after_request hook only bumps versions for write methods.
+        bump_versions('customer_invoices')
         return jsonify({'url': result['url']}), 200
     else:
         return jsonify({'error': 'Failed to generate PDF'}), 500
 
 @portal_bp.route('/bills', methods=['GET'])
 @jwt_required()
+@conditional('vendor_bills', 'users', 'contacts')
 def get_my_bills():
     user_id = get_jwt_identity()
     db = get_db()
@@ -233,14 +246,15 @@ def get_my_bills():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     
     query = {
         'vendor_id': contact['_id'],
         'status': 'posted'
     }
     
-    total = db.vendor_bills.count_documents(query)
-    bills = list(db.vendor_bills.find(query).sort('bill_date', -1).skip((page - 1) * per_page).limit(per_page))
+    bills, total, next_cursor = paginate(db.vendor_bills, query, 'bill_date', -1, page, per_page, cursor, include_total)
     
     bill_list = []
     for bill in bills:
@@ -260,11 +274,13 @@ def get_my_bills():
         'bills': bill_list,
         'total': total,
         'page': page,
-        'per_page': per_page
+        'per_page': per_page,
+        'next_cursor': next_cursor
     }), 200
 
 @portal_bp.route('/sales-orders', methods=['GET'])
 @jwt_required()
+@conditional('sales_orders', 'users', 'contacts')
 def get_my_sales_orders():
     user_id = get_jwt_identity()
     db = get_db()
@@ -276,14 +292,15 @@ def get_my_sales_orders():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     
     query = {
         'customer_id': contact['_id'],
         'status': {'$ne': 'cancelled'}
     }
     
-    total = db.sales_orders.count_documents(query)
-    orders = list(db.sales_orders.find(query).sort('order_date', -1).skip((page - 1) * per_page).limit(per_page))
+    orders, total, next_cursor = paginate(db.sales_orders, query, 'order_date', -1, page, per_page, cursor, include_total)
     
     order_list = []
     for order in orders:
@@ -301,11 +318,13 @@ def get_my_sales_orders():
         'sales_orders': order_list,
         'total': total,
         'page': page,
-        'per_page': per_page
+        'per_page': per_page,
+        'next_cursor': next_cursor
     }), 200
 
 @portal_bp.route('/purchase-orders', methods=['GET'])
 @jwt_required()
+@conditional('purchase_orders', 'users', 'contacts')
 def get_my_purchase_orders():
     user_id = get_jwt_identity()
     db = get_db()
@@ -317,14 +336,15 @@ def get_my_purchase_orders():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     
     query = {
         'vendor_id': contact['_id'],
         'status': {'$ne': 'cancelled'}
     }
     
-    total = db.purchase_orders.count_documents(query)
-    orders = list(db.purchase_orders.find(query).sort('order_date', -1).skip((page - 1) * per_page).limit(per_page))
+    orders, total, next_cursor = paginate(db.purchase_orders, query, 'order_date', -1, page, per_page, cursor, include_total)
     
     order_list = []
     for order in orders:
@@ -342,7 +362,8 @@ def get_my_purchase_orders():
         'purchase_orders': order_list,
         'total': total,
         'page': page,
-        'per_page': per_page
+        'per_page': per_page,
+        'next_cursor': next_cursor
     }), 200
 
 @portal_bp.route('/profile', methods=['GET'])
@@ -451,8 +472,10 @@ def download_my_sales_order(order_id):
     if result['success']:
         db.sales_orders.update_one(
             {'_id': ObjectId(order_id)},
-            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name']}}
+            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name'], 'updated_at': datetime.utcnow()}}
         )
+        # GET handler: the after_request hook only bumps versions for write methods.
+        bump_versions('sales_orders')
         return jsonify({'url': result['url']}), 200
     
     return jsonify({'error': 'Failed to generate document'}), 500
@@ -514,6 +537,8 @@ def update_my_profile():
         if contact_update:
             contact_update['updated_at'] = datetime.utcnow()
             db.contacts.update_one({'_id': user['contact_id']}, {'$set': contact_update})
+            reference_cache.invalidate('contacts', user['contact_id'])
+            SearchService.reindex('contacts', user['contact_id'])
     
     return jsonify({'message': 'Profile updated successfully'}), 200
 
@@ -693,7 +718,7 @@ def verify_invoice_payment(invoice_id):
         'updated_at': datetime.utcnow()
     }
     
-    db.payments.insert_one(payment_data)
+    db.payments.insert_one(SearchService.with_search_keys('payments', payment_data))
     
     # Update invoice
     new_amount_paid = invoice.get('amount_paid', 0) + amount_paid
@@ -710,6 +735,7 @@ def verify_invoice_payment(invoice_id):
             'updated_at': datetime.utcnow()
         }}
     )
+    OpenItemsService.refresh(OpenItemsService.KIND_RECEIVABLE, invoice['_id'], contact)
     
     return jsonify({
         'message': 'Payment successful',
@@ -6,6 +6,10 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.product import Product
 from app.utils.helpers import admin_required
+from app.utils.pagination import paginate, page_count
+from app.utils.conditional import conditional
+from app.utils.loader import reference_cache
+from app.services.search_service import SearchService
 
 products_bp = Blueprint('products', __name__)
 
@@ -16,6 +20,8 @@ def get_products():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     category = request.args.get('category', '')
     product_type = request.args.get('type', '')
@@ -26,12 +32,10 @@ def get_products():
     if not include_archived:
         query['is_archived'] = False
     
+    rank = None
     if search:
-        query['$or'] = [
-            {'name': {'$regex': search, '$options': 'i'}},
-            {'sku': {'$regex': search, '$options': 'i'}},
-            {'description': {'$regex': search, '$options': 'i'}}
-        ]
+        query.update(SearchService.build_filter('products', search))
+        rank = SearchService.rank_stages('products', search)
     
     if category:
         query['category'] = category
@@ -39,15 +43,15 @@ def get_products():
     if product_type:
         query['product_type'] = product_type
     
-    total = db.products.count_documents(query)
-    products = list(db.products.find(query).sort('name', 1).skip((page - 1) * per_page).limit(per_page))
+    products, total, next_cursor = paginate(db.products, query, 'name', 1, page, per_page, cursor, include_total, rank)
     
     return jsonify({
-        'products': [Product.from_db(p).to_dict() for p in products],
+        'products': [Product.serialize(p) for p in products],
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
     }), 200
 
 @products_bp.route('/categories', methods=['GET'])
@@ -62,6 +66,7 @@ def get_categories():
 
 @products_bp.route('/<product_id>', methods=['GET'])
 @jwt_required()
+@conditional('products', 'analytical_accounts', entity_arg='product_id')
 def get_product(product_id):
     db = get_db()
     
@@ -117,7 +122,7 @@ def create_product():
     product.created_at = datetime.utcnow()
     product.updated_at = datetime.utcnow()
     
-    result = db.products.insert_one(product.to_db_dict())
+    result = db.products.insert_one(SearchService.with_search_keys('products', product.to_db_dict()))
     product._id = result.inserted_id
     
     return jsonify({
@@ -159,13 +164,16 @@ def update_product(product_id):
             else:
                 update_data[field] = data[field]
     
+    update_data.update(SearchService.search_keys('products', {**product_data, **update_data}))
+    
     db.products.update_one({'_id': ObjectId(product_id)}, {'$set': update_data})
+    reference_cache.invalidate('products', ObjectId(product_id))
     
     updated_product = db.products.find_one({'_id': ObjectId(product_id)})
     
     return jsonify({
         'message': 'Product updated successfully',
-        'product': Product.from_db(updated_product).to_dict()
+        'product': Product.serialize(updated_product)
     }), 200
 
 @products_bp.route('/<product_id>/archive', methods=['POST'])
@@ -184,6 +192,7 @@ def archive_product(product_id):
         {'_id': ObjectId(product_id)},
         {'$set': {'is_archived': new_status, 'updated_at': datetime.utcnow()}}
     )
+    reference_cache.invalidate('products', ObjectId(product_id))
     
     return jsonify({
         'message': f"Product {'archived' if new_status else 'unarchived'} successfully",
@@ -197,6 +206,7 @@ def delete_product(product_id):
     db = get_db()
     
     result = db.products.delete_one({'_id': ObjectId(product_id)})
+    reference_cache.invalidate('products', ObjectId(product_id))
     
     if result.deleted_count == 0:
         return jsonify({'error': 'Product not found'}), 404
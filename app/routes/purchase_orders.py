@@ -6,9 +6,14 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.purchase_order import PurchaseOrder
 from app.utils.helpers import admin_required, generate_number, parse_date
+from app.utils.loader import get_loader
+from app.utils.conditional import bump_versions
+from app.utils.pagination import paginate, page_count
 from app.services.analytics_service import AnalyticsService
 from app.services.pdf_service import PDFService
 from app.services.file_service import FileService
+from app.services.search_service import SearchService
+from app.services.pricing_service import PricingService
 
 purchase_orders_bp = Blueprint('purchase_orders', __name__)
 
@@ -19,16 +24,18 @@ def get_purchase_orders():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     status = request.args.get('status', '')
     vendor_id = request.args.get('vendor_id', '')
     
     query = {}
     
+    rank = None
     if search:
-        query['$or'] = [
-            {'po_number': {'$regex': search, '$options': 'i'}}
-        ]
+        query.update(SearchService.build_filter('purchase_orders', search))
+        rank = SearchService.rank_stages('purchase_orders', search)
     
     if status:
         query['status'] = status
@@ -36,22 +43,21 @@ def get_purchase_orders():
     if vendor_id:
         query['vendor_id'] = ObjectId(vendor_id)
     
-    total = db.purchase_orders.count_documents(query)
-    orders = list(db.purchase_orders.find(query).sort('created_at', -1).skip((page - 1) * per_page).limit(per_page))
+    orders, total, next_cursor = paginate(db.purchase_orders, query, 'created_at', -1, page, per_page, cursor, include_total, rank)
+    
+    vendors = get_loader().load_many('contacts', [o.get('vendor_id') for o in orders], ['name', 'company_name'])
     
     order_list = []
     for order_data in orders:
-        order = PurchaseOrder.from_db(order_data)
-        order_dict = order.to_dict()
+        order_dict = PurchaseOrder.serialize(order_data)
         
-        if order.vendor_id:
-            vendor = db.contacts.find_one({'_id': ObjectId(order.vendor_id)})
-            if vendor:
-                order_dict['vendor'] = {
-                    '_id': str(vendor['_id']),
-                    'name': vendor.get('name'),
-                    'company_name': vendor.get('company_name')
-                }
+        vendor = vendors.get(order_data.get('vendor_id'))
+        if vendor:
+            order_dict['vendor'] = {
+                '_id': str(vendor['_id']),
+                'name': vendor.get('name'),
+                'company_name': vendor.get('company_name')
+            }
         
         order_list.append(order_dict)
     
@@ -60,7 +66,8 @@ def get_purchase_orders():
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
     }), 200
 
 @purchase_orders_bp.route('/<po_id>', methods=['GET'])
@@ -76,7 +83,7 @@ def get_purchase_order(po_id):
     response = order.to_dict()
     
     if order.vendor_id:
-        vendor = db.contacts.find_one({'_id': ObjectId(order.vendor_id)})
+        vendor = get_loader().load('contacts', order.vendor_id)
         if vendor:
             response['vendor'] = {
                 '_id': str(vendor['_id']),
@@ -87,7 +94,7 @@ def get_purchase_order(po_id):
             }
     
     if order.analytical_account_id:
-        account = db.analytical_accounts.find_one({'_id': ObjectId(order.analytical_account_id)})
+        account = get_loader().load('analytical_accounts', order.analytical_account_id)
         if account:
             response['analytical_account'] = {
                 '_id': str(account['_id']),
@@ -97,7 +104,7 @@ def get_purchase_order(po_id):
     
     for item in response.get('items', []):
         if item.get('product_id'):
-            product = db.products.find_one({'_id': ObjectId(item['product_id'])})
+            product = get_loader().load('products', item['product_id'])
             if product:
                 item['product'] = {
                     '_id': str(product['_id']),
@@ -130,7 +137,7 @@ def create_purchase_order():
     
     db = get_db()
     
-    vendor = db.contacts.find_one({'_id': ObjectId(data['vendor_id'])})
+    vendor = get_loader().load('contacts', data['vendor_id'])
     if not vendor:
         return jsonify({'error': 'Vendor not found'}), 404
     
@@ -145,50 +152,24 @@ def create_purchase_order():
     order.created_at = datetime.utcnow()
     order.updated_at = datetime.utcnow()
     
-    items = []
-    for item_data in data['items']:
-        product = db.products.find_one({'_id': ObjectId(item_data['product_id'])})
-        if not product:
-            return jsonify({'error': f"Product {item_data['product_id']} not found"}), 404
-        
-        quantity = float(item_data.get('quantity', 1))
-        unit_price = float(item_data.get('unit_price', product.get('purchase_price', 0)))
-        tax_rate = float(item_data.get('tax_rate', product.get('tax_rate', 18)))
-        subtotal = quantity * unit_price
-        tax_amount = subtotal * (tax_rate / 100)
-        
-        item = {
-            'product_id': str(product['_id']),
-            'product_name': product.get('name'),
-            'product_sku': product.get('sku'),
-            'quantity': quantity,
-            'unit': item_data.get('unit', product.get('unit', 'pcs')),
-            'unit_price': unit_price,
-            'tax_rate': tax_rate,
-            'subtotal': subtotal,
-            'tax_amount': tax_amount,
-            'total': subtotal + tax_amount
-        }
-        items.append(item)
-    
-    order.items = items
+    priced = PricingService.price_items(data['items'], PricingService.PURCHASE_PRICE)
+    order.items = priced.items
     order.calculate_totals()
     
     analytical_account_id = data.get('analytical_account_id')
-    if not analytical_account_id and items:
-        first_product = db.products.find_one({'_id': ObjectId(items[0]['product_id'])})
-        if first_product:
-            analytical_account_id = AnalyticsService.get_analytical_account_for_transaction(
-                product_id=first_product['_id'],
-                category=first_product.get('category'),
-                contact_id=data['vendor_id'],
-                amount=order.total_amount
-            )
+    first_product = priced.first_product
+    if not analytical_account_id and first_product:
+        analytical_account_id = AnalyticsService.get_analytical_account_for_transaction(
+            product_id=first_product['_id'],
+            category=first_product.get('category'),
+            contact_id=data['vendor_id'],
+            amount=order.total_amount
+        )
     
     if analytical_account_id:
         order.analytical_account_id = str(analytical_account_id)
     
-    result = db.purchase_orders.insert_one(order.to_db_dict())
+    result = db.purchase_orders.insert_one(SearchService.with_search_keys('purchase_orders', order.to_db_dict()))
     order._id = result.inserted_id
     
     return jsonify({
@@ -213,7 +194,7 @@ def update_purchase_order(po_id):
     update_data = {'updated_at': datetime.utcnow()}
     
     if 'vendor_id' in data:
-        vendor = db.contacts.find_one({'_id': ObjectId(data['vendor_id'])})
+        vendor = get_loader().load('contacts', data['vendor_id'])
         if not vendor:
             return jsonify({'error': 'Vendor not found'}), 404
         update_data['vendor_id'] = ObjectId(data['vendor_id'])
@@ -231,41 +212,12 @@ def update_purchase_order(po_id):
         update_data['analytical_account_id'] = ObjectId(data['analytical_account_id']) if data['analytical_account_id'] else None
     
     if 'items' in data:
-        items = []
-        subtotal = 0
-        tax_amount = 0
-        
-        for item_data in data['items']:
-            product = db.products.find_one({'_id': ObjectId(item_data['product_id'])})
-            if not product:
-                return jsonify({'error': f"Product {item_data['product_id']} not found"}), 404
-            
-            quantity = float(item_data.get('quantity', 1))
-            unit_price = float(item_data.get('unit_price', product.get('purchase_price', 0)))
-            tax_rate = float(item_data.get('tax_rate', product.get('tax_rate', 18)))
-            item_subtotal = quantity * unit_price
-            item_tax = item_subtotal * (tax_rate / 100)
-            
-            item = {
-                'product_id': str(product['_id']),
-                'product_name': product.get('name'),
-                'product_sku': product.get('sku'),
-                'quantity': quantity,
-                'unit': item_data.get('unit', product.get('unit', 'pcs')),
-                'unit_price': unit_price,
-                'tax_rate': tax_rate,
-                'subtotal': item_subtotal,
-                'tax_amount': item_tax,
-                'total': item_subtotal + item_tax
-            }
-            items.append(item)
-            subtotal += item_subtotal
-            tax_amount += item_tax
+        priced = PricingService.price_items(data['items'], PricingService.PURCHASE_PRICE)
         
-        update_data['items'] = items
-        update_data['subtotal'] = subtotal
-        update_data['tax_amount'] = tax_amount
-        update_data['total_amount'] = subtotal + tax_amount
+        update_data['items'] = priced.items
+        update_data['subtotal'] = priced.subtotal
+        update_data['tax_amount'] = priced.tax_amount
+        update_data['total_amount'] = priced.total()
     
     db.purchase_orders.update_one({'_id': ObjectId(po_id)}, {'$set': update_data})
     
@@ -273,7 +225,7 @@ def update_purchase_order(po_id):
     
     return jsonify({
         'message': 'Purchase order updated successfully',
-        'purchase_order': PurchaseOrder.from_db(updated_order).to_dict()
+        'purchase_order': PurchaseOrder.serialize(updated_order)
     }), 200
 
 @purchase_orders_bp.route('/<po_id>/confirm', methods=['POST'])
@@ -351,7 +303,7 @@ def generate_po_pdf(po_id):
     
     order = PurchaseOrder.from_db(order_data)
     
-    vendor = db.contacts.find_one({'_id': ObjectId(order.vendor_id)}) if order.vendor_id else {}
+    vendor = get_loader().load('contacts', order.vendor_id) if order.vendor_id else {}
     
     po_dict = order.to_dict()
     po_dict['order_date'] = order.order_date.strftime('%Y-%m-%d') if order.order_date else ''
@@ -369,8 +321,10 @@ def generate_po_pdf(po_id):
     if result['success']:
         db.purchase_orders.update_one(
             {'_id': ObjectId(po_id)},
-            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name']}}
+            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name'], 'updated_at': datetime.utcnow()}}
         )
+        # GET handler: the after_request hook only bumps versions for write methods.
+        bump_versions('purchase_orders')
         return jsonify({'url': result['url']}), 200
     else:
         return jsonify({'error': 'Failed to generate PDF'}), 500
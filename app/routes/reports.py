@@ -5,7 +5,10 @@ from bson import ObjectId
 
 from app.database import get_db
 from app.utils.helpers import parse_date
+from app.utils.loader import get_loader
 from app.services.analytics_service import AnalyticsService
+from app.services.rollup_service import RollupService
+from app.services.open_items_service import OpenItemsService
 
 reports_bp = Blueprint('reports', __name__)
 
@@ -41,7 +44,9 @@ def get_budget_performance():
 @jwt_required()
 def get_monthly_trends():
     year = request.args.get('year', type=int)
-    trends = AnalyticsService.get_monthly_trends(year)
+    end_year = request.args.get('end_year', type=int)
+    fiscal = request.args.get('fiscal', 'false').lower() == 'true'
+    trends = AnalyticsService.get_monthly_trends(year, end_year, fiscal)
     return jsonify({'trends': trends}), 200
 
 @reports_bp.route('/sales-summary', methods=['GET'])
@@ -92,10 +97,11 @@ def get_sales_summary():
     ]
     
     by_customer = list(db.customer_invoices.aggregate(by_customer_pipeline))
+    customers = get_loader().load_many('contacts', [item['_id'] for item in by_customer], ['name'])
     
     for item in by_customer:
         if item['_id']:
-            customer = db.contacts.find_one({'_id': item['_id']})
+            customer = customers.get(item['_id'])
             item['customer_name'] = customer.get('name') if customer else 'Unknown'
             item['_id'] = str(item['_id'])
     
@@ -156,10 +162,11 @@ def get_purchase_summary():
     ]
     
     by_vendor = list(db.vendor_bills.aggregate(by_vendor_pipeline))
+    vendors = get_loader().load_many('contacts', [item['_id'] for item in by_vendor], ['name'])
     
     for item in by_vendor:
         if item['_id']:
-            vendor = db.contacts.find_one({'_id': item['_id']})
+            vendor = vendors.get(item['_id'])
             item['vendor_name'] = vendor.get('name') if vendor else 'Unknown'
             item['_id'] = str(item['_id'])
     
@@ -183,33 +190,8 @@ def get_analytical_account_summary():
     start_date = parse_date(period_start) if period_start else datetime(datetime.utcnow().year, 1, 1)
     end_date = parse_date(period_end) if period_end else datetime.utcnow()
     
-    expense_pipeline = [
-        {'$match': {
-            'status': 'posted',
-            'bill_date': {'$gte': start_date, '$lte': end_date},
-            'analytical_account_id': {'$ne': None}
-        }},
-        {'$group': {
-            '_id': '$analytical_account_id',
-            'total_expense': {'$sum': '$total_amount'}
-        }}
-    ]
-    
-    expenses = {str(e['_id']): e['total_expense'] for e in db.vendor_bills.aggregate(expense_pipeline)}
-    
-    income_pipeline = [
-        {'$match': {
-            'status': 'posted',
-            'invoice_date': {'$gte': start_date, '$lte': end_date},
-            'analytical_account_id': {'$ne': None}
-        }},
-        {'$group': {
-            '_id': '$analytical_account_id',
-            'total_income': {'$sum': '$total_amount'}
-        }}
-    ]
-    
-    incomes = {str(i['_id']): i['total_income'] for i in db.customer_invoices.aggregate(income_pipeline)}
+    expenses = {str(k): v for k, v in RollupService.totals_by_account(RollupService.KIND_EXPENSE, start_date, end_date).items()}
+    incomes = {str(k): v for k, v in RollupService.totals_by_account(RollupService.KIND_INCOME, start_date, end_date).items()}
     
     accounts = list(db.analytical_accounts.find({'is_archived': False}))
     
@@ -247,129 +229,33 @@ def get_analytical_account_summary():
 @reports_bp.route('/receivables-aging', methods=['GET'])
 @jwt_required()
 def get_receivables_aging():
-    db = get_db()
-    
-    today = datetime.utcnow()
-    
-    invoices = list(db.customer_invoices.find({
-        'status': 'posted',
-        'payment_status': {'$ne': 'paid'}
-    }))
-    
-    aging = {
-        'current': {'count': 0, 'amount': 0},
-        '1_30': {'count': 0, 'amount': 0},
-        '31_60': {'count': 0, 'amount': 0},
-        '61_90': {'count': 0, 'amount': 0},
-        'over_90': {'count': 0, 'amount': 0}
-    }
-    
-    details = []
-    
-    for invoice in invoices:
-        due_date = invoice.get('due_date')
-        if not due_date:
-            continue
-        
-        days_overdue = (today - due_date).days
-        amount_due = invoice.get('amount_due', 0)
-        
-        customer = db.contacts.find_one({'_id': invoice.get('customer_id')})
-        
-        detail = {
-            'invoice_number': invoice.get('invoice_number'),
-            'customer_name': customer.get('name') if customer else 'Unknown',
-            'due_date': due_date.isoformat(),
-            'amount_due': amount_due,
-            'days_overdue': max(0, days_overdue)
-        }
-        details.append(detail)
-        
-        if days_overdue <= 0:
-            aging['current']['count'] += 1
-            aging['current']['amount'] += amount_due
-        elif days_overdue <= 30:
-            aging['1_30']['count'] += 1
-            aging['1_30']['amount'] += amount_due
-        elif days_overdue <= 60:
-            aging['31_60']['count'] += 1
-            aging['31_60']['amount'] += amount_due
-        elif days_overdue <= 90:
-            aging['61_90']['count'] += 1
-            aging['61_90']['amount'] += amount_due
-        else:
-            aging['over_90']['count'] += 1
-            aging['over_90']['amount'] += amount_due
-    
-    details.sort(key=lambda x: x['days_overdue'], reverse=True)
+    aging, details = OpenItemsService.aging(OpenItemsService.KIND_RECEIVABLE)
     
     return jsonify({
         'aging': aging,
-        'details': details[:50],
+        'details': [{
+            'invoice_number': d['document_number'],
+            'customer_name': d['contact_name'],
+            'due_date': d['due_date'],
+            'amount_due': d['amount_due'],
+            'days_overdue': d['days_overdue']
+        } for d in details],
         'total_receivable': sum(a['amount'] for a in aging.values())
     }), 200
 
 @reports_bp.route('/payables-aging', methods=['GET'])
 @jwt_required()
 def get_payables_aging():
-    db = get_db()
-    
-    today = datetime.utcnow()
-    
-    bills = list(db.vendor_bills.find({
-        'status': 'posted',
-        'payment_status': {'$ne': 'paid'}
-    }))
-    
-    aging = {
-        'current': {'count': 0, 'amount': 0},
-        '1_30': {'count': 0, 'amount': 0},
-        '31_60': {'count': 0, 'amount': 0},
-        '61_90': {'count': 0, 'amount': 0},
-        'over_90': {'count': 0, 'amount': 0}
-    }
-    
-    details = []
-    
-    for bill in bills:
-        due_date = bill.get('due_date')
-        if not due_date:
-            continue
-        
-        days_overdue = (today - due_date).days
-        amount_due = bill.get('amount_due', 0)
-        
-        vendor = db.contacts.find_one({'_id': bill.get('vendor_id')})
-        
-        detail = {
-            'bill_number': bill.get('bill_number'),
-            'vendor_name': vendor.get('name') if vendor else 'Unknown',
-            'due_date': due_date.isoformat(),
-            'amount_due': amount_due,
-            'days_overdue': max(0, days_overdue)
-        }
-        details.append(detail)
-        
-        if days_overdue <= 0:
-            aging['current']['count'] += 1
-            aging['current']['amount'] += amount_due
-        elif days_overdue <= 30:
-            aging['1_30']['count'] += 1
-            aging['1_30']['amount'] += amount_due
-        elif days_overdue <= 60:
-            aging['31_60']['count'] += 1
-            aging['31_60']['amount'] += amount_due
-        elif days_overdue <= 90:
-            aging['61_90']['count'] += 1
-            aging['61_90']['amount'] += amount_due
-        else:
-            aging['over_90']['count'] += 1
-            aging['over_90']['amount'] += amount_due
-    
-    details.sort(key=lambda x: x['days_overdue'], reverse=True)
+    aging, details = OpenItemsService.aging(OpenItemsService.KIND_PAYABLE)
     
     return jsonify({
         'aging': aging,
-        'details': details[:50],
+        'details': [{
+            'bill_number': d['document_number'],
+            'vendor_name': d['contact_name'],
+            'due_date': d['due_date'],
+            'amount_due': d['amount_due'],
+            'days_overdue': d['days_overdue']
+        } for d in details],
         'total_payable': sum(a['amount'] for a in aging.values())
     }), 200
@@ -6,9 +6,14 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.sales_order import SalesOrder
 from app.utils.helpers import admin_required, generate_number, parse_date
+from app.utils.loader import get_loader
+from app.utils.conditional import bump_versions
+from app.utils.pagination import paginate, page_count
 from app.services.analytics_service import AnalyticsService
 from app.services.pdf_service import PDFService
 from app.services.file_service import FileService
+from app.services.search_service import SearchService
+from app.services.pricing_service import PricingService
 
 sales_orders_bp = Blueprint('sales_orders', __name__)
 
@@ -19,14 +24,18 @@ def get_sales_orders():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     status = request.args.get('status', '')
     customer_id = request.args.get('customer_id', '')
     
     query = {}
     
+    rank = None
     if search:
-        query['so_number'] = {'$regex': search, '$options': 'i'}
+        query.update(SearchService.build_filter('sales_orders', search))
+        rank = SearchService.rank_stages('sales_orders', search)
     
     if status:
         query['status'] = status
@@ -34,22 +43,21 @@ def get_sales_orders():
     if customer_id:
         query['customer_id'] = ObjectId(customer_id)
     
-    total = db.sales_orders.count_documents(query)
-    orders = list(db.sales_orders.find(query).sort('created_at', -1).skip((page - 1) * per_page).limit(per_page))
+    orders, total, next_cursor = paginate(db.sales_orders, query, 'created_at', -1, page, per_page, cursor, include_total, rank)
+    
+    customers = get_loader().load_many('contacts', [o.get('customer_id') for o in orders], ['name', 'company_name'])
     
     order_list = []
     for order_data in orders:
-        order = SalesOrder.from_db(order_data)
-        order_dict = order.to_dict()
+        order_dict = SalesOrder.serialize(order_data)
         
-        if order.customer_id:
-            customer = db.contacts.find_one({'_id': ObjectId(order.customer_id)})
-            if customer:
-                order_dict['customer'] = {
-                    '_id': str(customer['_id']),
-                    'name': customer.get('name'),
-                    'company_name': customer.get('company_name')
-                }
+        customer = customers.get(order_data.get('customer_id'))
+        if customer:
+            order_dict['customer'] = {
+                '_id': str(customer['_id']),
+                'name': customer.get('name'),
+                'company_name': customer.get('company_name')
+            }
         
         order_list.append(order_dict)
     
@@ -58,7 +66,8 @@ def get_sales_orders():
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
     }), 200
 
 @sales_orders_bp.route('/<so_id>', methods=['GET'])
@@ -74,7 +83,7 @@ def get_sales_order(so_id):
     response = order.to_dict()
     
     if order.customer_id:
-        customer = db.contacts.find_one({'_id': ObjectId(order.customer_id)})
+        customer = get_loader().load('contacts', order.customer_id)
         if customer:
             response['customer'] = {
                 '_id': str(customer['_id']),
@@ -85,7 +94,7 @@ def get_sales_order(so_id):
             }
     
     if order.analytical_account_id:
-        account = db.analytical_accounts.find_one({'_id': ObjectId(order.analytical_account_id)})
+        account = get_loader().load('analytical_accounts', order.analytical_account_id)
         if account:
             response['analytical_account'] = {
                 '_id': str(account['_id']),
@@ -118,7 +127,7 @@ def create_sales_order():
     
     db = get_db()
     
-    customer = db.contacts.find_one({'_id': ObjectId(data['customer_id'])})
+    customer = get_loader().load('contacts', data['customer_id'])
     if not customer:
         return jsonify({'error': 'Customer not found'}), 404
     
@@ -135,50 +144,24 @@ def create_sales_order():
     order.created_at = datetime.utcnow()
     order.updated_at = datetime.utcnow()
     
-    items = []
-    for item_data in data['items']:
-        product = db.products.find_one({'_id': ObjectId(item_data['product_id'])})
-        if not product:
-            return jsonify({'error': f"Product {item_data['product_id']} not found"}), 404
-        
-        quantity = float(item_data.get('quantity', 1))
-        unit_price = float(item_data.get('unit_price', product.get('sale_price', 0)))
-        tax_rate = float(item_data.get('tax_rate', product.get('tax_rate', 18)))
-        subtotal = quantity * unit_price
-        tax_amount = subtotal * (tax_rate / 100)
-        
-        item = {
-            'product_id': str(product['_id']),
-            'product_name': product.get('name'),
-            'product_sku': product.get('sku'),
-            'quantity': quantity,
-            'unit': item_data.get('unit', product.get('unit', 'pcs')),
-            'unit_price': unit_price,
-            'tax_rate': tax_rate,
-            'subtotal': subtotal,
-            'tax_amount': tax_amount,
-            'total': subtotal + tax_amount
-        }
-        items.append(item)
-    
-    order.items = items
+    priced = PricingService.price_items(data['items'], PricingService.SALE_PRICE)
+    order.items = priced.items
     order.calculate_totals()
     
     analytical_account_id = data.get('analytical_account_id')
-    if not analytical_account_id and items:
-        first_product = db.products.find_one({'_id': ObjectId(items[0]['product_id'])})
-        if first_product:
-            analytical_account_id = AnalyticsService.get_analytical_account_for_transaction(
-                product_id=first_product['_id'],
-                category=first_product.get('category'),
-                contact_id=data['customer_id'],
-                amount=order.total_amount
-            )
+    first_product = priced.first_product
+    if not analytical_account_id and first_product:
+        analytical_account_id = AnalyticsService.get_analytical_account_for_transaction(
+            product_id=first_product['_id'],
+            category=first_product.get('category'),
+            contact_id=data['customer_id'],
+            amount=order.total_amount
+        )
     
     if analytical_account_id:
         order.analytical_account_id = str(analytical_account_id)
     
-    result = db.sales_orders.insert_one(order.to_db_dict())
+    result = db.sales_orders.insert_one(SearchService.with_search_keys('sales_orders', order.to_db_dict()))
     order._id = result.inserted_id
     
     return jsonify({
@@ -203,7 +186,7 @@ def update_sales_order(so_id):
     update_data = {'updated_at': datetime.utcnow()}
     
     if 'customer_id' in data:
-        customer = db.contacts.find_one({'_id': ObjectId(data['customer_id'])})
+        customer = get_loader().load('contacts', data['customer_id'])
         if not customer:
             return jsonify({'error': 'Customer not found'}), 404
         update_data['customer_id'] = ObjectId(data['customer_id'])
@@ -227,42 +210,13 @@ def update_sales_order(so_id):
         update_data['analytical_account_id'] = ObjectId(data['analytical_account_id']) if data['analytical_account_id'] else None
     
     if 'items' in data:
-        items = []
-        subtotal = 0
-        tax_amount = 0
-        
-        for item_data in data['items']:
-            product = db.products.find_one({'_id': ObjectId(item_data['product_id'])})
-            if not product:
-                return jsonify({'error': f"Product {item_data['product_id']} not found"}), 404
-            
-            quantity = float(item_data.get('quantity', 1))
-            unit_price = float(item_data.get('unit_price', product.get('sale_price', 0)))
-            tax_rate = float(item_data.get('tax_rate', product.get('tax_rate', 18)))
-            item_subtotal = quantity * unit_price
-            item_tax = item_subtotal * (tax_rate / 100)
-            
-            item = {
-                'product_id': str(product['_id']),
-                'product_name': product.get('name'),
-                'product_sku': product.get('sku'),
-                'quantity': quantity,
-                'unit': item_data.get('unit', product.get('unit', 'pcs')),
-                'unit_price': unit_price,
-                'tax_rate': tax_rate,
-                'subtotal': item_subtotal,
-                'tax_amount': item_tax,
-                'total': item_subtotal + item_tax
-            }
-            items.append(item)
-            subtotal += item_subtotal
-            tax_amount += item_tax
+        priced = PricingService.price_items(data['items'], PricingService.SALE_PRICE)
         
         discount = update_data.get('discount_amount', order_data.get('discount_amount', 0))
-        update_data['items'] = items
-        update_data['subtotal'] = subtotal
-        update_data['tax_amount'] = tax_amount
-        update_data['total_amount'] = subtotal + tax_amount - discount
+        update_data['items'] = priced.items
+        update_data['subtotal'] = priced.subtotal
+        update_data['tax_amount'] = priced.tax_amount
+        update_data['total_amount'] = priced.total(discount)
     
     db.sales_orders.update_one({'_id': ObjectId(so_id)}, {'$set': update_data})
     
@@ -270,7 +224,7 @@ def update_sales_order(so_id):
     
     return jsonify({
         'message': 'Sales order updated successfully',
-        'sales_order': SalesOrder.from_db(updated_order).to_dict()
+        'sales_order': SalesOrder.serialize(updated_order)
     }), 200
 
 @sales_orders_bp.route('/<so_id>/confirm', methods=['POST'])
@@ -347,7 +301,7 @@ def generate_so_pdf(so_id):
         return jsonify({'error': 'Sales order not found'}), 404
     
     order = SalesOrder.from_db(order_data)
-    customer = db.contacts.find_one({'_id': ObjectId(order.customer_id)}) if order.customer_id else {}
+    customer = get_loader().load('contacts', order.customer_id) if order.customer_id else {}
     
     so_dict = order.to_dict()
     so_dict['order_date'] = order.order_date.strftime('%Y-%m-%d') if order.order_date else ''
@@ -365,8 +319,10 @@ def generate_so_pdf(so_id):
     if result['success']:
         db.sales_orders.update_one(
             {'_id': ObjectId(so_id)},
-            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name']}}
+            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name'], 'updated_at': datetime.utcnow()}}
         )
+        # GET handler: the after_request hook only bumps versions for write methods.
+        bump_versions('sales_orders')
         return jsonify({'url': result['url']}), 200
     else:
         return jsonify({'error': 'Failed to generate PDF'}), 500
@@ -0,0 +1,20 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+
+from app.database import get_pool_metrics
+from app.services.email_outbox import EmailOutbox
+from app.utils.helpers import admin_required
+from app.utils.loader import reference_cache
+
+system_bp = Blueprint('system', __name__)
+
+@system_bp.route('/metrics', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_metrics():
+    """Runtime metrics for the worker process that served this request"""
+    return jsonify({
+        'mongo_pool': get_pool_metrics(),
+        'reference_cache': reference_cache.snapshot(),
+        'email_outbox': EmailOutbox.counts()
+    }), 200
@@ -7,8 +7,10 @@ import string
 
 from app.database import get_db
 from app.models.user import User
-from app.utils.helpers import admin_required
+from app.utils.helpers import admin_required, user_stamps
+from app.utils.pagination import paginate, page_count
 from app.services.email_service import EmailService
+from app.services.search_service import SearchService
 
 users_bp = Blueprint('users', __name__)
 
@@ -24,6 +26,8 @@ def get_users():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     role = request.args.get('role', '')
     
@@ -38,15 +42,15 @@ def get_users():
     if role:
         query['role'] = role
     
-    total = db.users.count_documents(query)
-    users = list(db.users.find(query).skip((page - 1) * per_page).limit(per_page))
+    users, total, next_cursor = paginate(db.users, query, '_id', 1, page, per_page, cursor, include_total)
     
     return jsonify({
-        'users': [User.from_db(u).to_dict() for u in users],
+        'users': [User.serialize(u) for u in users],
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
     }), 200
 
 @users_bp.route('/<user_id>', methods=['GET'])
@@ -116,7 +120,7 @@ def create_user():
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
-        contact_result = db.contacts.insert_one(contact_data)
+        contact_result = db.contacts.insert_one(SearchService.with_search_keys('contacts', contact_data))
         contact_id = str(contact_result.inserted_id)
     
     user = User()
@@ -178,13 +182,18 @@ def update_user(user_id):
             return jsonify({'error': 'Email already in use'}), 400
         update_data['email'] = data['email'].lower()
     
-    db.users.update_one({'_id': ObjectId(user_id)}, {'$set': update_data})
+    update = {'$set': update_data}
+    if any(field in update_data for field in ('role', 'is_active', 'contact_id')):
+        # Invalidates access tokens carrying the old role/contact claims
+        update['$inc'] = {'token_version': 1}
+    db.users.update_one({'_id': ObjectId(user_id)}, update)
+    user_stamps.forget(user_id)
     
     updated_user = db.users.find_one({'_id': ObjectId(user_id)})
     
     return jsonify({
         'message': 'User updated successfully',
-        'user': User.from_db(updated_user).to_dict()
+        'user': User.serialize(updated_user)
     }), 200
 
 @users_bp.route('/<user_id>', methods=['DELETE'])
@@ -199,6 +208,7 @@ def delete_user(user_id):
     db = get_db()
     
     result = db.users.delete_one({'_id': ObjectId(user_id)})
+    user_stamps.forget(user_id)
     
     if result.deleted_count == 0:
         return jsonify({'error': 'User not found'}), 404
@@ -224,8 +234,10 @@ def toggle_user_active(user_id):
     
     db.users.update_one(
         {'_id': ObjectId(user_id)},
-        {'$set': {'is_active': new_status, 'updated_at': datetime.utcnow()}}
+        {'$set': {'is_active': new_status, 'updated_at': datetime.utcnow()},
+         '$inc': {'token_version': 1}}
     )
+    user_stamps.forget(user_id)
     
     return jsonify({
         'message': f"User {'activated' if new_status else 'deactivated'} successfully",
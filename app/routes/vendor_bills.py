@@ -6,9 +6,17 @@ from bson import ObjectId
 from app.database import get_db
 from app.models.vendor_bill import VendorBill
 from app.utils.helpers import admin_required, generate_number, parse_date
+from app.utils.loader import get_loader
+from app.utils.conditional import bump_versions
+from app.utils.pagination import paginate, page_count
+from app.utils.json_provider import stream_json
 from app.services.analytics_service import AnalyticsService
+from app.services.rollup_service import RollupService
+from app.services.open_items_service import OpenItemsService
 from app.services.pdf_service import PDFService
 from app.services.file_service import FileService
+from app.services.search_service import SearchService
+from app.services.pricing_service import PricingService
 
 vendor_bills_bp = Blueprint('vendor_bills', __name__)
 
@@ -19,6 +27,8 @@ def get_vendor_bills():
     
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true')
     search = request.args.get('search', '')
     status = request.args.get('status', '')
     payment_status = request.args.get('payment_status', '')
@@ -26,11 +36,10 @@ def get_vendor_bills():
     
     query = {}
     
+    rank = None
     if search:
-        query['$or'] = [
-            {'bill_number': {'$regex': search, '$options': 'i'}},
-            {'vendor_bill_number': {'$regex': search, '$options': 'i'}}
-        ]
+        query.update(SearchService.build_filter('vendor_bills', search))
+        rank = SearchService.rank_stages('vendor_bills', search)
     
     if status:
         query['status'] = status
@@ -41,32 +50,31 @@ def get_vendor_bills():
     if vendor_id:
         query['vendor_id'] = ObjectId(vendor_id)
     
-    total = db.vendor_bills.count_documents(query)
-    bills = list(db.vendor_bills.find(query).sort('created_at', -1).skip((page - 1) * per_page).limit(per_page))
+    bills, total, next_cursor = paginate(db.vendor_bills, query, 'created_at', -1, page, per_page, cursor, include_total, rank)
     
-    bill_list = []
-    for bill_data in bills:
-        bill = VendorBill.from_db(bill_data)
-        bill_dict = bill.to_dict()
-        
-        if bill.vendor_id:
-            vendor = db.contacts.find_one({'_id': ObjectId(bill.vendor_id)})
+    vendors = get_loader().load_many('contacts', [b.get('vendor_id') for b in bills], ['name', 'company_name'])
+    
+    def rows():
+        for bill_data in bills:
+            bill_dict = VendorBill.serialize(bill_data)
+            
+            vendor = vendors.get(bill_data.get('vendor_id'))
             if vendor:
                 bill_dict['vendor'] = {
-                    '_id': str(vendor['_id']),
+                    '_id': vendor['_id'],
                     'name': vendor.get('name'),
                     'company_name': vendor.get('company_name')
                 }
-        
-        bill_list.append(bill_dict)
+            
+            yield bill_dict
     
-    return jsonify({
-        'vendor_bills': bill_list,
+    return stream_json({
         'total': total,
         'page': page,
         'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
-    }), 200
+        'total_pages': page_count(total, per_page),
+        'next_cursor': next_cursor
+    }, 'vendor_bills', rows()), 200
 
 @vendor_bills_bp.route('/<bill_id>', methods=['GET'])
 @jwt_required()
@@ -81,7 +89,7 @@ def get_vendor_bill(bill_id):
     response = bill.to_dict()
     
     if bill.vendor_id:
-        vendor = db.contacts.find_one({'_id': ObjectId(bill.vendor_id)})
+        vendor = get_loader().load('contacts', bill.vendor_id)
         if vendor:
             response['vendor'] = {
                 '_id': str(vendor['_id']),
@@ -100,7 +108,7 @@ def get_vendor_bill(bill_id):
             }
     
     if bill.analytical_account_id:
-        account = db.analytical_accounts.find_one({'_id': ObjectId(bill.analytical_account_id)})
+        account = get_loader().load('analytical_accounts', bill.analytical_account_id)
         if account:
             response['analytical_account'] = {
                 '_id': str(account['_id']),
@@ -134,7 +142,7 @@ def create_vendor_bill():
     
     db = get_db()
     
-    vendor = db.contacts.find_one({'_id': ObjectId(data['vendor_id'])})
+    vendor = get_loader().load('contacts', data['vendor_id'])
     if not vendor:
         return jsonify({'error': 'Vendor not found'}), 404
     
@@ -152,50 +160,24 @@ def create_vendor_bill():
     bill.created_at = datetime.utcnow()
     bill.updated_at = datetime.utcnow()
     
-    items = []
-    for item_data in data['items']:
-        product = db.products.find_one({'_id': ObjectId(item_data['product_id'])})
-        if not product:
-            return jsonify({'error': f"Product {item_data['product_id']} not found"}), 404
-        
-        quantity = float(item_data.get('quantity', 1))
-        unit_price = float(item_data.get('unit_price', product.get('purchase_price', 0)))
-        tax_rate = float(item_data.get('tax_rate', product.get('tax_rate', 18)))
-        subtotal = quantity * unit_price
-        tax_amount = subtotal * (tax_rate / 100)
-        
-        item = {
-            'product_id': str(product['_id']),
-            'product_name': product.get('name'),
-            'product_sku': product.get('sku'),
-            'quantity': quantity,
-            'unit': item_data.get('unit', product.get('unit', 'pcs')),
-            'unit_price': unit_price,
-            'tax_rate': tax_rate,
-            'subtotal': subtotal,
-            'tax_amount': tax_amount,
-            'total': subtotal + tax_amount
-        }
-        items.append(item)
-    
-    bill.items = items
+    priced = PricingService.price_items(data['items'], PricingService.PURCHASE_PRICE)
+    bill.items = priced.items
     bill.calculate_totals()
     
     analytical_account_id = data.get('analytical_account_id')
-    if not analytical_account_id and items:
-        first_product = db.products.find_one({'_id': ObjectId(items[0]['product_id'])})
-        if first_product:
-            analytical_account_id = AnalyticsService.get_analytical_account_for_transaction(
-                product_id=first_product['_id'],
-                category=first_product.get('category'),
-                contact_id=data['vendor_id'],
-                amount=bill.total_amount
-            )
+    first_product = priced.first_product
+    if not analytical_account_id and first_product:
+        analytical_account_id = AnalyticsService.get_analytical_account_for_transaction(
+            product_id=first_product['_id'],
+            category=first_product.get('category'),
+            contact_id=data['vendor_id'],
+            amount=bill.total_amount
+        )
     
     if analytical_account_id:
         bill.analytical_account_id = str(analytical_account_id)
     
-    result = db.vendor_bills.insert_one(bill.to_db_dict())
+    result = db.vendor_bills.insert_one(SearchService.with_search_keys('vendor_bills', bill.to_db_dict()))
     bill._id = result.inserted_id
     
     return jsonify({
@@ -220,13 +202,14 @@ def update_vendor_bill(bill_id):
     update_data = {'updated_at': datetime.utcnow()}
     
     if 'vendor_id' in data:
-        vendor = db.contacts.find_one({'_id': ObjectId(data['vendor_id'])})
+        vendor = get_loader().load('contacts', data['vendor_id'])
         if not vendor:
             return jsonify({'error': 'Vendor not found'}), 404
         update_data['vendor_id'] = ObjectId(data['vendor_id'])
     
     if 'vendor_bill_number' in data:
         update_data['vendor_bill_number'] = data['vendor_bill_number']
+        update_data.update(SearchService.search_keys('vendor_bills', {**bill_data, **update_data}))
     
     if 'bill_date' in data:
         update_data['bill_date'] = parse_date(data['bill_date'])
@@ -241,42 +224,13 @@ def update_vendor_bill(bill_id):
         update_data['analytical_account_id'] = ObjectId(data['analytical_account_id']) if data['analytical_account_id'] else None
     
     if 'items' in data:
-        items = []
-        subtotal = 0
-        tax_amount = 0
-        
-        for item_data in data['items']:
-            product = db.products.find_one({'_id': ObjectId(item_data['product_id'])})
-            if not product:
-                return jsonify({'error': f"Product {item_data['product_id']} not found"}), 404
-            
-            quantity = float(item_data.get('quantity', 1))
-            unit_price = float(item_data.get('unit_price', product.get('purchase_price', 0)))
-            tax_rate = float(item_data.get('tax_rate', product.get('tax_rate', 18)))
-            item_subtotal = quantity * unit_price
-            item_tax = item_subtotal * (tax_rate / 100)
-            
-            item = {
-                'product_id': str(product['_id']),
-                'product_name': product.get('name'),
-                'product_sku': product.get('sku'),
-                'quantity': quantity,
-                'unit': item_data.get('unit', product.get('unit', 'pcs')),
-                'unit_price': unit_price,
-                'tax_rate': tax_rate,
-                'subtotal': item_subtotal,
-                'tax_amount': item_tax,
-                'total': item_subtotal + item_tax
-            }
-            items.append(item)
-            subtotal += item_subtotal
-            tax_amount += item_tax
+        priced = PricingService.price_items(data['items'], PricingService.PURCHASE_PRICE)
         
-        update_data['items'] = items
-        update_data['subtotal'] = subtotal
-        update_data['tax_amount'] = tax_amount
-        update_data['total_amount'] = subtotal + tax_amount
-        update_data['amount_due'] = subtotal + tax_amount - bill_data.get('amount_paid', 0)
+        update_data['items'] = priced.items
+        update_data['subtotal'] = priced.subtotal
+        update_data['tax_amount'] = priced.tax_amount
+        update_data['total_amount'] = priced.total()
+        update_data['amount_due'] = priced.total() - bill_data.get('amount_paid', 0)
     
     db.vendor_bills.update_one({'_id': ObjectId(bill_id)}, {'$set': update_data})
     
@@ -284,7 +238,7 @@ def update_vendor_bill(bill_id):
     
     return jsonify({
         'message': 'Vendor bill updated successfully',
-        'vendor_bill': VendorBill.from_db(updated_bill).to_dict()
+        'vendor_bill': VendorBill.serialize(updated_bill)
     }), 200
 
 @vendor_bills_bp.route('/<bill_id>/post', methods=['POST'])
@@ -300,10 +254,15 @@ def post_vendor_bill(bill_id):
     if bill_data.get('status') != VendorBill.STATUS_DRAFT:
         return jsonify({'error': 'Only draft bills can be posted'}), 400
     
-    db.vendor_bills.update_one(
-        {'_id': ObjectId(bill_id)},
+    result = db.vendor_bills.update_one(
+        {'_id': ObjectId(bill_id), 'status': VendorBill.STATUS_DRAFT},
         {'$set': {'status': VendorBill.STATUS_POSTED, 'updated_at': datetime.utcnow()}}
     )
+    if result.modified_count == 0:
+        return jsonify({'error': 'Only draft bills can be posted'}), 400
+    
+    RollupService.refresh_documents(RollupService.KIND_EXPENSE, [bill_data])
+    OpenItemsService.refresh(OpenItemsService.KIND_PAYABLE, bill_data['_id'])
     
     return jsonify({'message': 'Vendor bill posted successfully'}), 200
 
@@ -323,10 +282,16 @@ def cancel_vendor_bill(bill_id):
     if bill_data.get('amount_paid', 0) > 0:
         return jsonify({'error': 'Cannot cancel bill with payments'}), 400
     
-    db.vendor_bills.update_one(
-        {'_id': ObjectId(bill_id)},
+    result = db.vendor_bills.update_one(
+        {'_id': ObjectId(bill_id), 'status': bill_data.get('status')},
         {'$set': {'status': VendorBill.STATUS_CANCELLED, 'updated_at': datetime.utcnow()}}
     )
+    if result.modified_count == 0:
+        return jsonify({'error': 'Bill was modified concurrently, please retry'}), 409
+    
+    if bill_data.get('status') == VendorBill.STATUS_POSTED:
+        RollupService.refresh_documents(RollupService.KIND_EXPENSE, [bill_data])
+        OpenItemsService.refresh(OpenItemsService.KIND_PAYABLE, bill_data['_id'])
     
     return jsonify({'message': 'Vendor bill cancelled successfully'}), 200
 
@@ -341,7 +306,7 @@ def generate_bill_pdf(bill_id):
     
     bill = VendorBill.from_db(bill_data)
     
-    vendor = db.contacts.find_one({'_id': ObjectId(bill.vendor_id)}) if bill.vendor_id else {}
+    vendor = get_loader().load('contacts', bill.vendor_id) if bill.vendor_id else {}
     
     bill_dict = bill.to_dict()
     bill_dict['bill_date'] = bill.bill_date.strftime('%Y-%m-%d') if bill.bill_date else ''
@@ -359,8 +324,10 @@ def generate_bill_pdf(bill_id):
     if result['success']:
         db.vendor_bills.update_one(
             {'_id': ObjectId(bill_id)},
-            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name']}}
+            {'$set': {'document_url': result['url'], 'blob_name': result['blob_name'], 'updated_at': datetime.utcnow()}}
         )
+        # GET handler: the after_request hook only bumps versions for write methods.
+        bump_versions('vendor_bills')
         return jsonify({'url': result['url']}), 200
     else:
         return jsonify({'error': 'Failed to generate PDF'}), 500
@@ -1,78 +1,78 @@
 from datetime import datetime
 from bson import ObjectId
 from app.database import get_db
+from app.utils.loader import reference_cache
+from app.services.rollup_service import RollupService
 
-class AnalyticsService:
-    @staticmethod
-    def get_analytical_account_for_transaction(product_id=None, category=None, contact_id=None, amount=None):
-        db = get_db()
-        
-        models = list(db.auto_analytical_models.find({'is_active': True}).sort('priority', -1))
-        
+class AnalyticalRules:
+    """Active auto-analytical models loaded once and matched in memory, in priority order"""
+    
+    def __init__(self, models):
+        self.rules = []
         for model in models:
             rule_type = model.get('rule_type')
             rule_value = model.get('rule_value')
             
+            if rule_type == 'amount_range':
+                try:
+                    range_parts = str(rule_value).split('-')
+                    min_amount = float(range_parts[0])
+                    max_amount = float(range_parts[1]) if len(range_parts) > 1 else float('inf')
+                except (ValueError, IndexError):
+                    continue
+                rule_value = (min_amount, max_amount)
+            elif rule_type == 'product_category':
+                rule_value = str(rule_value).lower()
+            else:
+                rule_value = str(rule_value)
+            
+            self.rules.append((rule_type, rule_value, model.get('analytical_account_id')))
+    
+    @staticmethod
+    def load():
+        db = get_db()
+        return AnalyticalRules(db.auto_analytical_models.find({'is_active': True}).sort('priority', -1))
+    
+    def match(self, product_id=None, category=None, contact_id=None, amount=None):
+        for rule_type, rule_value, account_id in self.rules:
             if rule_type == 'product' and product_id:
-                if str(product_id) == str(rule_value):
-                    return model.get('analytical_account_id')
+                if str(product_id) == rule_value:
+                    return account_id
             
             elif rule_type == 'product_category' and category:
-                if category.lower() == str(rule_value).lower():
-                    return model.get('analytical_account_id')
+                if category.lower() == rule_value:
+                    return account_id
             
             elif rule_type == 'contact' and contact_id:
-                if str(contact_id) == str(rule_value):
-                    return model.get('analytical_account_id')
+                if str(contact_id) == rule_value:
+                    return account_id
             
             elif rule_type == 'amount_range' and amount is not None:
-                try:
-                    range_parts = str(rule_value).split('-')
-                    min_amount = float(range_parts[0])
-                    max_amount = float(range_parts[1]) if len(range_parts) > 1 else float('inf')
-                    if min_amount <= amount <= max_amount:
-                        return model.get('analytical_account_id')
-                except (ValueError, IndexError):
-                    continue
+                if rule_value[0] <= amount <= rule_value[1]:
+                    return account_id
+        
+        return None
+
+
+class AnalyticsService:
+    @staticmethod
+    def get_analytical_account_for_transaction(product_id=None, category=None, contact_id=None, amount=None):
+        account_id = AnalyticalRules.load().match(product_id, category, contact_id, amount)
+        if account_id:
+            return account_id
         
         if product_id:
-            product = db.products.find_one({'_id': ObjectId(product_id)})
+            product = reference_cache.get('products', product_id)
             if product and product.get('default_analytical_account_id'):
                 return product.get('default_analytical_account_id')
         
         return None
     
     @staticmethod
-    def calculate_budget_actuals(budget_id, period_start=None, period_end=None):
-        db = get_db()
-        
-        budget = db.budgets.find_one({'_id': ObjectId(budget_id)})
-        if not budget:
-            return None
-        
+    def build_budget_performance(budget, actual_amount, period_start=None, period_end=None):
         analytical_account_id = budget.get('analytical_account_id')
-        budget_type = budget.get('budget_type')
         start_date = period_start or budget.get('period_start')
         end_date = period_end or budget.get('period_end')
-        
-        actual_amount = 0
-        
-        if budget_type == 'expense':
-            bills = db.vendor_bills.find({
-                'analytical_account_id': analytical_account_id,
-                'status': 'posted',
-                'bill_date': {'$gte': start_date, '$lte': end_date}
-            })
-            actual_amount = sum(bill.get('total_amount', 0) for bill in bills)
-        
-        elif budget_type == 'income':
-            invoices = db.customer_invoices.find({
-                'analytical_account_id': analytical_account_id,
-                'status': 'posted',
-                'invoice_date': {'$gte': start_date, '$lte': end_date}
-            })
-            actual_amount = sum(inv.get('total_amount', 0) for inv in invoices)
-        
         budgeted_amount = budget.get('budgeted_amount', 0)
         
         if budgeted_amount > 0:
@@ -83,9 +83,9 @@ class AnalyticsService:
         remaining_balance = budgeted_amount - actual_amount
         
         return {
-            'budget_id': str(budget_id),
+            'budget_id': str(budget['_id']),
             'budget_name': budget.get('name'),
-            'budget_type': budget_type,
+            'budget_type': budget.get('budget_type'),
             'analytical_account_id': str(analytical_account_id) if analytical_account_id else None,
             'period_start': start_date.isoformat() if start_date else None,
             'period_end': end_date.isoformat() if end_date else None,
@@ -96,6 +96,18 @@ class AnalyticsService:
             'variance': budgeted_amount - actual_amount
         }
     
+    @staticmethod
+    def calculate_budget_actuals(budget_id, period_start=None, period_end=None):
+        db = get_db()
+        
+        budget = db.budgets.find_one({'_id': ObjectId(budget_id)})
+        if not budget:
+            return None
+        
+        actuals = AnalyticsService.calculate_budgets_actuals([budget], period_start, period_end)
+        
+        return AnalyticsService.build_budget_performance(budget, actuals[budget['_id']], period_start, period_end)
+    
     @staticmethod
     def get_all_budgets_performance(period_start=None, period_end=None):
         db = get_db()
@@ -107,22 +119,120 @@ class AnalyticsService:
             ]
         
         budgets = list(db.budgets.find(query))
+        actuals = AnalyticsService.calculate_budgets_actuals(budgets, period_start, period_end)
+        
+        account_ids = list({b['analytical_account_id'] for b in budgets if b.get('analytical_account_id')})
+        accounts = {
+            a['_id']: a for a in db.analytical_accounts.find({'_id': {'$in': account_ids}}, {'name': 1, 'code': 1})
+        } if account_ids else {}
         
         results = []
         for budget in budgets:
-            performance = AnalyticsService.calculate_budget_actuals(
-                budget['_id'],
-                period_start,
-                period_end
-            )
-            if performance:
-                account = db.analytical_accounts.find_one({'_id': budget.get('analytical_account_id')})
-                performance['analytical_account_name'] = account.get('name') if account else None
-                performance['analytical_account_code'] = account.get('code') if account else None
-                results.append(performance)
+            performance = AnalyticsService.build_budget_performance(budget, actuals[budget['_id']], period_start, period_end)
+            account = accounts.get(budget.get('analytical_account_id'))
+            performance['analytical_account_name'] = account.get('name') if account else None
+            performance['analytical_account_code'] = account.get('code') if account else None
+            results.append(performance)
         
         return results
     
+    @staticmethod
+    def calculate_budgets_actuals(budgets, period_start=None, period_end=None):
+        db = get_db()
+        
+        actuals = {}
+        
+        for budget_type in (RollupService.KIND_EXPENSE, RollupService.KIND_INCOME):
+            typed_budgets = [b for b in budgets if b.get('budget_type') == budget_type]
+            
+            windows = []
+            window_index = {}
+            account_ids = set()
+            
+            for budget in typed_budgets:
+                start_date = period_start or budget.get('period_start')
+                end_date = period_end or budget.get('period_end')
+                if not start_date or not end_date or not budget.get('analytical_account_id'):
+                    continue
+                
+                # Rollup dates are midnights, so a window runs from its first day to the day after its last.
+                bounds = RollupService.day_bounds(start_date, end_date)
+                if bounds not in window_index:
+                    window_index[bounds] = len(windows)
+                    windows.append({'i': len(windows), 's': bounds[0], 'e': bounds[1]})
+                account_ids.add(budget['analytical_account_id'])
+            
+            if not windows:
+                continue
+            
+            # One pass over the daily rollups: each row is tagged with every distinct
+            # budget window it falls into, then summed per (account, window).
+            pipeline = [
+                {'$match': {
+                    'kind': budget_type,
+                    'analytical_account_id': {'$in': list(account_ids)},
+                    'date': {
+                        '$gte': min(w['s'] for w in windows),
+                        '$lt': max(w['e'] for w in windows)
+                    }
+                }},
+                {'$project': {
+                    'analytical_account_id': 1,
+                    'total_amount': 1,
+                    'windows': {'$filter': {
+                        'input': {'$literal': windows},
+                        'as': 'w',
+                        'cond': {'$and': [
+                            {'$gte': ['$date', '$$w.s']},
+                            {'$lt': ['$date', '$$w.e']}
+                        ]}
+                    }}
+                }},
+                {'$unwind': '$windows'},
+                {'$group': {
+                    '_id': {'account': '$analytical_account_id', 'window': '$windows.i'},
+                    'total': {'$sum': '$total_amount'}
+                }}
+            ]
+            
+            totals = {
+                (row['_id']['account'], row['_id']['window']): row['total']
+                for row in db.daily_rollups.aggregate(pipeline)
+            }
+            
+            for budget in typed_budgets:
+                start_date = period_start or budget.get('period_start')
+                end_date = period_end or budget.get('period_end')
+                if not start_date or not end_date:
+                    continue
+                window = window_index.get(RollupService.day_bounds(start_date, end_date))
+                if window is None:
+                    continue
+                actuals[budget['_id']] = totals.get((budget.get('analytical_account_id'), window), 0)
+        
+        return {budget['_id']: actuals.get(budget['_id'], 0) for budget in budgets}
+    
+    @staticmethod
+    def _posted_document_metrics(collection, date_field, start_of_month):
+        pipeline = [
+            {'$match': {'status': 'posted'}},
+            {'$facet': {
+                'this_month': [
+                    {'$match': {date_field: {'$gte': start_of_month}}},
+                    {'$group': {'_id': None, 'total': {'$sum': '$total_amount'}}}
+                ],
+                'open': [
+                    {'$match': {'payment_status': {'$ne': 'paid'}}},
+                    {'$group': {'_id': None, 'count': {'$sum': 1}, 'total': {'$sum': '$amount_due'}}}
+                ]
+            }}
+        ]
+        result = list(collection.aggregate(pipeline))
+        facets = result[0] if result else {'this_month': [], 'open': []}
+        this_month = facets['this_month'][0]['total'] if facets['this_month'] else 0
+        open_items = facets['open'][0] if facets['open'] else {'count': 0, 'total': 0}
+        return this_month, open_items['count'], open_items['total']
+    
     @staticmethod
     def get_dashboard_summary():
         db = get_db()
@@ -130,48 +240,37 @@ class AnalyticsService:
         current_date = datetime.utcnow()
         start_of_month = current_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        total_customers = db.contacts.count_documents({'contact_type': {'$in': ['customer', 'both']}, 'is_archived': False})
-        total_vendors = db.contacts.count_documents({'contact_type': {'$in': ['vendor', 'both']}, 'is_archived': False})
-        total_products = db.products.count_documents({'is_archived': False})
-        
-        pending_invoices = db.customer_invoices.count_documents({'payment_status': {'$ne': 'paid'}, 'status': 'posted'})
-        pending_bills = db.vendor_bills.count_documents({'payment_status': {'$ne': 'paid'}, 'status': 'posted'})
-        
-        invoices_pipeline = [
-            {'$match': {'status': 'posted', 'invoice_date': {'$gte': start_of_month}}},
-            {'$group': {'_id': None, 'total': {'$sum': '$total_amount'}}}
+        contacts_pipeline = [
+            {'$match': {'is_archived': False}},
+            {'$group': {
+                '_id': None,
+                'customers': {'$sum': {'$cond': [{'$in': ['$contact_type', ['customer', 'both']]}, 1, 0]}},
+                'vendors': {'$sum': {'$cond': [{'$in': ['$contact_type', ['vendor', 'both']]}, 1, 0]}}
+            }}
         ]
-        invoices_result = list(db.customer_invoices.aggregate(invoices_pipeline))
-        total_sales_this_month = invoices_result[0]['total'] if invoices_result else 0
+        contacts_result = list(db.contacts.aggregate(contacts_pipeline))
+        contacts_counts = contacts_result[0] if contacts_result else {'customers': 0, 'vendors': 0}
         
-        bills_pipeline = [
-            {'$match': {'status': 'posted', 'bill_date': {'$gte': start_of_month}}},
-            {'$group': {'_id': None, 'total': {'$sum': '$total_amount'}}}
-        ]
-        bills_result = list(db.vendor_bills.aggregate(bills_pipeline))
-        total_purchases_this_month = bills_result[0]['total'] if bills_result else 0
+        total_products = db.products.count_documents({'is_archived': False})
         
-        receivable_pipeline = [
-            {'$match': {'payment_status': {'$ne': 'paid'}, 'status': 'posted'}},
-            {'$group': {'_id': None, 'total': {'$sum': '$amount_due'}}}
-        ]
-        receivable_result = list(db.customer_invoices.aggregate(receivable_pipeline))
-        total_receivable = receivable_result[0]['total'] if receivable_result else 0
+        total_sales_this_month, pending_invoices, total_receivable = AnalyticsService._posted_document_metrics(db.customer_invoices, 'invoice_date', start_of_month)
+        total_purchases_this_month, pending_bills, total_payable = AnalyticsService._posted_document_metrics(db.vendor_bills, 'bill_date', start_of_month)
         
-        payable_pipeline = [
-            {'$match': {'payment_status': {'$ne': 'paid'}, 'status': 'posted'}},
-            {'$group': {'_id': None, 'total': {'$sum': '$amount_due'}}}
-        ]
-        payable_result = list(db.vendor_bills.aggregate(payable_pipeline))
-        total_payable = payable_result[0]['total'] if payable_result else 0
+        budgets = list(db.budgets.find(
+            {'is_archived': False},
+            {'analytical_account_id': 1, 'budget_type': 1, 'period_start': 1, 'period_end': 1, 'budgeted_amount': 1}
+        ))
+        actuals = AnalyticsService.calculate_budgets_actuals(budgets)
         
-        budgets_performance = AnalyticsService.get_all_budgets_performance()
+        budgets_performance = [
+            AnalyticsService.build_budget_performance(budget, actuals[budget['_id']]) for budget in budgets
+        ]
         budgets_on_track = sum(1 for b in budgets_performance if b['achievement_percentage'] <= 100)
         budgets_over = sum(1 for b in budgets_performance if b['achievement_percentage'] > 100)
         
         return {
-            'total_customers': total_customers,
-            'total_vendors': total_vendors,
+            'total_customers': contacts_counts['customers'],
+            'total_vendors': contacts_counts['vendors'],
             'total_products': total_products,
             'pending_invoices': pending_invoices,
             'pending_bills': pending_bills,
@@ -184,42 +283,57 @@ class AnalyticsService:
             'net_position': total_receivable - total_payable
         }
     
+    FISCAL_YEAR_START_MONTH = 4
+    
     @staticmethod
-    def get_monthly_trends(year=None):
+    def _monthly_totals(kind, start_date, end_date):
         db = get_db()
         
+        pipeline = [
+            {'$match': {'kind': kind, 'date': {'$gte': start_date, '$lt': end_date}}},
+            {'$group': {
+                '_id': {'year': {'$year': '$date'}, 'month': {'$month': '$date'}},
+                'total': {'$sum': '$total_amount'}
+            }}
+        ]
+        return {(row['_id']['year'], row['_id']['month']): row['total'] for row in db.daily_rollups.aggregate(pipeline)}
+    
+    @staticmethod
+    def get_monthly_trends(year=None, end_year=None, fiscal=False):
         if not year:
             year = datetime.utcnow().year
+        if not end_year or end_year < year:
+            end_year = year
+        
+        first_month = AnalyticsService.FISCAL_YEAR_START_MONTH if fiscal else 1
+        start_date = datetime(year, first_month, 1)
+        end_date = datetime(end_year + 1, first_month, 1)
+        
+        sales = AnalyticsService._monthly_totals(RollupService.KIND_INCOME, start_date, end_date)
+        purchases = AnalyticsService._monthly_totals(RollupService.KIND_EXPENSE, start_date, end_date)
         
         monthly_data = []
         
-        for month in range(1, 13):
-            start_date = datetime(year, month, 1)
-            if month == 12:
-                end_date = datetime(year + 1, 1, 1)
-            else:
-                end_date = datetime(year, month + 1, 1)
-            
-            sales_pipeline = [
-                {'$match': {'status': 'posted', 'invoice_date': {'$gte': start_date, '$lt': end_date}}},
-                {'$group': {'_id': None, 'total': {'$sum': '$total_amount'}}}
-            ]
-            sales_result = list(db.customer_invoices.aggregate(sales_pipeline))
-            sales = sales_result[0]['total'] if sales_result else 0
-            
-            purchases_pipeline = [
-                {'$match': {'status': 'posted', 'bill_date': {'$gte': start_date, '$lt': end_date}}},
-                {'$group': {'_id': None, 'total': {'$sum': '$total_amount'}}}
-            ]
-            purchases_result = list(db.vendor_bills.aggregate(purchases_pipeline))
-            purchases = purchases_result[0]['total'] if purchases_result else 0
+        month_start = start_date
+        while month_start < end_date:
+            key = (month_start.year, month_start.month)
+            month_sales = sales.get(key, 0)
+            month_purchases = purchases.get(key, 0)
+            period_year = month_start.year if month_start.month >= first_month else month_start.year - 1
             
             monthly_data.append({
-                'month': month,
-                'month_name': start_date.strftime('%B'),
-                'sales': sales,
-                'purchases': purchases,
-                'profit': sales - purchases
+                'year': month_start.year,
+                'month': month_start.month,
+                'month_name': month_start.strftime('%B'),
+                'period_label': f"FY {period_year}-{str(period_year + 1)[-2:]}" if fiscal else str(period_year),
+                'sales': month_sales,
+                'purchases': month_purchases,
+                'profit': month_sales - month_purchases
             })
+            
+            if month_start.month == 12:
+                month_start = datetime(month_start.year + 1, 1, 1)
+            else:
+                month_start = datetime(month_start.year, month_start.month + 1, 1)
         
         return monthly_data
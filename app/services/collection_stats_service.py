@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from app.database import get_db
+
+
+class CollectionStatsService:
+    """Per-collection size snapshots, stored in collection_stats, and growth between them.
+    
+    A snapshot records document count, data size, storage size and index size for
+    every collection from $collStats. Growth compares the current sizes with an
+    earlier snapshot and reports the change and the daily rate.
+    """
+    
+    @staticmethod
+    def _stats(db, name):
+        totals = {'count': 0, 'size': 0, 'storage_size': 0, 'index_size': 0}
+        # One result per shard on sharded clusters.
+        for result in db[name].aggregate([{'$collStats': {'storageStats': {}}}]):
+            stats = result.get('storageStats', {})
+            totals['count'] += stats.get('count', 0)
+            totals['size'] += stats.get('size', 0)
+            totals['storage_size'] += stats.get('storageSize', 0)
+            totals['index_size'] += stats.get('totalIndexSize', 0)
+        return totals
+    
+    @staticmethod
+    def snapshot():
+        db = get_db()
+        collections = []
+        for name in sorted(db.list_collection_names()):
+            if name.startswith('system.'):
+                continue
+            collections.append(dict(CollectionStatsService._stats(db, name), name=name))
+        return {'taken_at': datetime.utcnow(), 'collections': collections}
+    
+    @staticmethod
+    def previous_snapshot(older_than_days=0, before=None):
+        """Latest stored snapshot taken at least older_than_days before `before` (default now)"""
+        before = (before or datetime.utcnow()) - timedelta(days=older_than_days)
+        return get_db().collection_stats.find_one({'taken_at': {'$lte': before}}, sort=[('taken_at', -1)])
+    
+    @staticmethod
+    def growth(current, previous):
+        """Rows per collection with current sizes and the change since previous, largest growth first"""
+        earlier = {row['name']: row for row in (previous or {}).get('collections', [])}
+        days = (current['taken_at'] - previous['taken_at']).total_seconds() / 86400 if previous else 0
+        
+        rows = []
+        for row in current['collections']:
+            before = earlier.get(row['name'], {})
+            size_delta = row['size'] - before.get('size', 0) if previous else None
+            rows.append(dict(
+                row,
+                count_delta=row['count'] - before.get('count', 0) if previous else None,
+                size_delta=size_delta,
+                index_size_delta=row['index_size'] - before.get('index_size', 0) if previous else None,
+                size_per_day=round(size_delta / days) if previous and days > 0 else None
+            ))
+        rows.sort(key=lambda r: (r['size_delta'] or 0, r['size']), reverse=True)
+        return {'days': round(days, 2), 'since': previous['taken_at'] if previous else None, 'collections': rows}
+    
+    @staticmethod
+    def report(older_than_days=0, save=True):
+        """Take a snapshot, compare it with an earlier one and optionally store it"""
+        previous = CollectionStatsService.previous_snapshot(older_than_days)
+        current = CollectionStatsService.snapshot()
+        if save:
+            get_db().collection_stats.insert_one(dict(current))
+        return CollectionStatsService.growth(current, previous)
@@ -0,0 +1,233 @@
+import os
+import smtplib
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app.services.email_outbox import EmailOutbox
+from app.services.email_service import EmailService
+
+
+class SMTPConnectionPool:
+    """Bounded pool of connected, authenticated SMTP sessions.
+    
+    A connection is opened (EHLO, STARTTLS, login) once and reused for up to
+    max_messages messages. Connections idle longer than idle_check_seconds are
+    probed with NOOP before reuse; broken ones are discarded and reopened.
+    """
+    
+    def __init__(self, host, port, username=None, password=None, use_tls=True, timeout=30,
+                 size=3, max_messages=100, idle_check_seconds=60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_check_seconds = idle_check_seconds
+        
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self.connections_opened = 0
+    
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config['SMTP_SERVER'],
+            config['SMTP_PORT'],
+            username=config.get('EMAIL_ADDRESS'),
+            password=config.get('EMAIL_PASSWORD'),
+            use_tls=config['SMTP_USE_TLS'],
+            timeout=config['SMTP_TIMEOUT_SECONDS'],
+            size=config['EMAIL_POOL_SIZE'],
+            max_messages=config['EMAIL_CONNECTION_MAX_MESSAGES'],
+            idle_check_seconds=config['EMAIL_CONNECTION_IDLE_CHECK_SECONDS']
+        )
+    
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.use_tls:
+                server.starttls()
+                server.ehlo()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        self.connections_opened += 1
+        return {'server': server, 'messages': 0, 'last_used': time.monotonic()}
+    
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+    
+    @staticmethod
+    def _alive(server):
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+    
+    def acquire(self):
+        """Take a connection, opening one if none is idle; blocks while size are in use"""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    return self._open()
+                idle_for = time.monotonic() - connection['last_used']
+                if idle_for < self.idle_check_seconds or self._alive(connection['server']):
+                    return connection
+                self._close(connection['server'])
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def release(self, connection, broken=False):
+        if broken or connection['messages'] >= self.max_messages:
+            self._close(connection['server'])
+        else:
+            connection['last_used'] = time.monotonic()
+            with self._lock:
+                self._idle.append(connection)
+        self._slots.release()
+    
+    def warm(self):
+        """Open connections up to the pool size ahead of the first batch"""
+        connections = []
+        try:
+            for _ in range(self.size - len(self._idle)):
+                connections.append(self.acquire())
+        finally:
+            for connection in connections:
+                self.release(connection)
+    
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._close(connection['server'])
+
+
+class EmailDelivery:
+    """Sends claimed outbox messages in batches over an SMTPConnectionPool"""
+    
+    # Retrying these will not help: the server rejected the sender, recipient or content.
+    PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPNotSupportedError)
+    # The session is unusable and the message may simply be resent on a fresh one.
+    CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+    
+    def __init__(self, pool, from_address, worker_id=None):
+        self.pool = pool
+        self.from_address = from_address
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+    
+    @staticmethod
+    def _permanent(error):
+        if isinstance(error, EmailDelivery.PERMANENT_ERRORS):
+            return True
+        code = getattr(error, 'smtp_code', None)
+        return isinstance(code, int) and 500 <= code < 600 and not isinstance(error, smtplib.SMTPAuthenticationError)
+    
+    def _send(self, message):
+        """Send one message; returns None or (error, permanent)"""
+        try:
+            mime = EmailService.build_message(self.from_address, message['to'], message['subject'],
+                                              message['html'], message.get('attachments'))
+            payload = mime.as_string()
+        except Exception as e:
+            # A message that cannot be built will not build on a later attempt either.
+            return e, True
+        
+        for attempt in range(2):
+            try:
+                connection = self.pool.acquire()
+            except Exception as e:
+                return e, False
+            broken = False
+            try:
+                connection['server'].sendmail(self.from_address, [message['to']], payload)
+                connection['messages'] += 1
+                return None
+            except self.CONNECTION_ERRORS as e:
+                broken = True
+                if attempt == 0:
+                    continue
+                return e, False
+            except smtplib.SMTPException as e:
+                # Clear the failed transaction so the session can be reused.
+                try:
+                    connection['server'].rset()
+                except Exception:
+                    broken = True
+                return e, self._permanent(e)
+            except OSError as e:
+                broken = True
+                return e, False
+            except Exception as e:
+                # e.g. UnicodeEncodeError for a non-ASCII address: the message itself is at fault,
+                # and the session may be left mid-transaction.
+                broken = True
+                return e, True
+            finally:
+                self.pool.release(connection, broken=broken)
+    
+    def run_once(self, batch_size=None):
+        """Claim, send and record one batch; returns counts of sent, retrying and failed messages"""
+        batch_size = batch_size or current_app.config['EMAIL_BATCH_SIZE']
+        messages = EmailOutbox.claim_batch(self.worker_id, batch_size)
+        result = {'sent': 0, 'retrying': 0, 'failed': 0}
+        if not messages:
+            return result
+        
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            outcomes = list(executor.map(self._send, messages))
+        
+        # Outcomes are recorded here, on the thread that owns the app context.
+        for message, outcome in zip(messages, outcomes):
+            if outcome is None:
+                EmailOutbox.mark_sent(message['_id'])
+                result['sent'] += 1
+                continue
+            error, permanent = outcome
+            status = EmailOutbox.mark_failed(message, error, permanent)
+            result['failed' if status == EmailOutbox.STATUS_FAILED else 'retrying'] += 1
+        return result
+    
+    def run(self, stop_event=None, log=print):
+        """Poll the outbox until stop_event is set"""
+        poll_seconds = current_app.config['EMAIL_POLL_SECONDS']
+        try:
+            self.pool.warm()
+        except Exception as e:
+            log(f"Could not open SMTP connections yet: {e}")
+        
+        while not (stop_event and stop_event.is_set()):
+            try:
+                result = self.run_once()
+            except Exception as e:
+                log(f"Email batch failed: {e}")
+                result = {'sent': 0, 'retrying': 0, 'failed': 0}
+            if any(result.values()):
+                log(f"Email batch: {result['sent']} sent, {result['retrying']} retrying, {result['failed']} failed")
+            elif stop_event:
+                stop_event.wait(poll_seconds)
+            else:
+                time.sleep(poll_seconds)
+        self.pool.close()
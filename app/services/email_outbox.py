@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+
+from bson import Binary
+from flask import current_app
+from pymongo import ReturnDocument
+
+from app.database import get_db
+
+
+class EmailOutbox:
+    """Queue of outgoing emails in the email_outbox collection.
+    
+    Routes only enqueue; the email worker (email_worker.py) claims batches, sends
+    them over pooled SMTP connections and records the outcome. A claimed message
+    holds a lease, so a message left in 'sending' by a crashed worker is picked up
+    again once the lease runs out, until it has used EMAIL_MAX_ATTEMPTS.
+    """
+    
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    
+    @staticmethod
+    def _document(to_email, subject, html_content, attachments, now):
+        return {
+            'to': to_email,
+            'subject': subject,
+            'html': html_content,
+            'attachments': [
+                {'filename': attachment['filename'], 'content': Binary(attachment['content'])}
+                for attachment in attachments or []
+            ],
+            'status': EmailOutbox.STATUS_PENDING,
+            'attempts': 0,
+            'next_attempt_at': now,
+            'lease_expires_at': None,
+            'last_error': None,
+            'created_at': now,
+            'sent_at': None
+        }
+    
+    @staticmethod
+    def enqueue(to_email, subject, html_content, attachments=None):
+        """Store a message for delivery; returns its id"""
+        message = EmailOutbox._document(to_email, subject, html_content, attachments, datetime.utcnow())
+        return get_db().email_outbox.insert_one(message).inserted_id
+    
+    @staticmethod
+    def enqueue_many(messages):
+        """Store many {'to', 'subject', 'html'} messages with one insert; returns their ids"""
+        now = datetime.utcnow()
+        documents = [
+            EmailOutbox._document(message['to'], message['subject'], message['html'], message.get('attachments'), now)
+            for message in messages
+        ]
+        if not documents:
+            return []
+        return get_db().email_outbox.insert_many(documents, ordered=False).inserted_ids
+    
+    @staticmethod
+    def claim_batch(worker_id, batch_size, now=None):
+        """Lease up to batch_size due messages to worker_id, oldest due first"""
+        db = get_db()
+        now = now or datetime.utcnow()
+        lease_expires_at = now + timedelta(seconds=current_app.config['EMAIL_LEASE_SECONDS'])
+        max_attempts = current_app.config['EMAIL_MAX_ATTEMPTS']
+        
+        # A lease that keeps running out means the message stops its worker; give up on it.
+        db.email_outbox.update_many(
+            {'status': EmailOutbox.STATUS_SENDING, 'lease_expires_at': {'$lte': now}, 'attempts': {'$gte': max_attempts}},
+            {'$set': {
+                'status': EmailOutbox.STATUS_FAILED,
+                'next_attempt_at': None,
+                'lease_expires_at': None,
+                'last_error': 'Lease expired on the final attempt'
+            }}
+        )
+        
+        claimed = []
+        for _ in range(batch_size):
+            message = db.email_outbox.find_one_and_update(
+                {'$or': [
+                    {'status': EmailOutbox.STATUS_PENDING, 'next_attempt_at': {'$lte': now}},
+                    {'status': EmailOutbox.STATUS_SENDING, 'lease_expires_at': {'$lte': now}, 'attempts': {'$lt': max_attempts}}
+                ]},
+                {
+                    '$set': {'status': EmailOutbox.STATUS_SENDING, 'lease_expires_at': lease_expires_at, 'worker': worker_id},
+                    '$inc': {'attempts': 1}
+                },
+                sort=[('next_attempt_at', 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if not message:
+                break
+            claimed.append(message)
+        return claimed
+    
+    @staticmethod
+    def mark_sent(message_id):
+        get_db().email_outbox.update_one(
+            {'_id': message_id},
+            {'$set': {
+                'status': EmailOutbox.STATUS_SENT,
+                'sent_at': datetime.utcnow(),
+                'lease_expires_at': None,
+                'last_error': None
+            }}
+        )
+    
+    @staticmethod
+    def retry_delay(attempts):
+        """Exponential backoff after the given number of failed attempts"""
+        config = current_app.config
+        delay = config['EMAIL_RETRY_BASE_SECONDS'] * (2 ** max(attempts - 1, 0))
+        return min(delay, config['EMAIL_RETRY_MAX_SECONDS'])
+    
+    @staticmethod
+    def mark_failed(message, error, permanent=False):
+        """Schedule another attempt, or give up when permanent or out of attempts; returns the new status"""
+        attempts = message.get('attempts', 1)
+        if permanent or attempts >= current_app.config['EMAIL_MAX_ATTEMPTS']:
+            status = EmailOutbox.STATUS_FAILED
+            next_attempt_at = None
+        else:
+            status = EmailOutbox.STATUS_PENDING
+            next_attempt_at = datetime.utcnow() + timedelta(seconds=EmailOutbox.retry_delay(attempts))
+        
+        get_db().email_outbox.update_one(
+            {'_id': message['_id']},
+            {'$set': {
+                'status': status,
+                'next_attempt_at': next_attempt_at,
+                'lease_expires_at': None,
+                'last_error': str(error)[:500]
+            }}
+        )
+        return status
+    
+    @staticmethod
+    def counts():
+        """Number of messages per status"""
+        return {
+            row['_id']: row['count']
+            for row in get_db().email_outbox.aggregate([{'$group': {'_id': '$status', 'count': {'$sum': 1}}}])
+        }
@@ -0,0 +1,67 @@
+import os
+import threading
+from datetime import datetime
+
+from flask import current_app
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates', 'email')
+
+
+def _money(value, places=2):
+    return f"{float(value or 0):,.{places}f}"
+
+
+class EmailTemplates:
+    """Jinja2 templates for outgoing email, compiled once per process.
+    
+    Templates live in app/templates/email and extend layout.html, which holds the
+    shared markup and CSS. The environment is built on first use and keeps every
+    compiled template in memory; with EMAIL_TEMPLATE_CACHE_DIR set, compiled
+    bytecode is also written to disk so new worker processes skip compilation.
+    """
+    
+    _environment = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def _build(config):
+        cache_dir = config.get('EMAIL_TEMPLATE_CACHE_DIR')
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        environment = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=select_autoescape(['html']),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir) if cache_dir else None,
+            auto_reload=config.get('DEBUG', False),
+            cache_size=-1,
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+        environment.filters['money'] = _money
+        environment.globals['frontend_url'] = config.get('FRONTEND_URL', 'http://localhost:3000')
+        return environment
+    
+    @staticmethod
+    def environment():
+        if EmailTemplates._environment is None:
+            with EmailTemplates._lock:
+                if EmailTemplates._environment is None:
+                    EmailTemplates._environment = EmailTemplates._build(current_app.config)
+        return EmailTemplates._environment
+    
+    @staticmethod
+    def render(template_name, **context):
+        context.setdefault('year', datetime.utcnow().year)
+        return EmailTemplates.environment().get_template(template_name).render(context)
+    
+    @staticmethod
+    def render_many(template_name, shared, per_message):
+        """Render template_name once per entry of per_message, each merged over shared"""
+        template = EmailTemplates.environment().get_template(template_name)
+        base = dict(shared)
+        base.setdefault('year', datetime.utcnow().year)
+        for fields in per_message:
+            context = dict(base)
+            context.update(fields)
+            yield template.render(context)
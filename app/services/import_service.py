@@ -0,0 +1,295 @@
+import csv
+import json
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.database import get_db
+from app.models.customer_invoice import CustomerInvoice
+from app.models.vendor_bill import VendorBill
+from app.models.sales_order import SalesOrder
+from app.models.purchase_order import PurchaseOrder
+from app.services.analytics_service import AnalyticalRules
+from app.services.open_items_service import OpenItemsService
+from app.services.pricing_service import PricingService
+from app.services.rollup_service import RollupService
+from app.services.search_service import SearchService
+from app.utils.conditional import bump_versions
+from app.utils.helpers import generate_numbers, parse_date
+
+
+class ImportService:
+    """Bulk creation of invoices, bills and orders from NDJSON or CSV.
+    
+    Each document row has the same fields as the matching create endpoint's body.
+    Rows are validated in chunks: contacts and products for a chunk are fetched with
+    one $in query each, analytical rules are compiled once per import, document
+    numbers are reserved as one contiguous range per chunk and the valid documents
+    are written with an unordered insert_many. Invalid rows are reported and skipped.
+    """
+    
+    CHUNK_SIZE = 500
+    
+    KINDS = {
+        'customer_invoices': {
+            'model': CustomerInvoice, 'prefix': 'INV', 'number_field': 'invoice_number',
+            'contact_field': 'customer_id', 'price_field': 'sale_price', 'date_field': 'invoice_date',
+            'statuses': [CustomerInvoice.STATUS_DRAFT, CustomerInvoice.STATUS_POSTED],
+            'rollup': RollupService.KIND_INCOME, 'open_item': OpenItemsService.KIND_RECEIVABLE
+        },
+        'vendor_bills': {
+            'model': VendorBill, 'prefix': 'BILL', 'number_field': 'bill_number',
+            'contact_field': 'vendor_id', 'price_field': 'purchase_price', 'date_field': 'bill_date',
+            'statuses': [VendorBill.STATUS_DRAFT, VendorBill.STATUS_POSTED],
+            'rollup': RollupService.KIND_EXPENSE, 'open_item': OpenItemsService.KIND_PAYABLE
+        },
+        'sales_orders': {
+            'model': SalesOrder, 'prefix': 'SO', 'number_field': 'so_number',
+            'contact_field': 'customer_id', 'price_field': 'sale_price', 'date_field': 'order_date',
+            'statuses': [SalesOrder.STATUS_DRAFT]
+        },
+        'purchase_orders': {
+            'model': PurchaseOrder, 'prefix': 'PO', 'number_field': 'po_number',
+            'contact_field': 'vendor_id', 'price_field': 'purchase_price', 'date_field': 'order_date',
+            'statuses': [PurchaseOrder.STATUS_DRAFT]
+        }
+    }
+    
+    # Optional document-level fields copied from a row, by kind
+    EXTRA_FIELDS = {
+        'customer_invoices': {'sales_order_id': 'id', 'due_date': 'date', 'discount_amount': 'float'},
+        'vendor_bills': {'purchase_order_id': 'id', 'vendor_bill_number': 'str', 'due_date': 'date'},
+        'sales_orders': {'delivery_date': 'date', 'discount_amount': 'float', 'shipping_address': 'raw'},
+        'purchase_orders': {'expected_date': 'date'}
+    }
+    
+    ITEM_COLUMNS = ('product_id', 'product_sku', 'quantity', 'unit_price', 'tax_rate', 'unit')
+    
+    @staticmethod
+    def parse_ndjson(lines):
+        """Yield (line_number, row) for each non-blank line; bad JSON yields the error text"""
+        for line_number, line in enumerate(lines, 1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, f'Invalid JSON: {e}'
+                continue
+            yield line_number, row if isinstance(row, dict) else 'Expected a JSON object'
+    
+    @staticmethod
+    def parse_csv(lines):
+        """Yield (line_number, row) per document from one-line-per-item CSV.
+        
+        Consecutive lines sharing a ref column form one document; item columns go
+        into its items list and every other non-empty column is a document field.
+        """
+        reader = csv.DictReader(line.decode('utf-8') if isinstance(line, bytes) else line for line in lines)
+        current, current_ref, first_line = None, None, None
+        
+        for record in reader:
+            record = {key: value for key, value in record.items() if key and value not in (None, '')}
+            ref = record.pop('ref', None)
+            item = {key: record.pop(key) for key in ImportService.ITEM_COLUMNS if key in record}
+            
+            if current is None or ref is None or ref != current_ref:
+                if current is not None:
+                    yield first_line, current
+                current = dict(record, items=[])
+                if ref is not None:
+                    current['ref'] = ref
+                current_ref, first_line = ref, reader.line_num
+            if item:
+                current['items'].append(item)
+        
+        if current is not None:
+            yield first_line, current
+    
+    @staticmethod
+    def _object_id(value):
+        if isinstance(value, ObjectId):
+            return value
+        if value and ObjectId.is_valid(str(value)):
+            return ObjectId(str(value))
+        return None
+    
+    @staticmethod
+    def _fetch_references(db, rows, contact_field):
+        contact_ids, product_ids, skus = set(), set(), set()
+        for _, row in rows:
+            contact_ids.add(ImportService._object_id(row.get(contact_field)))
+            for item in row.get('items') or []:
+                if not isinstance(item, dict):
+                    continue
+                product_ids.add(ImportService._object_id(item.get('product_id')))
+                if item.get('product_sku'):
+                    skus.add(str(item['product_sku']).upper())
+        contact_ids.discard(None)
+        product_ids.discard(None)
+        
+        contacts = {c['_id']: c for c in db.contacts.find({'_id': {'$in': list(contact_ids)}})} if contact_ids else {}
+        products = {}
+        if product_ids or skus:
+            for product in db.products.find({'$or': [{'_id': {'$in': list(product_ids)}}, {'sku': {'$in': list(skus)}}]}):
+                products[product['_id']] = product
+                products[product.get('sku')] = product
+        return contacts, products
+    
+    @staticmethod
+    def _build(kind, row, contacts, products, rules, user_id):
+        """Model instance for one row, or raise ValueError with the reason it is invalid"""
+        spec = ImportService.KINDS[kind]
+        contact_field = spec['contact_field']
+        
+        contact = contacts.get(ImportService._object_id(row.get(contact_field)))
+        if not contact:
+            raise ValueError(f'{contact_field} is missing or not found')
+        if not row.get('items'):
+            raise ValueError('At least one item is required')
+        
+        status = row.get('status', spec['statuses'][0])
+        if status not in spec['statuses']:
+            raise ValueError(f"Invalid status. Must be one of: {spec['statuses']}")
+        
+        document = spec['model']()
+        setattr(document, contact_field, str(contact['_id']))
+        document.status = status
+        document.notes = row.get('notes')
+        document.created_by = user_id
+        document.created_at = datetime.utcnow()
+        document.updated_at = datetime.utcnow()
+        
+        date_value = row.get(spec['date_field'])
+        document_date = parse_date(date_value) if date_value else datetime.utcnow()
+        if not document_date:
+            raise ValueError(f"Invalid {spec['date_field']}")
+        setattr(document, spec['date_field'], document_date)
+        
+        for field, field_type in ImportService.EXTRA_FIELDS[kind].items():
+            if row.get(field) in (None, ''):
+                continue
+            value = row[field]
+            if field_type == 'date':
+                value = parse_date(value)
+                if not value:
+                    raise ValueError(f'Invalid {field}')
+            elif field_type == 'float':
+                value = float(value)
+            elif field_type == 'id':
+                value = str(value) if ImportService._object_id(value) else None
+                if not value:
+                    raise ValueError(f'Invalid {field}')
+            setattr(document, field, value)
+        
+        if hasattr(document, 'due_date') and not document.due_date:
+            document.due_date = document_date + timedelta(days=contact.get('payment_terms', 30))
+        if kind == 'sales_orders' and not row.get('shipping_address'):
+            document.shipping_address = contact.get('shipping_address', {})
+        
+        priced = PricingService.price_items(row['items'], spec['price_field'], products)
+        
+        document.items = priced.items
+        document.calculate_totals()
+        
+        analytical_account_id = row.get('analytical_account_id')
+        if analytical_account_id and not ImportService._object_id(analytical_account_id):
+            raise ValueError('Invalid analytical_account_id')
+        if not analytical_account_id:
+            first_product = priced.first_product
+            analytical_account_id = rules.match(
+                product_id=first_product['_id'],
+                category=first_product.get('category'),
+                contact_id=contact['_id'],
+                amount=document.total_amount
+            ) or first_product.get('default_analytical_account_id')
+        if analytical_account_id:
+            document.analytical_account_id = str(analytical_account_id)
+        
+        return document
+    
+    @staticmethod
+    def _import_chunk(kind, rows, rules, user_id, dry_run, result):
+        db = get_db()
+        spec = ImportService.KINDS[kind]
+        
+        parsed = []
+        for line_number, row in rows:
+            if isinstance(row, str):
+                result['errors'].append({'line': line_number, 'error': row})
+            else:
+                parsed.append((line_number, row))
+        
+        contacts, products = ImportService._fetch_references(db, parsed, spec['contact_field'])
+        
+        valid = []
+        for line_number, row in parsed:
+            try:
+                document = ImportService._build(kind, row, contacts, products, rules, user_id)
+            except (ValueError, TypeError) as e:
+                result['errors'].append({'line': line_number, 'ref': row.get('ref'), 'error': str(e)})
+                continue
+            valid.append((line_number, row, document))
+        
+        if dry_run or not valid:
+            result['valid'] += len(valid)
+            return
+        
+        numbers = generate_numbers(spec['prefix'], kind, len(valid))
+        documents = []
+        for (line_number, row, document), number in zip(valid, numbers):
+            setattr(document, spec['number_field'], number)
+            data = SearchService.with_search_keys(kind, document.to_db_dict())
+            data['_id'] = ObjectId()
+            documents.append(data)
+        
+        failed = set()
+        try:
+            db[kind].insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                index = write_error['index']
+                failed.add(index)
+                result['errors'].append({
+                    'line': valid[index][0],
+                    'ref': valid[index][1].get('ref'),
+                    'error': write_error.get('errmsg', 'Insert failed')
+                })
+        
+        inserted = [data for index, data in enumerate(documents) if index not in failed]
+        result['imported'] += len(inserted)
+        result['numbers'].extend(data[spec['number_field']] for data in inserted)
+        
+        posted = [data for data in inserted if data.get('status') == 'posted']
+        if posted:
+            RollupService.refresh_documents(spec['rollup'], posted)
+            OpenItemsService.record_many(spec['open_item'], posted, contacts)
+        result['valid'] += len(valid)
+    
+    @staticmethod
+    def run(kind, rows, user_id=None, dry_run=False, chunk_size=None):
+        """Import an iterable of (line_number, row) pairs; returns a summary with per-row errors"""
+        if kind not in ImportService.KINDS:
+            raise ValueError(f'Unknown import kind. Must be one of: {list(ImportService.KINDS)}')
+        
+        chunk_size = chunk_size or ImportService.CHUNK_SIZE
+        rules = AnalyticalRules.load()
+        result = {'kind': kind, 'dry_run': dry_run, 'rows': 0, 'valid': 0, 'imported': 0, 'numbers': [], 'errors': []}
+        
+        chunk = []
+        for entry in rows:
+            chunk.append(entry)
+            result['rows'] += 1
+            if len(chunk) >= chunk_size:
+                ImportService._import_chunk(kind, chunk, rules, user_id, dry_run, result)
+                chunk = []
+        if chunk:
+            ImportService._import_chunk(kind, chunk, rules, user_id, dry_run, result)
+        
+        if result['imported']:
+            # Writes made outside a request are not seen by the after_request version hook.
+            bump_versions(kind, 'daily_rollups', 'open_items')
+        
+        result['failed'] = len(result['errors'])
+        return result
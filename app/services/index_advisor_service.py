@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from bson import ObjectId
+from app.database import get_db
+
+
+class IndexAdvisorService:
+    """Runs explain() over the app's hot query shapes and flags the ones indexes do not serve.
+    
+    Each registered shape mirrors a real route or report query with placeholder values.
+    A shape is flagged when its winning plan contains a COLLSCAN, or when it examines many
+    more documents than it returns.
+    """
+    
+    DEFAULT_RATIO_THRESHOLD = 10
+    
+    @staticmethod
+    def query_shapes():
+        now = datetime.utcnow()
+        year_start = datetime(now.year, 1, 1)
+        month_ago = now - timedelta(days=30)
+        some_id = ObjectId()
+        
+        return [
+            {'name': 'invoices list by status', 'collection': 'customer_invoices',
+             'filter': {'status': 'posted'}, 'sort': [('created_at', -1), ('_id', -1)], 'limit': 20},
+            {'name': 'invoices list by customer', 'collection': 'customer_invoices',
+             'filter': {'customer_id': some_id}, 'sort': [('created_at', -1), ('_id', -1)], 'limit': 20},
+            {'name': 'sales summary', 'collection': 'customer_invoices',
+             'pipeline': [{'$match': {'status': 'posted', 'invoice_date': {'$gte': year_start, '$lte': now}}},
+                          {'$group': {'_id': '$customer_id', 'total': {'$sum': '$total_amount'}}}]},
+            {'name': 'posted invoices per account', 'collection': 'customer_invoices',
+             'filter': {'analytical_account_id': some_id, 'status': 'posted',
+                        'invoice_date': {'$gte': month_ago, '$lte': now}}},
+            {'name': 'portal invoices', 'collection': 'customer_invoices',
+             'filter': {'customer_id': some_id, 'status': {'$in': ['draft', 'posted']}},
+             'sort': [('invoice_date', -1), ('_id', -1)], 'limit': 20},
+            {'name': 'portal open invoices', 'collection': 'customer_invoices',
+             'filter': {'customer_id': some_id, 'status': 'posted', 'payment_status': {'$ne': 'paid'}}},
+            {'name': 'open invoices', 'collection': 'customer_invoices',
+             'filter': {'status': 'posted', 'payment_status': {'$ne': 'paid'}}},
+            {'name': 'invoice payments', 'collection': 'payments',
+             'filter': {'invoice_id': some_id}},
+            {'name': 'bills list by status', 'collection': 'vendor_bills',
+             'filter': {'status': 'posted'}, 'sort': [('created_at', -1), ('_id', -1)], 'limit': 20},
+            {'name': 'purchase summary', 'collection': 'vendor_bills',
+             'pipeline': [{'$match': {'status': 'posted', 'bill_date': {'$gte': year_start, '$lte': now}}},
+                          {'$group': {'_id': '$vendor_id', 'total': {'$sum': '$total_amount'}}}]},
+            {'name': 'posted bills per account', 'collection': 'vendor_bills',
+             'filter': {'analytical_account_id': some_id, 'status': 'posted',
+                        'bill_date': {'$gte': month_ago, '$lte': now}}},
+            {'name': 'portal bills', 'collection': 'vendor_bills',
+             'filter': {'vendor_id': some_id, 'status': 'posted'},
+             'sort': [('bill_date', -1), ('_id', -1)], 'limit': 20},
+            {'name': 'open bills', 'collection': 'vendor_bills',
+             'filter': {'status': 'posted', 'payment_status': {'$ne': 'paid'}}},
+            {'name': 'portal sales orders', 'collection': 'sales_orders',
+             'filter': {'customer_id': some_id, 'status': {'$ne': 'cancelled'}},
+             'sort': [('order_date', -1), ('_id', -1)], 'limit': 20},
+            {'name': 'portal active orders', 'collection': 'sales_orders',
+             'filter': {'customer_id': some_id, 'status': {'$in': ['confirmed', 'draft']}}},
+            {'name': 'payments list by contact', 'collection': 'payments',
+             'filter': {'contact_id': some_id}, 'sort': [('created_at', -1), ('_id', -1)], 'limit': 20},
+            {'name': 'product search', 'collection': 'products',
+             'filter': {'is_archived': False, 'search_prefixes': {'$all': ['ch']}}},
+            {'name': 'contact search', 'collection': 'contacts',
+             'filter': {'is_archived': False, 'search_prefixes': {'$all': ['ch']}}},
+            {'name': 'contacts list', 'collection': 'contacts',
+             'filter': {'is_archived': False}, 'sort': [('name', 1), ('_id', 1)], 'limit': 20},
+            {'name': 'budget actuals', 'collection': 'daily_rollups',
+             'filter': {'kind': 'expense', 'analytical_account_id': {'$in': [some_id]},
+                        'date': {'$gte': year_start, '$lte': now}}},
+            {'name': 'user notifications', 'collection': 'notifications',
+             'filter': {'user_id': some_id}, 'sort': [('created_at', -1)], 'limit': 20},
+            {'name': 'unread notifications', 'collection': 'notifications',
+             'filter': {'user_id': some_id, 'is_read': False}},
+            {'name': 'role broadcasts', 'collection': 'notifications',
+             'filter': {'audience_role': 'admin', 'created_at': {'$gt': month_ago}},
+             'sort': [('created_at', -1)], 'limit': 20},
+            {'name': 'receivables aging', 'collection': 'open_items',
+             'filter': {'kind': 'receivable', 'due_date': {'$ne': None}}, 'sort': [('due_date', 1)], 'limit': 50}
+        ]
+    
+    @staticmethod
+    def _explain(db, shape):
+        if 'pipeline' in shape:
+            return db.command('explain', {
+                'aggregate': shape['collection'],
+                'pipeline': shape['pipeline'],
+                'cursor': {}
+            }, verbosity='executionStats')
+        
+        command = {'find': shape['collection'], 'filter': shape.get('filter', {})}
+        if shape.get('sort'):
+            command['sort'] = dict(shape['sort'])
+        if shape.get('limit'):
+            command['limit'] = shape['limit']
+        return db.command('explain', command, verbosity='executionStats')
+    
+    @staticmethod
+    def _walk(node):
+        if isinstance(node, dict):
+            yield node
+            for value in node.values():
+                yield from IndexAdvisorService._walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                yield from IndexAdvisorService._walk(value)
+    
+    @staticmethod
+    def summarize(explain):
+        """Reduce explain output to the plan stages used and the docs examined/returned"""
+        stages = set()
+        indexes = set()
+        docs_examined = 0
+        returned = 0
+        
+        for node in IndexAdvisorService._walk(explain):
+            for plan_key in ('winningPlan', 'queryPlan'):
+                for stage in IndexAdvisorService._walk(node.get(plan_key, {})):
+                    if 'stage' in stage:
+                        stages.add(stage['stage'])
+                    if stage.get('indexName'):
+                        indexes.add(stage['indexName'])
+            stats = node.get('executionStats')
+            if isinstance(stats, dict):
+                docs_examined += stats.get('totalDocsExamined', 0)
+                returned += stats.get('nReturned', 0)
+        
+        return {
+            'stages': sorted(stages),
+            'indexes': sorted(indexes),
+            'docs_examined': docs_examined,
+            'returned': returned
+        }
+    
+    @staticmethod
+    def analyze(ratio_threshold=DEFAULT_RATIO_THRESHOLD):
+        """Explain every registered shape; returns one report per shape"""
+        db = get_db()
+        
+        reports = []
+        for shape in IndexAdvisorService.query_shapes():
+            summary = IndexAdvisorService.summarize(IndexAdvisorService._explain(db, shape))
+            
+            warnings = []
+            if 'COLLSCAN' in summary['stages']:
+                warnings.append('collection scan')
+            ratio = summary['docs_examined'] / max(summary['returned'], 1)
+            if summary['docs_examined'] and ratio > ratio_threshold:
+                warnings.append(f'examined {summary["docs_examined"]} docs for {summary["returned"]} returned')
+            
+            reports.append({
+                'name': shape['name'],
+                'collection': shape['collection'],
+                'indexes': summary['indexes'],
+                'docs_examined': summary['docs_examined'],
+                'returned': summary['returned'],
+                'warnings': warnings
+            })
+        
+        return reports
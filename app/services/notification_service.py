@@ -1,10 +1,40 @@
 from datetime import datetime, timedelta
 from bson import ObjectId
+from flask import current_app
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
 from app.database import get_db
 from app.services.email_service import EmailService
 
 
 class NotificationService:
+    """Per-user notifications plus broadcasts targeted at a role.
+    
+    A broadcast is a single notifications document with audience_role instead of
+    user_id, so announcing an event costs one write however many users hold the
+    role. Each user's read state for broadcasts lives in notification_reads: a
+    watermark (everything created up to it is read) and the ids read individually
+    since then. Marking a broadcast read moves the watermark past any unbroken run
+    of read broadcasts and drops ids it covers, so read_ids stays small. Reads merge
+    both kinds of notification.
+    
+    Notifications are retained for NOTIFICATION_UNREAD_RETENTION_DAYS after creation,
+    or NOTIFICATION_READ_RETENTION_DAYS after being read. With the 'delete' policy
+    the due date goes in expires_at and a TTL index removes the document; with
+    'archive' it goes in archive_at and archive_due() moves it to notifications_archive.
+    """
+    
+    @staticmethod
+    def _object_id(user_id):
+        return ObjectId(user_id) if isinstance(user_id, str) else user_id
+    
+    @staticmethod
+    def _retention(days, start):
+        """expires_at/archive_at fields for a document due days after start; 0 days keeps it"""
+        due = start + timedelta(days=days) if days > 0 else None
+        if current_app.config['NOTIFICATION_RETENTION_POLICY'] == 'archive':
+            return {'expires_at': None, 'archive_at': due}
+        return {'expires_at': due, 'archive_at': None}
     
     @staticmethod
     def create_notification(user_id, title, message, notification_type='info', link=None):
@@ -12,7 +42,7 @@ class NotificationService:
         db = get_db()
         
         notification = {
-            'user_id': ObjectId(user_id) if isinstance(user_id, str) else user_id,
+            'user_id': NotificationService._object_id(user_id),
             'title': title,
             'message': message,
             'type': notification_type,  # info, success, warning, error
@@ -20,20 +50,81 @@ class NotificationService:
             'is_read': False,
             'created_at': datetime.utcnow()
         }
+        notification.update(NotificationService._retention(
+            current_app.config['NOTIFICATION_UNREAD_RETENTION_DAYS'], notification['created_at']
+        ))
         
         result = db.notifications.insert_one(notification)
         return str(result.inserted_id)
     
     @staticmethod
-    def get_user_notifications(user_id, limit=20, unread_only=False):
-        """Get notifications for a user"""
+    def create_broadcast(role, title, message, notification_type='info', link=None):
+        """Create one notification seen by every user with the given role"""
+        db = get_db()
+        
+        notification = {
+            'audience_role': role,
+            'title': title,
+            'message': message,
+            'type': notification_type,
+            'link': link,
+            'created_at': datetime.utcnow()
+        }
+        notification.update(NotificationService._retention(
+            current_app.config['NOTIFICATION_UNREAD_RETENTION_DAYS'], notification['created_at']
+        ))
+        
+        result = db.notifications.insert_one(notification)
+        return str(result.inserted_id)
+    
+    @staticmethod
+    def _audience(db, user_id, role=None):
+        """(user ObjectId, role, broadcast read state) for a user; role is looked up when not given"""
+        uid = NotificationService._object_id(user_id)
+        state = db.notification_reads.find_one({'_id': uid})
+        if state and role is not None:
+            return uid, role, state
+        
+        user = db.users.find_one({'_id': uid}, {'role': 1, 'created_at': 1}) or {}
+        if role is None:
+            role = user.get('role')
+        if not state:
+            # Broadcasts from before the user existed are not shown to them.
+            since = user.get('created_at') or datetime.utcnow()
+            state = {'_id': uid, 'since': since, 'watermark': since, 'read_ids': []}
+            db.notification_reads.update_one({'_id': uid}, {'$setOnInsert': state}, upsert=True)
+        return uid, role, state
+    
+    @staticmethod
+    def _unread_broadcasts_query(role, state):
+        return {
+            'audience_role': role,
+            'created_at': {'$gt': state['watermark']},
+            '_id': {'$nin': state.get('read_ids', [])}
+        }
+    
+    @staticmethod
+    def get_user_notifications(user_id, limit=20, unread_only=False, role=None):
+        """Get notifications for a user, personal and broadcast, newest first"""
         db = get_db()
+        uid, role, state = NotificationService._audience(db, user_id, role)
         
-        query = {'user_id': ObjectId(user_id) if isinstance(user_id, str) else user_id}
         if unread_only:
-            query['is_read'] = False
+            clauses = [{'user_id': uid, 'is_read': False}]
+            if role:
+                clauses.append(NotificationService._unread_broadcasts_query(role, state))
+        else:
+            clauses = [{'user_id': uid}]
+            if role:
+                clauses.append({'audience_role': role, 'created_at': {'$gt': state['since']}})
         
-        notifications = list(db.notifications.find(query).sort('created_at', -1).limit(limit))
+        notifications = list(db.notifications.find({'$or': clauses}).sort('created_at', -1).limit(limit))
+        read_ids = set(state.get('read_ids', []))
+        
+        def is_read(n):
+            if 'user_id' in n:
+                return n.get('is_read', False)
+            return n['created_at'] <= state['watermark'] or n['_id'] in read_ids
         
         return [{
             '_id': str(n['_id']),
@@ -41,62 +132,169 @@ class NotificationService:
             'message': n.get('message'),
             'type': n.get('type'),
             'link': n.get('link'),
-            'is_read': n.get('is_read', False),
+            'is_read': is_read(n),
             'created_at': n.get('created_at').isoformat() if n.get('created_at') else None
         } for n in notifications]
     
     @staticmethod
-    def mark_as_read(notification_id, user_id):
+    def mark_as_read(notification_id, user_id, role=None):
         """Mark a notification as read"""
         db = get_db()
+        uid = NotificationService._object_id(user_id)
         
         result = db.notifications.update_one(
             {
                 '_id': ObjectId(notification_id),
-                'user_id': ObjectId(user_id) if isinstance(user_id, str) else user_id
+                'user_id': uid
             },
-            {'$set': {'is_read': True}}
+            {'$set': dict(
+                NotificationService._retention(current_app.config['NOTIFICATION_READ_RETENTION_DAYS'], datetime.utcnow()),
+                is_read=True
+            )}
+        )
+        if result.matched_count:
+            return result.modified_count > 0
+        
+        uid, role, state = NotificationService._audience(db, uid, role)
+        broadcast = db.notifications.find_one(
+            {'_id': ObjectId(notification_id), 'audience_role': role, 'created_at': {'$gt': state['since']}},
+            {'created_at': 1}
         )
+        if not broadcast or broadcast['created_at'] <= state['watermark']:
+            return False
+        
+        state = db.notification_reads.find_one_and_update(
+            {'_id': uid, 'read_ids': {'$ne': broadcast['_id']}},
+            {'$addToSet': {'read_ids': broadcast['_id']}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not state:
+            return False
+        NotificationService._compact_reads(db, role, state)
+        return True
+    
+    @staticmethod
+    def _compact_reads(db, role, state):
+        """Advance the watermark past contiguous read broadcasts and drop read_ids it no longer needs"""
+        read_ids = set(state.get('read_ids', []))
+        watermark = state['watermark']
+        
+        # The run of read broadcasts right after the watermark can be no longer than read_ids.
+        pending = db.notifications.find(
+            {'audience_role': role, 'created_at': {'$gt': watermark}},
+            {'created_at': 1}
+        ).sort([('created_at', 1), ('_id', 1)]).limit(len(read_ids) + 1)
+        run = []
+        for broadcast in pending:
+            if broadcast['_id'] not in read_ids:
+                # An unread broadcast with the same timestamp would fall under the watermark too.
+                while run and run[-1] == broadcast['created_at']:
+                    run.pop()
+                break
+            run.append(broadcast['created_at'])
+        if run:
+            watermark = run[-1]
+        
+        # Keep only ids of broadcasts that still exist after the watermark and inside retention.
+        live = {'audience_role': role, 'created_at': {'$gt': watermark}, '_id': {'$in': list(read_ids)}}
+        retention_days = current_app.config['NOTIFICATION_UNREAD_RETENTION_DAYS']
+        if retention_days > 0:
+            live['created_at']['$gte'] = datetime.utcnow() - timedelta(days=retention_days)
+        stale = read_ids - set(db.notifications.distinct('_id', live))
         
-        return result.modified_count > 0
+        if run or stale:
+            db.notification_reads.update_one(
+                {'_id': state['_id']},
+                {'$max': {'watermark': watermark}, '$pull': {'read_ids': {'$in': list(stale)}}}
+            )
     
     @staticmethod
-    def mark_all_as_read(user_id):
+    def mark_all_as_read(user_id, role=None):
         """Mark all notifications as read for a user"""
         db = get_db()
+        uid, role, state = NotificationService._audience(db, user_id, role)
+        now = datetime.utcnow()
         
         result = db.notifications.update_many(
-            {'user_id': ObjectId(user_id) if isinstance(user_id, str) else user_id},
-            {'$set': {'is_read': True}}
+            {'user_id': uid, 'is_read': False},
+            {'$set': dict(
+                NotificationService._retention(current_app.config['NOTIFICATION_READ_RETENTION_DAYS'], now),
+                is_read=True
+            )}
         )
+        count = result.modified_count
+        
+        if role:
+            query = NotificationService._unread_broadcasts_query(role, state)
+            query['created_at']['$lte'] = now
+            count += db.notifications.count_documents(query)
+            # Individually read ids are covered by the new watermark.
+            db.notification_reads.update_one(
+                {'_id': uid},
+                {'$set': {'watermark': now}, '$pull': {'read_ids': {'$in': state.get('read_ids', [])}}}
+            )
         
-        return result.modified_count
+        return count
     
     @staticmethod
-    def get_unread_count(user_id):
+    def get_unread_count(user_id, role=None):
         """Get count of unread notifications"""
         db = get_db()
+        uid, role, state = NotificationService._audience(db, user_id, role)
         
-        return db.notifications.count_documents({
-            'user_id': ObjectId(user_id) if isinstance(user_id, str) else user_id,
+        count = db.notifications.count_documents({
+            'user_id': uid,
             'is_read': False
         })
+        if role:
+            count += db.notifications.count_documents(NotificationService._unread_broadcasts_query(role, state))
+        return count
     
     @staticmethod
-    def notify_admins(title, message, notification_type='info', link=None):
-        """Send notification to all admin users"""
+    def archive_due(batch_size=1000):
+        """Move notifications whose archive_at has passed to notifications_archive; returns how many"""
         db = get_db()
+        now = datetime.utcnow()
+        moved = 0
         
-        admins = db.users.find({'role': 'admin', 'is_active': True})
+        while True:
+            due = list(db.notifications.find({'archive_at': {'$lte': now}}).limit(batch_size))
+            if not due:
+                return moved
+            try:
+                db.notifications_archive.insert_many(due, ordered=False)
+            except BulkWriteError as e:
+                # Copies left by an interrupted run are already archived.
+                if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                    raise
+            db.notifications.delete_many({'_id': {'$in': [n['_id'] for n in due]}})
+            moved += len(due)
+    
+    @staticmethod
+    def backfill_retention():
+        """Set retention due dates on notifications written before they existed, counted from created_at"""
+        db = get_db()
+        config = current_app.config
+        field = 'archive_at' if config['NOTIFICATION_RETENTION_POLICY'] == 'archive' else 'expires_at'
+        updated = 0
         
-        for admin in admins:
-            NotificationService.create_notification(
-                admin['_id'],
-                title,
-                message,
-                notification_type,
-                link
+        for query, days in (
+            ({'user_id': {'$exists': True}, 'is_read': True}, config['NOTIFICATION_READ_RETENTION_DAYS']),
+            ({'$or': [{'is_read': False}, {'audience_role': {'$exists': True}}]}, config['NOTIFICATION_UNREAD_RETENTION_DAYS'])
+        ):
+            if days <= 0:
+                continue
+            result = db.notifications.update_many(
+                {'$and': [query, {field: {'$exists': False}}]},
+                [{'$set': {field: {'$add': ['$created_at', days * 24 * 3600 * 1000]}}}]
             )
+            updated += result.modified_count
+        return updated
+    
+    @staticmethod
+    def notify_admins(title, message, notification_type='info', link=None):
+        """Send notification to all admin users"""
+        return NotificationService.create_broadcast('admin', title, message, notification_type, link)
     
     @staticmethod
     def notify_new_order(order_type, order_number, customer_name, total_amount):
@@ -153,24 +351,16 @@ class NotificationService:
         pending_amount = pending_result[0]['total'] if pending_result else 0
         
         # Get admin emails
-        admins = list(db.users.find({'role': 'admin', 'is_active': True}))
+        admins = list(db.users.find({'role': 'admin', 'is_active': True}, {'email': 1, 'full_name': 1}))
         
-        for admin in admins:
-            try:
-                EmailService.send_daily_summary(
-                    admin['email'],
-                    admin.get('full_name', 'Admin'),
-                    {
-                        'date': yesterday.strftime('%Y-%m-%d'),
-                        'new_orders': new_orders,
-                        'new_invoices': new_invoices,
-                        'incoming_payments': incoming['count'],
-                        'incoming_amount': incoming['total'],
-                        'outgoing_payments': outgoing['count'],
-                        'outgoing_amount': outgoing['total'],
-                        'pending_invoices': pending_invoices,
-                        'pending_amount': pending_amount
-                    }
-                )
-            except Exception as e:
-                print(f"Failed to send daily summary to {admin['email']}: {e}")
+        EmailService.send_daily_summary(admins, {
+            'date': yesterday.strftime('%Y-%m-%d'),
+            'new_orders': new_orders,
+            'new_invoices': new_invoices,
+            'incoming_payments': incoming['count'],
+            'incoming_amount': incoming['total'],
+            'outgoing_payments': outgoing['count'],
+            'outgoing_amount': outgoing['total'],
+            'pending_invoices': pending_invoices,
+            'pending_amount': pending_amount
+        })
@@ -0,0 +1,175 @@
+from datetime import datetime
+from app.database import get_db
+
+
+class OpenItemsService:
+    """Compact subledger of unpaid posted invoices and bills used for aging reports.
+    
+    Each open_items row shares its _id with the source document and carries the
+    contact name so aging never has to join back to contacts.
+    """
+    
+    KIND_RECEIVABLE = 'receivable'
+    KIND_PAYABLE = 'payable'
+    
+    SOURCES = {
+        KIND_RECEIVABLE: ('customer_invoices', 'invoice_number', 'customer_id'),
+        KIND_PAYABLE: ('vendor_bills', 'bill_number', 'vendor_id')
+    }
+    
+    AGING_BUCKETS = {0: 'current', 1: '1_30', 31: '31_60', 61: '61_90', 'over_90': 'over_90'}
+    
+    @staticmethod
+    def _item(kind, document, contact=None):
+        _, number_field, contact_field = OpenItemsService.SOURCES[kind]
+        item = {
+            'kind': kind,
+            'document_number': document.get(number_field),
+            'contact_id': document.get(contact_field),
+            'due_date': document.get('due_date'),
+            'total_amount': document.get('total_amount', 0),
+            'amount_paid': document.get('amount_paid', 0),
+            'amount_due': document.get('amount_due', 0),
+            'payment_status': document.get('payment_status'),
+            'updated_at': datetime.utcnow()
+        }
+        if contact:
+            item['contact_name'] = contact.get('name')
+        return item
+    
+    @staticmethod
+    def record_many(kind, documents, contacts):
+        """Insert open items for newly posted documents in one write; contacts maps contact id to contact"""
+        _, _, contact_field = OpenItemsService.SOURCES[kind]
+        items = []
+        for document in documents:
+            if document.get('status') != 'posted' or document.get('payment_status') == 'paid':
+                continue
+            item = OpenItemsService._item(kind, document, contacts.get(document.get(contact_field)))
+            item.setdefault('contact_name', 'Unknown')
+            item['_id'] = document['_id']
+            items.append(item)
+        if items:
+            get_db().open_items.insert_many(items, ordered=False)
+    
+    @staticmethod
+    def refresh(kind, document_id, contact=None):
+        """Bring the open item for a document in line with its current state"""
+        db = get_db()
+        
+        collection = OpenItemsService.SOURCES[kind][0]
+        document = db[collection].find_one({'_id': document_id})
+        
+        if not document or document.get('status') != 'posted' or document.get('payment_status') == 'paid':
+            db.open_items.delete_one({'_id': document_id})
+            return
+        
+        item = OpenItemsService._item(kind, document, contact)
+        
+        result = db.open_items.update_one({'_id': document_id}, {'$set': item})
+        if result.matched_count:
+            return
+        
+        if 'contact_name' not in item:
+            contact = db.contacts.find_one({'_id': item['contact_id']}, {'name': 1}) if item['contact_id'] else None
+            item['contact_name'] = contact.get('name') if contact else 'Unknown'
+        
+        db.open_items.update_one({'_id': document_id}, {'$set': item}, upsert=True)
+    
+    @staticmethod
+    def rename_contact(contact_id, name):
+        db = get_db()
+        db.open_items.update_many({'contact_id': contact_id}, {'$set': {'contact_name': name}})
+    
+    @staticmethod
+    def _open_documents_pipeline(kind):
+        _, number_field, contact_field = OpenItemsService.SOURCES[kind]
+        return [
+            {'$match': {'status': 'posted', 'payment_status': {'$ne': 'paid'}}},
+            {'$lookup': {
+                'from': 'contacts',
+                'localField': contact_field,
+                'foreignField': '_id',
+                'as': 'contact'
+            }},
+            {'$project': {
+                'kind': kind,
+                'document_number': f'${number_field}',
+                'contact_id': f'${contact_field}',
+                'contact_name': {'$ifNull': [{'$first': '$contact.name'}, 'Unknown']},
+                'due_date': 1,
+                'total_amount': 1,
+                'amount_paid': 1,
+                'amount_due': 1,
+                'payment_status': 1,
+                'updated_at': '$$NOW'
+            }}
+        ]
+    
+    @staticmethod
+    def rebuild():
+        """Recompute open_items from every unpaid posted invoice and bill"""
+        db = get_db()
+        
+        receivable_collection = OpenItemsService.SOURCES[OpenItemsService.KIND_RECEIVABLE][0]
+        payable_collection = OpenItemsService.SOURCES[OpenItemsService.KIND_PAYABLE][0]
+        
+        pipeline = OpenItemsService._open_documents_pipeline(OpenItemsService.KIND_RECEIVABLE) + [
+            {'$unionWith': {
+                'coll': payable_collection,
+                'pipeline': OpenItemsService._open_documents_pipeline(OpenItemsService.KIND_PAYABLE)
+            }},
+            {'$out': 'open_items'}
+        ]
+        
+        list(db[receivable_collection].aggregate(pipeline))
+        
+        return db.open_items.count_documents({})
+    
+    @staticmethod
+    def aging(kind, detail_limit=50):
+        """Aging buckets and the most overdue items, computed server-side in one round trip"""
+        db = get_db()
+        
+        today = datetime.utcnow()
+        
+        pipeline = [
+            {'$match': {'kind': kind, 'due_date': {'$ne': None}}},
+            {'$facet': {
+                'buckets': [
+                    {'$bucket': {
+                        'groupBy': {'$max': [0, {'$floor': {
+                            '$divide': [{'$subtract': [today, '$due_date']}, 24 * 60 * 60 * 1000]
+                        }}]},
+                        'boundaries': [0, 1, 31, 61, 91],
+                        'default': 'over_90',
+                        'output': {'count': {'$sum': 1}, 'amount': {'$sum': '$amount_due'}}
+                    }}
+                ],
+                'details': [
+                    {'$sort': {'due_date': 1}},
+                    {'$limit': detail_limit},
+                    {'$project': {'document_number': 1, 'contact_name': 1, 'due_date': 1, 'amount_due': 1}}
+                ]
+            }}
+        ]
+        
+        result = list(db.open_items.aggregate(pipeline))
+        facets = result[0] if result else {'buckets': [], 'details': []}
+        
+        aging = {name: {'count': 0, 'amount': 0} for name in OpenItemsService.AGING_BUCKETS.values()}
+        for bucket in facets['buckets']:
+            aging[OpenItemsService.AGING_BUCKETS[bucket['_id']]] = {
+                'count': bucket['count'],
+                'amount': bucket['amount']
+            }
+        
+        details = [{
+            'document_number': item.get('document_number'),
+            'contact_name': item.get('contact_name'),
+            'due_date': item['due_date'].isoformat(),
+            'amount_due': item.get('amount_due', 0),
+            'days_overdue': max(0, (today - item['due_date']).days)
+        } for item in facets['details']]
+        
+        return aging, details
@@ -0,0 +1,110 @@
+from bson import ObjectId
+from app.utils.loader import get_loader
+
+
+class PricingError(ValueError):
+    """A line item that cannot be priced; status_code is the HTTP status to answer with"""
+    
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class PricedItems:
+    """Line items with their document-level sums and the products they resolved to"""
+    
+    def __init__(self, items, subtotal, tax_amount, products):
+        self.items = items
+        self.subtotal = subtotal
+        self.tax_amount = tax_amount
+        self.products = products
+    
+    @property
+    def first_product(self):
+        """Product of the first line, used to pick the analytical account"""
+        return self.products[0] if self.products else None
+    
+    def total(self, discount=0):
+        return self.subtotal + self.tax_amount - discount
+
+
+class PricingService:
+    """Shared line-item pricing for invoices, bills and orders.
+    
+    All products referenced by a document are resolved with one $in query (through the
+    request's ReferenceLoader), then every line and the document sums are computed in a
+    single pass. Quantity, unit price, tax rate and unit default from the product.
+    """
+    
+    SALE_PRICE = 'sale_price'
+    PURCHASE_PRICE = 'purchase_price'
+    DEFAULT_TAX_RATE = 18
+    
+    @staticmethod
+    def _product_key(item_data):
+        product_id = item_data.get('product_id')
+        if isinstance(product_id, ObjectId):
+            return product_id
+        if product_id and ObjectId.is_valid(str(product_id)):
+            return ObjectId(str(product_id))
+        sku = item_data.get('product_sku')
+        return str(sku).upper() if sku else None
+    
+    @staticmethod
+    def resolve_products(items_data):
+        """{ObjectId: product} for every product_id in items_data, in one query"""
+        return get_loader().load_many('products', [
+            item_data.get('product_id') for item_data in items_data if isinstance(item_data, dict)
+        ])
+    
+    @staticmethod
+    def price_items(items_data, price_field, products=None):
+        """Price items_data against products (resolved here when not given).
+        
+        products maps ObjectId (or upper-cased SKU, for product_sku lines) to the product
+        document. Raises PricingError for unknown products and non-numeric values.
+        """
+        if products is None:
+            products = PricingService.resolve_products(items_data)
+        
+        items = []
+        line_products = []
+        subtotal = 0
+        tax_amount = 0
+        
+        for index, item_data in enumerate(items_data, 1):
+            if not isinstance(item_data, dict):
+                raise PricingError(f'Item {index} must be an object')
+            
+            product = products.get(PricingService._product_key(item_data))
+            if not product:
+                reference = item_data.get('product_id') or item_data.get('product_sku')
+                raise PricingError(f"Product {reference} not found", 404)
+            
+            try:
+                quantity = float(item_data.get('quantity', 1))
+                unit_price = float(item_data.get('unit_price', product.get(price_field, 0)))
+                tax_rate = float(item_data.get('tax_rate', product.get('tax_rate', PricingService.DEFAULT_TAX_RATE)))
+            except (TypeError, ValueError):
+                raise PricingError(f'Item {index}: quantity, unit_price and tax_rate must be numbers')
+            
+            line_subtotal = quantity * unit_price
+            line_tax = line_subtotal * (tax_rate / 100)
+            
+            items.append({
+                'product_id': str(product['_id']),
+                'product_name': product.get('name'),
+                'product_sku': product.get('sku'),
+                'quantity': quantity,
+                'unit': item_data.get('unit', product.get('unit', 'pcs')),
+                'unit_price': unit_price,
+                'tax_rate': tax_rate,
+                'subtotal': line_subtotal,
+                'tax_amount': line_tax,
+                'total': line_subtotal + line_tax
+            })
+            line_products.append(product)
+            subtotal += line_subtotal
+            tax_amount += line_tax
+        
+        return PricedItems(items, subtotal, tax_amount, line_products)
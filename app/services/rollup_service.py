@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from pymongo import DeleteOne, UpdateOne
+from app.database import get_db
+
+
+class RollupService:
+    """Daily per-account ledger totals maintained alongside posted invoices and bills.
+    
+    Each row in daily_rollups is keyed by (analytical_account_id, date, kind) and holds
+    the summed total_amount and document count of the posted documents for that day.
+    Posting or cancelling recomputes the affected day from its source documents; if
+    that step is lost (e.g. the process dies after the status write), the row stays
+    off only until the next change on that day, or until rebuild() is run
+    (python scripts/rebuild_rollups.py).
+    """
+    
+    KIND_INCOME = 'income'
+    KIND_EXPENSE = 'expense'
+    
+    SOURCES = {
+        KIND_INCOME: ('customer_invoices', 'invoice_date'),
+        KIND_EXPENSE: ('vendor_bills', 'bill_date')
+    }
+    
+    @staticmethod
+    def day_bounds(start_date, end_date):
+        """[start, end) over rollup dates covering every day from start_date through end_date"""
+        start = datetime(start_date.year, start_date.month, start_date.day)
+        end = datetime(end_date.year, end_date.month, end_date.day) + timedelta(days=1)
+        return start, end
+    
+    @staticmethod
+    def _key(kind, document):
+        """(analytical_account_id, day) of the rollup row a document counts towards, or None"""
+        _, date_field = RollupService.SOURCES[kind]
+        document_date = document.get(date_field)
+        if not document_date:
+            return None
+        return document.get('analytical_account_id'), datetime(document_date.year, document_date.month, document_date.day)
+    
+    @staticmethod
+    def refresh_days(kind, keys):
+        """Recompute the rollup rows for (analytical_account_id, day) keys from their posted documents.
+        
+        The rows are set from the source documents rather than adjusted, so calling this again
+        after an interrupted post or cancel repairs the day instead of counting twice.
+        """
+        keys = set(keys)
+        if not keys:
+            return
+        db = get_db()
+        
+        collection, date_field = RollupService.SOURCES[kind]
+        totals = {}
+        for row in db[collection].aggregate(RollupService._day_pipeline(kind, date_field, [
+            {'analytical_account_id': account_id, date_field: {'$gte': day, '$lt': day + timedelta(days=1)}}
+            for account_id, day in keys
+        ])):
+            totals[(row['_id'].get('analytical_account_id'), row['_id']['date'])] = row
+        
+        operations = []
+        for account_id, day in keys:
+            row_filter = {'analytical_account_id': account_id, 'date': day, 'kind': kind}
+            row = totals.get((account_id, day))
+            if row:
+                operations.append(UpdateOne(row_filter, {'$set': {
+                    'total_amount': row['total_amount'],
+                    'document_count': row['document_count']
+                }}, upsert=True))
+            else:
+                operations.append(DeleteOne(row_filter))
+        db.daily_rollups.bulk_write(operations, ordered=False)
+    
+    @staticmethod
+    def refresh_documents(kind, documents):
+        """Bring the rollup rows of the days these invoices or bills fall on up to date"""
+        RollupService.refresh_days(kind, filter(None, (RollupService._key(kind, document) for document in documents)))
+    
+    @staticmethod
+    def _day_pipeline(kind, date_field, days=None):
+        match = {'status': 'posted', date_field: {'$ne': None}}
+        if days:
+            match['$or'] = days
+        return [
+            {'$match': match},
+            {'$group': {
+                '_id': {
+                    'analytical_account_id': '$analytical_account_id',
+                    'date': {'$dateFromParts': {
+                        'year': {'$year': f'${date_field}'},
+                        'month': {'$month': f'${date_field}'},
+                        'day': {'$dayOfMonth': f'${date_field}'}
+                    }},
+                    'kind': kind
+                },
+                'total_amount': {'$sum': '$total_amount'},
+                'document_count': {'$sum': 1}
+            }}
+        ]
+    
+    @staticmethod
+    def rebuild():
+        """Recompute daily_rollups from every posted invoice and bill"""
+        db = get_db()
+        
+        income_collection, income_date = RollupService.SOURCES[RollupService.KIND_INCOME]
+        expense_collection, expense_date = RollupService.SOURCES[RollupService.KIND_EXPENSE]
+        
+        pipeline = RollupService._day_pipeline(RollupService.KIND_INCOME, income_date) + [
+            {'$unionWith': {
+                'coll': expense_collection,
+                'pipeline': RollupService._day_pipeline(RollupService.KIND_EXPENSE, expense_date)
+            }},
+            {'$project': {
+                '_id': 0,
+                'analytical_account_id': '$_id.analytical_account_id',
+                'date': '$_id.date',
+                'kind': '$_id.kind',
+                'total_amount': 1,
+                'document_count': 1
+            }},
+            {'$out': 'daily_rollups'}
+        ]
+        
+        list(db[income_collection].aggregate(pipeline))
+        
+        return db.daily_rollups.count_documents({})
+    
+    @staticmethod
+    def totals_by_account(kind, start_date, end_date):
+        """Sum rollups per analytical account for an inclusive date range"""
+        db = get_db()
+        start, end = RollupService.day_bounds(start_date, end_date)
+        
+        pipeline = [
+            {'$match': {
+                'kind': kind,
+                'date': {'$gte': start, '$lt': end},
+                'analytical_account_id': {'$ne': None}
+            }},
+            {'$group': {'_id': '$analytical_account_id', 'total': {'$sum': '$total_amount'}}}
+        ]
+        
+        return {row['_id']: row['total'] for row in db.daily_rollups.aggregate(pipeline)}
@@ -0,0 +1,170 @@
+import re
+import unicodedata
+from itertools import groupby
+from pymongo import UpdateOne
+from app.database import get_db
+
+
+class SearchService:
+    """Prefix search over list screens backed by a multikey search_prefixes index.
+    
+    Every searchable document carries the normalized edge n-grams of the words in its
+    search fields (plus the value with separators removed, so "INV/2024/0001" is found
+    by "inv2024"). A query matches when each of its words is one of those prefixes,
+    which is an index lookup instead of an unanchored $regex scan.
+    
+    Text is NFKD-normalized and casefolded, accents are dropped from Latin letters
+    ("Café" is found by "cafe") and words of other scripts keep their combining vowel
+    signs. Queries go through the same normalization. Ranking compares the query with
+    search_values, the normalized value of each search field with separators removed.
+    """
+    
+    MIN_PREFIX_LENGTH = 2
+    MAX_PREFIX_LENGTH = 15
+    
+    SEARCH_FIELDS = {
+        'products': ['name', 'sku', 'description'],
+        'contacts': ['name', 'email', 'company_name', 'phone'],
+        'payments': ['payment_number', 'reference_number'],
+        'customer_invoices': ['invoice_number'],
+        'vendor_bills': ['bill_number', 'vendor_bill_number'],
+        'sales_orders': ['so_number'],
+        'purchase_orders': ['po_number']
+    }
+    
+    # Ranking scores every match, so it waits for a reasonably selective term
+    MIN_RANK_TERM_LENGTH = 3
+    
+    @staticmethod
+    def normalize(value):
+        text = unicodedata.normalize('NFKD', str(value)).casefold()
+        chars = []
+        latin_base = False
+        for ch in text:
+            if unicodedata.combining(ch):
+                if not latin_base:
+                    chars.append(ch)
+                continue
+            latin_base = ch.isascii()
+            chars.append(ch)
+        return ''.join(chars)
+    
+    @staticmethod
+    def _is_word_char(ch):
+        # \w alone splits Devanagari and similar scripts at every vowel sign (category M).
+        return ch.isalnum() or unicodedata.category(ch)[0] == 'M'
+    
+    @staticmethod
+    def _words(value):
+        return [
+            ''.join(chars)
+            for is_word, chars in groupby(SearchService.normalize(value), SearchService._is_word_char)
+            if is_word
+        ]
+    
+    @staticmethod
+    def prefixes(values):
+        tokens = set()
+        for value in values:
+            if not value:
+                continue
+            words = SearchService._words(value)
+            tokens.update(words)
+            tokens.add(''.join(words))
+        
+        prefixes = set()
+        for token in tokens:
+            for length in range(SearchService.MIN_PREFIX_LENGTH, min(len(token), SearchService.MAX_PREFIX_LENGTH) + 1):
+                prefixes.add(token[:length])
+        return sorted(prefixes)
+    
+    @staticmethod
+    def _compact(value):
+        return ''.join(SearchService._words(value))
+    
+    @staticmethod
+    def search_keys(collection, document):
+        """Fields to $set (or insert) so the document stays searchable"""
+        values = [document.get(field) for field in SearchService.SEARCH_FIELDS[collection]]
+        return {
+            'search_prefixes': SearchService.prefixes(values),
+            'search_values': [SearchService._compact(value) for value in values if value]
+        }
+    
+    @staticmethod
+    def with_search_keys(collection, document):
+        document.update(SearchService.search_keys(collection, document))
+        return document
+    
+    @staticmethod
+    def reindex(collection, document_id):
+        """Refresh search_prefixes after an update that did not load the whole document"""
+        db = get_db()
+        
+        fields = SearchService.SEARCH_FIELDS[collection]
+        document = db[collection].find_one({'_id': document_id}, {field: 1 for field in fields})
+        if document:
+            db[collection].update_one({'_id': document_id}, {'$set': SearchService.search_keys(collection, document)})
+    
+    @staticmethod
+    def build_filter(collection, search):
+        """Query fragment for a search box value.
+        
+        Words shorter than MIN_PREFIX_LENGTH are not indexed, so a query made only of
+        such words falls back to an escaped, case-insensitive regex over the fields.
+        """
+        terms = [word[:SearchService.MAX_PREFIX_LENGTH] for word in SearchService._words(search)
+                 if len(word) >= SearchService.MIN_PREFIX_LENGTH]
+        
+        if terms:
+            return {'search_prefixes': {'$all': terms}}
+        
+        pattern = re.escape(search.strip())
+        return {'$or': [
+            {field: {'$regex': pattern, '$options': 'i'}}
+            for field in SearchService.SEARCH_FIELDS[collection]
+        ]}
+    
+    @staticmethod
+    def rank_stages(collection, search):
+        """Aggregation stages adding _search_rank: exact field matches first, then field prefixes.
+        
+        Returns no stages (plain sorted results) when every word is shorter than
+        MIN_RANK_TERM_LENGTH. Every match is scored; the $sort on the rank is followed
+        by $skip/$limit, which the server runs as a top-k sort, so memory stays bounded
+        by the page depth rather than the number of matches.
+        """
+        words = SearchService._words(search)
+        if max((len(word) for word in words), default=0) < SearchService.MIN_RANK_TERM_LENGTH:
+            return []
+        needle = ''.join(words)
+        
+        score = {'$cond': [{'$eq': ['$$field_value', needle]}, 4,
+            {'$cond': [{'$eq': [{'$indexOfCP': ['$$field_value', needle]}, 0]}, 2, 0]}]}
+        return [{'$addFields': {'_search_rank': {'$sum': {'$map': {
+            'input': {'$ifNull': ['$search_values', []]},
+            'as': 'field_value',
+            'in': score
+        }}}}}]
+    
+    @staticmethod
+    def rebuild(batch_size=500):
+        """Recompute search_prefixes for every searchable document"""
+        db = get_db()
+        
+        updated = 0
+        for collection, fields in SearchService.SEARCH_FIELDS.items():
+            projection = {field: 1 for field in fields}
+            operations = []
+            for document in db[collection].find({}, projection):
+                operations.append(UpdateOne(
+                    {'_id': document['_id']},
+                    {'$set': SearchService.search_keys(collection, document)}
+                ))
+                if len(operations) >= batch_size:
+                    updated += db[collection].bulk_write(operations, ordered=False).modified_count
+                    operations = []
+            if operations:
+                updated += db[collection].bulk_write(operations, ordered=False).modified_count
+        
+        return updated
@@ -1,3 +1,5 @@
-from app.utils.helpers import generate_number, parse_date, admin_required, get_current_user_id
+from app.utils.helpers import generate_number, generate_numbers, parse_date, admin_required, get_current_user_id
+from app.utils.loader import ReferenceLoader, ReferenceCache, reference_cache, get_loader
+from app.utils.pagination import paginate, page_count, PaginationError, InvalidCursorError
 
-__all__ = ['generate_number', 'parse_date', 'admin_required', 'get_current_user_id']
+__all__ = ['generate_number', 'generate_numbers', 'parse_date', 'admin_required', 'get_current_user_id', 'ReferenceLoader', 'ReferenceCache', 'reference_cache', 'get_loader', 'paginate', 'page_count', 'PaginationError', 'InvalidCursorError']
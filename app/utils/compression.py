@@ -0,0 +1,118 @@
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from functools import partial
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/pdf',
+    'text/html',
+    'text/plain',
+    'text/csv'
+}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _negotiate():
+    accept = request.accept_encodings
+    if brotli is not None and accept.quality('br') > 0:
+        return 'br'
+    if accept.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'])
+
+
+def _compressed_body(response, encoding, config):
+    """Compress a buffered body, reusing the stored result for responses with an ETag"""
+    etag, _ = response.get_etag()
+    if not etag or not config['COMPRESS_CACHE_ENTRIES']:
+        return _compress(response.get_data(), encoding, config)
+    
+    key = (etag, encoding)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    
+    body = _compress(response.get_data(), encoding, config)
+    with _cache_lock:
+        _cache[key] = body
+        while len(_cache) > config['COMPRESS_CACHE_ENTRIES']:
+            _cache.popitem(last=False)
+    return body
+
+
+def _compress_stream(chunks, encoding, config):
+    """Compress a generator body chunk by chunk, flushing so each chunk reaches the client"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['COMPRESS_BROTLI_QUALITY'])
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(config['COMPRESS_GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress, finish = compressor.compress, compressor.flush
+        flush = partial(compressor.flush, zlib.Z_SYNC_FLUSH)
+    
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def compress_response(response):
+    """after_request hook: gzip/brotli encode responses the client accepts"""
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'no-transform' in request.headers.get('Cache-Control', '')):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = _negotiate()
+    if not encoding:
+        return response
+    
+    config = current_app.config
+    streamed = response.is_streamed or response.direct_passthrough
+    
+    if streamed:
+        response.response = _compress_stream(response.response, encoding, config)
+        response.direct_passthrough = False
+        response.headers.pop('Content-Length', None)
+    else:
+        if len(response.get_data()) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(_compressed_body(response, encoding, config))
+    
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The encoded body is a different representation of the same resource.
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
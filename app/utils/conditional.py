@@ -0,0 +1,128 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from pymongo import UpdateOne
+
+from app.database import get_db
+
+VERSIONS_COLLECTION = 'collection_versions'
+
+# Collections each blueprint may modify on a successful write request, including
+# the side effects of the services it calls (rollups, open items).
+WRITE_SCOPES = {
+    'auth': ['users'],
+    'users': ['users', 'contacts'],
+    'contacts': ['contacts', 'users', 'open_items'],
+    'products': ['products'],
+    'analytical_accounts': ['analytical_accounts'],
+    'budgets': ['budgets', 'budget_revisions'],
+    'auto_analytical_models': ['auto_analytical_models'],
+    'purchase_orders': ['purchase_orders'],
+    'vendor_bills': ['vendor_bills', 'daily_rollups', 'open_items'],
+    'sales_orders': ['sales_orders'],
+    'customer_invoices': ['customer_invoices', 'daily_rollups', 'open_items'],
+    'payments': ['payments', 'customer_invoices', 'vendor_bills', 'open_items'],
+    'portal': ['users', 'contacts', 'customer_invoices', 'payments', 'sales_orders', 'open_items']
+}
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def collection_versions(db, collections):
+    """Current version counter of each collection (0 if it was never written)"""
+    versions = {name: 0 for name in collections}
+    for doc in db[VERSIONS_COLLECTION].find({'_id': {'$in': list(collections)}}):
+        versions[doc['_id']] = doc.get('version', 0)
+    return versions
+
+
+def bump_versions(*collections):
+    """Invalidate every ETag derived from these collections"""
+    if not collections:
+        return
+    get_db()[VERSIONS_COLLECTION].bulk_write([
+        UpdateOne({'_id': name}, {'$inc': {'version': 1}}, upsert=True)
+        for name in collections
+    ], ordered=False)
+
+
+def bump_written_collections(response):
+    """after_request hook: bump the versions a successful write request may have changed"""
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        bump_versions(*WRITE_SCOPES.get(request.blueprint, []))
+    return response
+
+
+def init_conditional(app):
+    app.after_request(bump_written_collections)
+
+
+def _etag(versions, last_modified):
+    parts = [request.full_path, str(get_jwt_identity())]
+    parts.extend(f'{name}:{version}' for name, version in sorted(versions.items()))
+    if last_modified:
+        parts.append(last_modified.isoformat())
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _not_modified(etag, last_modified, versioned_by_entity):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    # updated_at alone says nothing about embedded related documents, so
+    # If-Modified-Since is only trusted for views of a single collection.
+    if versioned_by_entity and last_modified and request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional(*collections, entity_arg=None):
+    """ETag/Last-Modified support with 304 responses for GET views.
+    
+    collections lists every collection the view reads. With entity_arg, the first
+    collection holds the entity addressed by that URL argument and its updated_at
+    also drives Last-Modified. Must be applied below @jwt_required().
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            db = get_db()
+            last_modified = None
+            
+            if entity_arg:
+                try:
+                    entity_id = ObjectId(kwargs[entity_arg])
+                except (InvalidId, TypeError):
+                    return fn(*args, **kwargs)
+                entity = db[collections[0]].find_one({'_id': entity_id}, {'updated_at': 1, 'created_at': 1})
+                if not entity:
+                    return fn(*args, **kwargs)
+                last_modified = entity.get('updated_at') or entity.get('created_at')
+                if last_modified:
+                    last_modified = last_modified.replace(tzinfo=timezone.utc)
+            
+            versions = collection_versions(db, collections)
+            # Fresh versions are in hand; let the reference cache drop anything they outdate.
+            from app.utils.loader import reference_cache
+            reference_cache.observe_versions(versions)
+            
+            etag = _etag(versions, last_modified)
+            
+            if _not_modified(etag, last_modified, entity_arg and len(collections) == 1):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
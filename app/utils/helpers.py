@@ -1,26 +1,22 @@
+import threading
+import time
 from datetime import datetime
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from bson import ObjectId
+from flask import current_app, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
 from app.database import get_db
+from app.utils.sequences import format_number, sequence_allocator
 
 def generate_number(prefix, collection_name):
-    db = get_db()
-    
-    year = datetime.utcnow().strftime('%Y')
-    month = datetime.utcnow().strftime('%m')
-    
-    counter_id = f"{collection_name}_{year}_{month}"
-    
-    counter = db.counters.find_one_and_update(
-        {'_id': counter_id},
-        {'$inc': {'seq': 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    seq = counter['seq']
-    return f"{prefix}-{year}{month}-{seq:04d}"
+    now = datetime.utcnow()
+    seq = sequence_allocator.next(prefix, collection_name, now)
+    return format_number(prefix, seq, now)
+
+def generate_numbers(prefix, collection_name, count):
+    """count consecutive document numbers reserved with a single counter update"""
+    now = datetime.utcnow()
+    return [format_number(prefix, seq, now) for seq in sequence_allocator.reserve(collection_name, count, now)]
 
 def parse_date(date_string):
     if not date_string:
@@ -50,17 +46,70 @@ def get_current_user_id():
     except:
         return None
 
+class UserStampCache:
+    """Per-worker copy of each user's token_version and is_active flag.
+    
+    Consulted on every authenticated request to reject tokens of deactivated,
+    deleted or re-roled users. Entries live for USER_STAMP_CACHE_SECONDS, which
+    bounds how long another worker keeps accepting a revoked token.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+    
+    def get(self, user_id):
+        """(token_version, is_active) for the user, or None if it no longer exists"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+        
+        stamp = None
+        if ObjectId.is_valid(user_id):
+            user = get_db().users.find_one({'_id': ObjectId(user_id)}, {'token_version': 1, 'is_active': 1})
+            if user:
+                stamp = (user.get('token_version', 0), user.get('is_active', True))
+        
+        with self._lock:
+            self._entries[user_id] = (now + current_app.config['USER_STAMP_CACHE_SECONDS'], stamp)
+        return stamp
+    
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+
+user_stamps = UserStampCache()
+
+def is_token_revoked(jwt_header, jwt_payload):
+    """JWTManager blocklist callback: deleted or inactive users, and access tokens with stale claims"""
+    stamp = user_stamps.get(jwt_payload['sub'])
+    if stamp is None:
+        return True
+    
+    token_version, is_active = stamp
+    if not is_active:
+        return True
+    
+    # Refresh tokens stay valid across role changes; /auth/refresh reissues the claims.
+    if jwt_payload.get('type') == 'access' and 'ver' in jwt_payload:
+        return jwt_payload['ver'] != token_version
+    return False
+
 def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
+        role = get_jwt().get('role')
         
-        db = get_db()
-        from bson import ObjectId
-        user = db.users.find_one({'_id': ObjectId(user_id)})
+        if role is None:
+            # Token issued before role claims were added
+            user = get_db().users.find_one({'_id': ObjectId(get_jwt_identity())}, {'role': 1})
+            role = user.get('role') if user else None
         
-        if not user or user.get('role') != 'admin':
+        if role != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         
         return fn(*args, **kwargs)
@@ -0,0 +1,81 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes ObjectId, datetime and Decimal128 natively.
+    
+    Uses orjson when it is installed and falls back to the standard library otherwise.
+    Datetimes are written as ISO 8601, matching what the models' to_dict() produce.
+    """
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        if isinstance(o, Decimal128):
+            return str(o.to_decimal())
+        if isinstance(o, Decimal):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+    
+    def dumps(self, obj, **kwargs):
+        sort_keys = kwargs.get('sort_keys', self.sort_keys)
+        
+        if orjson is not None and not kwargs.get('indent'):
+            option = orjson.OPT_NON_STR_KEYS
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', sort_keys)
+        return json.dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+
+def stream_json(payload, array_key, items, chunk_size=100):
+    """Response that encodes a large array incrementally instead of building one string.
+    
+    payload holds the envelope fields; items (any iterable, e.g. a generator of
+    serialized rows) is written under array_key in chunks of chunk_size rows.
+    """
+    provider = current_app.json
+    envelope = provider.dumps({key: value for key, value in payload.items() if key != array_key})
+    
+    def generate():
+        prefix = envelope[:-1] + (',' if len(envelope) > 2 else '')
+        yield f'{prefix}{provider.dumps(array_key)}:['
+        
+        chunk = []
+        first = True
+        for item in items:
+            chunk.append(provider.dumps(item))
+            if len(chunk) >= chunk_size:
+                yield ('' if first else ',') + ','.join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield ('' if first else ',') + ','.join(chunk)
+        
+        yield ']}'
+    
+    return current_app.response_class(generate(), mimetype=provider.mimetype)
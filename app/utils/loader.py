@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+from flask import current_app, g, has_request_context
+
+from app.database import get_db
+from app.utils.conditional import collection_versions
+
+
+class ReferenceLoader:
+    """Request-scoped batch resolver for documents referenced by _id.
+    
+    Ids are collected per collection and fetched with a single $in query;
+    results are memoized for the rest of the request.
+    """
+    
+    def __init__(self):
+        self._cache = {}
+        self._fields = {}
+    
+    @staticmethod
+    def _to_object_id(value):
+        if isinstance(value, ObjectId):
+            return value
+        if value and ObjectId.is_valid(str(value)):
+            return ObjectId(str(value))
+        return None
+    
+    def load_many(self, collection, ids, fields=None):
+        """Return {ObjectId: document} for the given ids, fetching misses in one query"""
+        cache = self._cache.setdefault(collection, {})
+        wanted = {oid for oid in (self._to_object_id(i) for i in ids) if oid}
+        
+        if collection in ReferenceCache.COLLECTIONS:
+            # Served whole from the process-wide cache; fields is ignored.
+            missing = wanted - set(cache)
+            if missing:
+                found = reference_cache.get_many(collection, list(missing))
+                for oid in missing:
+                    cache[oid] = found.get(oid)
+            self._fields[collection] = None
+            return {oid: cache[oid] for oid in wanted if cache.get(oid) is not None}
+        
+        if collection not in self._fields:
+            needed_fields = set(fields) if fields is not None else None
+            missing = wanted
+        else:
+            cached_fields = self._fields[collection]
+            if cached_fields is None or (fields is not None and set(fields) <= cached_fields):
+                needed_fields = cached_fields
+                missing = wanted - set(cache)
+            else:
+                # Cached documents were fetched with a narrower projection; widen and refetch.
+                needed_fields = cached_fields | set(fields) if fields is not None else None
+                missing = wanted | {oid for oid, document in cache.items() if document is not None}
+        
+        if missing:
+            db = get_db()
+            projection = {field: 1 for field in needed_fields} if needed_fields is not None else None
+            for oid in missing:
+                cache[oid] = None
+            for document in db[collection].find({'_id': {'$in': list(missing)}}, projection):
+                cache[document['_id']] = document
+            self._fields[collection] = needed_fields
+        
+        return {oid: cache[oid] for oid in wanted if cache.get(oid) is not None}
+    
+    def forget(self, collection, document_id=None):
+        if document_id is None:
+            self._cache.pop(collection, None)
+            self._fields.pop(collection, None)
+        else:
+            self._cache.get(collection, {}).pop(document_id, None)
+    
+    def load(self, collection, document_id, fields=None):
+        oid = self._to_object_id(document_id)
+        if not oid:
+            return None
+        return self.load_many(collection, [oid], fields).get(oid)
+
+
+class ReferenceCache:
+    """Process-wide LRU+TTL cache of reference documents (contacts, products, analytical accounts).
+    
+    Entries expire after REFERENCE_CACHE_TTL_SECONDS. Routes that modify a cached
+    document call invalidate() to drop it locally; other workers notice the write
+    through the collection version counters bumped after every write request and
+    flush that collection, checking at most every REFERENCE_CACHE_VERSION_CHECK_SECONDS.
+    Callers get shallow copies and may modify top-level fields freely.
+    """
+    
+    COLLECTIONS = ('contacts', 'products', 'analytical_accounts')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.flushes = 0
+    
+    def _flush(self, collection):
+        for key in [key for key in self._entries if key[0] == collection]:
+            del self._entries[key]
+        self.flushes += 1
+    
+    def observe_versions(self, versions):
+        """Flush collections whose version moved since we last looked"""
+        with self._lock:
+            for collection, version in versions.items():
+                if collection not in self.COLLECTIONS:
+                    continue
+                seen = self._versions.get(collection)
+                if seen is not None and seen != version:
+                    self._flush(collection)
+                self._versions[collection] = version
+    
+    def _sync_versions(self, config):
+        now = time.monotonic()
+        if now - self._checked_at < config['REFERENCE_CACHE_VERSION_CHECK_SECONDS']:
+            return
+        self._checked_at = now
+        self.observe_versions(collection_versions(get_db(), self.COLLECTIONS))
+    
+    def get_many(self, collection, ids):
+        """Return {ObjectId: document} for ids, reading misses from Mongo in one query"""
+        config = current_app.config
+        self._sync_versions(config)
+        
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for oid in ids:
+                entry = self._entries.get((collection, oid))
+                if entry and entry[0] > now:
+                    self._entries.move_to_end((collection, oid))
+                    found[oid] = dict(entry[1])
+                else:
+                    missing.append(oid)
+            self.hits += len(found)
+            self.misses += len(missing)
+        
+        if missing:
+            documents = list(get_db()[collection].find({'_id': {'$in': missing}}))
+            expires = now + config['REFERENCE_CACHE_TTL_SECONDS']
+            with self._lock:
+                for document in documents:
+                    self._entries[(collection, document['_id'])] = (expires, document)
+                    found[document['_id']] = dict(document)
+                while len(self._entries) > config['REFERENCE_CACHE_ENTRIES']:
+                    self._entries.popitem(last=False)
+        
+        return found
+    
+    def get(self, collection, document_id):
+        oid = ReferenceLoader._to_object_id(document_id)
+        if not oid:
+            return None
+        return self.get_many(collection, [oid]).get(oid)
+    
+    def invalidate(self, collection, document_id=None):
+        """Drop one document (or the whole collection) from this worker's cache"""
+        oid = ReferenceLoader._to_object_id(document_id) if document_id is not None else None
+        with self._lock:
+            if oid:
+                self._entries.pop((collection, oid), None)
+            else:
+                self._flush(collection)
+            self.invalidations += 1
+        
+        if has_request_context() and 'reference_loader' in g:
+            g.reference_loader.forget(collection, oid)
+    
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0,
+                'invalidations': self.invalidations,
+                'flushes': self.flushes
+            }
+
+
+reference_cache = ReferenceCache()
+
+
+def get_loader():
+    """Get the ReferenceLoader bound to the current request"""
+    if 'reference_loader' not in g:
+        g.reference_loader = ReferenceLoader()
+    return g.reference_loader
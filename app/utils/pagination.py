@@ -0,0 +1,184 @@
+import base64
+import time
+from datetime import datetime
+from bson import ObjectId, json_util
+from bson.errors import BSONError
+from flask import current_app
+
+TOTAL_EXACT = 'exact'
+TOTAL_APPROX = 'approx'
+TOTAL_FACET = 'facet'
+TOTAL_NONE = 'none'
+
+TOTAL_MODES = {
+    'true': TOTAL_EXACT,
+    'exact': TOTAL_EXACT,
+    'approx': TOTAL_APPROX,
+    'estimate': TOTAL_APPROX,
+    'facet': TOTAL_FACET,
+    'false': TOTAL_NONE,
+    'none': TOTAL_NONE
+}
+
+_count_cache = {}
+
+# Only plain values may come back from a client-held cursor; a document such as
+# {"$ne": null} would otherwise be spliced into the keyset query as an operator.
+_CURSOR_SORT_TYPES = (str, int, float, bool, datetime, ObjectId, type(None))
+
+
+class PaginationError(ValueError):
+    pass
+
+
+class InvalidCursorError(PaginationError):
+    pass
+
+
+def encode_cursor(sort_value, document_id):
+    payload = json_util.dumps([sort_value, document_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, TypeError, BSONError):
+        raise InvalidCursorError('Invalid cursor')
+    if not isinstance(payload, list) or len(payload) != 2:
+        raise InvalidCursorError('Invalid cursor')
+    sort_value, document_id = payload
+    if not isinstance(sort_value, _CURSOR_SORT_TYPES) or not isinstance(document_id, ObjectId):
+        raise InvalidCursorError('Invalid cursor')
+    return sort_value, document_id
+
+
+def parse_total_mode(value):
+    mode = TOTAL_MODES.get(str(value or TOTAL_EXACT).lower())
+    if not mode:
+        raise PaginationError('include_total must be one of true, false, approx or facet')
+    return mode
+
+
+def page_count(total, per_page):
+    if total is None or not per_page:
+        return None
+    return (total + per_page - 1) // per_page
+
+
+def approximate_count(collection, query):
+    """Count for list headers that tolerates being a few seconds stale.
+    
+    Unfiltered lists use the collection metadata count; filtered lists cache the exact
+    count per normalized query for LIST_COUNT_CACHE_SECONDS.
+    """
+    if not query:
+        return collection.estimated_document_count()
+    
+    key = (collection.full_name, json_util.dumps(query, sort_keys=True))
+    now = time.monotonic()
+    cached = _count_cache.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+    
+    total = collection.count_documents(query)
+    _count_cache[key] = (total, now + current_app.config.get('LIST_COUNT_CACHE_SECONDS', 30))
+    
+    if len(_count_cache) > 1000:
+        for stale_key in [k for k, (_, expires) in _count_cache.items() if expires <= now]:
+            del _count_cache[stale_key]
+    
+    return total
+
+
+def _sort_spec(sort_field, direction):
+    if sort_field == '_id':
+        return [('_id', direction)]
+    return [(sort_field, direction), ('_id', direction)]
+
+
+def _keyset_filter(sort_field, direction, cursor):
+    sort_value, last_id = decode_cursor(cursor)
+    op = '$lt' if direction < 0 else '$gt'
+    if sort_field == '_id':
+        return {'_id': {op: last_id}}
+    return {'$or': [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, '_id': {op: last_id}}
+    ]}
+
+
+def _count(collection, query, mode):
+    if mode == TOTAL_EXACT:
+        return collection.count_documents(query)
+    if mode == TOTAL_APPROX:
+        return approximate_count(collection, query)
+    return None
+
+
+def paginate(collection, query, sort_field, direction, page, per_page, cursor=None, include_total=TOTAL_EXACT, rank=None):
+    """Fetch one page of a list either by page number or by an opaque keyset cursor.
+    
+    The cursor encodes the (sort_field, _id) of the last row returned, so following
+    pages are resolved with an index range scan instead of skipping over earlier rows.
+    
+    include_total selects how the total is produced: exact runs count_documents,
+    approx uses approximate_count, none skips counting (total is None) and facet
+    returns the page and exact total from one $facet aggregation. The facet sort
+    cannot use an index, so it suits narrow filtered lists rather than whole collections.
+    
+    rank is an optional list of aggregation stages adding a numeric _search_rank;
+    page-number pages are ordered by it first. Passing a cursor (an empty one starts
+    at the first page) selects cursor paging, which skips ranking and keeps the
+    keyset order so every page can be resumed from the last row.
+    
+    Returns (documents, total, next_cursor); next_cursor is None on the last page.
+    """
+    mode = parse_total_mode(include_total)
+    sort = _sort_spec(sort_field, direction)
+    
+    if cursor is not None:
+        rank = None
+    keyset = _keyset_filter(sort_field, direction, cursor) if cursor else None
+    
+    if mode == TOTAL_FACET or rank:
+        page_stages = [{'$match': keyset}] if keyset else []
+        if rank:
+            page_stages.extend(rank)
+            sort = [('_search_rank', -1)] + sort
+        page_stages.append({'$sort': dict(sort)})
+        if not keyset:
+            page_stages.append({'$skip': (page - 1) * per_page})
+        page_stages.append({'$limit': per_page})
+        if rank:
+            page_stages.append({'$project': {'_search_rank': 0}})
+        
+        if mode == TOTAL_FACET:
+            result = list(collection.aggregate([
+                {'$match': query},
+                {'$facet': {
+                    'documents': page_stages,
+                    'total': [{'$count': 'count'}]
+                }}
+            ]))
+            facets = result[0] if result else {'documents': [], 'total': []}
+            documents = facets['documents']
+            total = facets['total'][0]['count'] if facets['total'] else 0
+        else:
+            documents = list(collection.aggregate([{'$match': query}] + page_stages))
+            total = _count(collection, query, mode)
+    else:
+        if keyset:
+            cursor_query = {'$and': [query, keyset]} if query else keyset
+            documents = list(collection.find(cursor_query).sort(sort).limit(per_page))
+        else:
+            documents = list(collection.find(query).sort(sort).skip((page - 1) * per_page).limit(per_page))
+        total = _count(collection, query, mode)
+    
+    next_cursor = None
+    if not rank and len(documents) == per_page:
+        last = documents[-1]
+        next_cursor = encode_cursor(last.get(sort_field), last['_id'])
+    
+    return documents, total, next_cursor
@@ -0,0 +1,99 @@
+import os
+import threading
+from datetime import datetime
+
+from flask import current_app
+from pymongo import ReturnDocument
+
+from app.database import get_db
+
+
+class SequenceAllocator:
+    """Hands out document number sequences from the monthly counters collection.
+    
+    By default each process reserves SEQUENCE_BLOCK_SIZE numbers with one $inc and
+    serves them locally under a lock, so the shared counter document is written once
+    per block instead of once per document. Numbers left in a block when the process
+    exits are never used, and numbers from different workers interleave.
+    
+    Prefixes listed in SEQUENCE_GAPLESS_PREFIXES skip the local block and increment
+    the counter for every number. Explicit multi-number reservations (bulk imports)
+    are always a single contiguous $inc.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._pid = os.getpid()
+        self.blocks_reserved = 0
+    
+    def _reset_after_fork(self):
+        # A forked child must not hand out numbers from the parent's blocks.
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._pid = os.getpid()
+    
+    @staticmethod
+    def counter_id(collection_name, now=None):
+        now = now or datetime.utcnow()
+        return f"{collection_name}_{now.strftime('%Y')}_{now.strftime('%m')}"
+    
+    @staticmethod
+    def _reserve(counter_id, count):
+        """Atomically take count numbers; returns the first one"""
+        counter = get_db().counters.find_one_and_update(
+            {'_id': counter_id},
+            {'$inc': {'seq': count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter['seq'] - count + 1
+    
+    @staticmethod
+    def is_gapless(prefix):
+        prefixes = current_app.config['SEQUENCE_GAPLESS_PREFIXES']
+        return prefix in {p.strip() for p in prefixes.split(',') if p.strip()}
+    
+    def next(self, prefix, collection_name, now=None):
+        counter_id = self.counter_id(collection_name, now)
+        block_size = current_app.config['SEQUENCE_BLOCK_SIZE']
+        if block_size <= 1 or self.is_gapless(prefix):
+            return self._reserve(counter_id, 1)
+        
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+        
+        with self._lock:
+            block = self._blocks.get(counter_id)
+            if not block or block[0] > block[1]:
+                # Blocks from a previous month are dropped with their counter id.
+                self._blocks = {
+                    key: value for key, value in self._blocks.items()
+                    if not key.startswith(f'{collection_name}_') or key == counter_id
+                }
+                first = self._reserve(counter_id, block_size)
+                block = [first, first + block_size - 1]
+                self._blocks[counter_id] = block
+                self.blocks_reserved += 1
+            
+            seq = block[0]
+            block[0] += 1
+            return seq
+    
+    def reserve(self, collection_name, count, now=None):
+        """Contiguous range of count numbers for the month of now, as a range object"""
+        if count <= 0:
+            return range(0)
+        first = self._reserve(self.counter_id(collection_name, now), count)
+        return range(first, first + count)
+
+
+sequence_allocator = SequenceAllocator()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=sequence_allocator._reset_after_fork)
+
+
+def format_number(prefix, seq, now=None):
+    now = now or datetime.utcnow()
+    return f"{prefix}-{now.strftime('%Y')}{now.strftime('%m')}-{seq:04d}"
@@ -0,0 +1,40 @@
+"""
+Email worker: delivers messages queued in the email_outbox collection.
+Run this separately: python email_worker.py
+"""
+import signal
+import threading
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import create_app
+from app.services.email_delivery import EmailDelivery, SMTPConnectionPool
+
+app = create_app()
+
+if __name__ == '__main__':
+    with app.app_context():
+        config = app.config
+        if not config.get('EMAIL_ADDRESS'):
+            print("Email credentials not configured")
+            raise SystemExit(1)
+        
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        signal.signal(signal.SIGINT, lambda *args: stop.set())
+        
+        pool = SMTPConnectionPool.from_config(config)
+        delivery = EmailDelivery(pool, config['EMAIL_ADDRESS'])
+        
+        print("=" * 50)
+        print("Shiv Furniture ERP - Email Worker")
+        print("=" * 50)
+        print(f"Started at: {datetime.now()}")
+        print(f"  - SMTP: {pool.host}:{pool.port}, {pool.size} pooled connections")
+        print(f"  - Batch size: {config['EMAIL_BATCH_SIZE']}, max attempts: {config['EMAIL_MAX_ATTEMPTS']}")
+        print("\nPress Ctrl+C to stop")
+        print("=" * 50)
+        
+        delivery.run(stop)
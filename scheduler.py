@@ -88,6 +88,15 @@ def check_low_stock():
         except Exception as e:
             print(f"[{datetime.now()}] Error checking low stock: {e}")
 
+def archive_notifications():
+    """Move notifications past their retention date to notifications_archive"""
+    with app.app_context():
+        try:
+            moved = NotificationService.archive_due()
+            print(f"[{datetime.now()}] Archived {moved} notifications")
+        except Exception as e:
+            print(f"[{datetime.now()}] Error archiving notifications: {e}")
+
 # Schedule jobs
 # Daily summary at 8:00 AM
 schedule.every().day.at("08:00").do(send_daily_summary)
@@ -98,6 +107,10 @@ schedule.every().hour.do(check_overdue_invoices)
 # Check low stock every 6 hours
 schedule.every(6).hours.do(check_low_stock)
 
+# Archive expired notifications every hour (the 'delete' policy uses a TTL index instead)
+if app.config['NOTIFICATION_RETENTION_POLICY'] == 'archive':
+    schedule.every().hour.do(archive_notifications)
+
 if __name__ == '__main__':
     print("=" * 50)
     print("Shiv Furniture ERP - Background Scheduler")
@@ -107,6 +120,8 @@ if __name__ == '__main__':
     print("  - Daily summary: 8:00 AM every day")
     print("  - Overdue invoices check: Every hour")
     print("  - Low stock check: Every 6 hours")
+    if app.config['NOTIFICATION_RETENTION_POLICY'] == 'archive':
+        print("  - Notification archiving: Every hour")
     print("\nPress Ctrl+C to stop")
     print("=" * 50)
     
@@ -0,0 +1,49 @@
+"""
+Script to report per-collection size and growth since an earlier run
+Each run stores a snapshot in collection_stats; schedule it (e.g. daily) to track growth
+Usage: python scripts/collection_growth.py [--since-days 7] [--no-save]
+"""
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+from app.services.collection_stats_service import CollectionStatsService
+
+def _mb(value):
+    return f"{value / (1024 * 1024):,.2f}" if value is not None else '-'
+
+def _signed(value, formatter=str):
+    if value is None:
+        return '-'
+    return ('+' if value >= 0 else '') + formatter(value)
+
+def collection_growth():
+    parser = argparse.ArgumentParser(description='Report per-collection size growth')
+    parser.add_argument('--since-days', type=float, default=0,
+                        help='compare with the latest snapshot at least this many days old')
+    parser.add_argument('--no-save', action='store_true', help='do not store this run as a snapshot')
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        report = CollectionStatsService.report(args.since_days, save=not args.no_save)
+    
+    if report['since']:
+        print(f"Growth since {report['since']:%Y-%m-%d %H:%M} ({report['days']} days)\n")
+    else:
+        print("No earlier snapshot; sizes only\n")
+    
+    print(f"{'collection':<24} {'docs':>10} {'docs +/-':>10} {'data MB':>10} {'data +/- MB':>12} "
+          f"{'index MB':>10} {'storage MB':>11} {'MB/day':>8}")
+    for row in report['collections']:
+        print(f"{row['name']:<24} {row['count']:>10} {_signed(row['count_delta']):>10} {_mb(row['size']):>10} "
+              f"{_signed(row['size_delta'], _mb):>12} {_mb(row['index_size']):>10} {_mb(row['storage_size']):>11} "
+              f"{_mb(row['size_per_day']):>8}")
+
+if __name__ == '__main__':
+    collection_growth()
@@ -0,0 +1,46 @@
+"""
+Script to bulk-import invoices, bills or orders from an NDJSON or CSV file
+Each NDJSON line (or each group of CSV lines sharing a ref) is one document, with the
+same fields as the create endpoint; per-row errors are printed and the row skipped
+Usage: python scripts/import_documents.py customer_invoices invoices.ndjson [--format csv] [--dry-run]
+"""
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+from app.services.import_service import ImportService
+
+def import_documents():
+    parser = argparse.ArgumentParser(description='Bulk-import documents from NDJSON or CSV')
+    parser.add_argument('kind', choices=list(ImportService.KINDS))
+    parser.add_argument('path', help="input file, or - for stdin")
+    parser.add_argument('--format', choices=['ndjson', 'csv'],
+                        help='input format (default: from the file extension, else ndjson)')
+    parser.add_argument('--dry-run', action='store_true', help='validate only, write nothing')
+    parser.add_argument('--chunk-size', type=int, default=ImportService.CHUNK_SIZE)
+    args = parser.parse_args()
+    
+    data_format = args.format or ('csv' if args.path.endswith('.csv') else 'ndjson')
+    source = sys.stdin if args.path == '-' else open(args.path, encoding='utf-8', newline='')
+    
+    app = create_app()
+    with app.app_context(), source:
+        rows = ImportService.parse_csv(source) if data_format == 'csv' else ImportService.parse_ndjson(source)
+        result = ImportService.run(args.kind, rows, dry_run=args.dry_run, chunk_size=args.chunk_size)
+    
+    for error in result['errors']:
+        ref = f" ({error['ref']})" if error.get('ref') else ''
+        print(f"line {error['line']}{ref}: {error['error']}")
+    
+    action = 'validated' if args.dry_run else 'imported'
+    count = result['valid'] if args.dry_run else result['imported']
+    print(f"\n{count} of {result['rows']} {args.kind} {action}, {result['failed']} failed")
+    return 1 if result['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(import_documents())
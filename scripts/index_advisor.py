@@ -0,0 +1,42 @@
+"""
+Script to check that the app's hot query shapes are served by indexes
+Runs explain() on each registered shape and exits non-zero if any is flagged
+Usage: python scripts/index_advisor.py [--ratio 10]
+"""
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+from app.services.index_advisor_service import IndexAdvisorService
+
+def index_advisor():
+    parser = argparse.ArgumentParser(description='Explain registered query shapes and flag poor plans')
+    parser.add_argument('--ratio', type=float, default=IndexAdvisorService.DEFAULT_RATIO_THRESHOLD,
+                        help='flag shapes examining more than this many docs per returned doc')
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        reports = IndexAdvisorService.analyze(args.ratio)
+    
+    flagged = 0
+    for report in reports:
+        status = 'WARN' if report['warnings'] else 'OK  '
+        indexes = ', '.join(report['indexes']) or '-'
+        print(f"{status} {report['collection']:<18} {report['name']:<30} "
+              f"examined={report['docs_examined']} returned={report['returned']} indexes={indexes}")
+        for warning in report['warnings']:
+            print(f"       {warning}")
+        if report['warnings']:
+            flagged += 1
+    
+    print(f"\n{flagged} of {len(reports)} query shapes flagged")
+    return 1 if flagged else 0
+
+if __name__ == '__main__':
+    sys.exit(index_advisor())
@@ -0,0 +1,22 @@
+"""
+Script to rebuild the open_items subledger from unpaid posted invoices and bills
+Run this after bulk data fixes or when first enabling subledger-based aging
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+from app.services.open_items_service import OpenItemsService
+
+def rebuild_open_items():
+    app = create_app()
+    with app.app_context():
+        count = OpenItemsService.rebuild()
+        print(f"Rebuilt open items: {count} rows")
+
+if __name__ == '__main__':
+    rebuild_open_items()
@@ -0,0 +1,22 @@
+"""
+Script to rebuild the daily_rollups collection from posted invoices and bills
+Run this after bulk data fixes or when first enabling rollup-based reports
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+from app.services.rollup_service import RollupService
+
+def rebuild_rollups():
+    app = create_app()
+    with app.app_context():
+        count = RollupService.rebuild()
+        print(f"Rebuilt daily rollups: {count} rows")
+
+if __name__ == '__main__':
+    rebuild_rollups()
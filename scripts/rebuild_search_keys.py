@@ -0,0 +1,22 @@
+"""
+Script to rebuild the search_prefixes and search_values keys used by list search
+Run this once after upgrading, or after importing documents outside the API
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+from app.services.search_service import SearchService
+
+def rebuild_search_keys():
+    app = create_app()
+    with app.app_context():
+        count = SearchService.rebuild()
+        print(f"Rebuilt search keys: {count} documents updated")
+
+if __name__ == '__main__':
+    rebuild_search_keys()
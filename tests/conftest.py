@@ -29,6 +29,14 @@ def db(app):
         database.customer_invoices.delete_many({})
         database.payments.delete_many({})
         database.counters.delete_many({})
+        database.daily_rollups.delete_many({})
+        database.open_items.delete_many({})
+        database.collection_versions.delete_many({})
+        database.email_outbox.delete_many({})
+        database.notifications.delete_many({})
+        database.notification_reads.delete_many({})
+        database.notifications_archive.delete_many({})
+        database.collection_stats.delete_many({})
 
 @pytest.fixture
 def auth_headers(client, db):
@@ -110,3 +110,31 @@ class TestAuth:
             'password': 'NewPass@123'
         })
         assert new_login.status_code == 200
+    
+    def test_deactivated_user_token_rejected(self, client, db, auth_headers, portal_user_headers):
+        user_id = client.get('/api/auth/me', headers=portal_user_headers).get_json()['_id']
+        
+        client.post(f'/api/users/{user_id}/toggle-active', headers=auth_headers)
+        
+        response = client.get('/api/auth/me', headers=portal_user_headers)
+        assert response.status_code == 401
+    
+    def test_role_change_requires_refresh(self, client, db, auth_headers):
+        register_response = client.post('/api/auth/register', json={
+            'email': 'promoted@test.com',
+            'password': 'Test@123456',
+            'full_name': 'Promoted User'
+        }).get_json()
+        user_id = register_response['user']['_id']
+        old_headers = {'Authorization': f"Bearer {register_response['access_token']}"}
+        
+        assert client.get('/api/users', headers=old_headers).status_code == 403
+        
+        client.put(f'/api/users/{user_id}', headers=auth_headers, json={'role': 'admin'})
+        assert client.get('/api/users', headers=old_headers).status_code == 401
+        
+        refresh_response = client.post('/api/auth/refresh', headers={
+            'Authorization': f"Bearer {register_response['refresh_token']}"
+        })
+        new_headers = {'Authorization': f"Bearer {refresh_response.get_json()['access_token']}"}
+        assert client.get('/api/users', headers=new_headers).status_code == 200
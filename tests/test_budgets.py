@@ -144,3 +144,125 @@ class TestBudgets:
         
         assert response.status_code == 200
         assert response.get_json()['is_archived'] == True
+    
+    def test_budgets_performance_uses_posted_bills_in_period(self, client, db, auth_headers):
+        account_id = self.create_analytical_account(client, auth_headers)
+        
+        vendor_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Vendor 1',
+            'contact_type': 'vendor'
+        }).get_json()['contact']['_id']
+        product_id = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Plank',
+            'sku': 'PL001',
+            'purchase_price': 100,
+            'tax_rate': 0
+        }).get_json()['product']['_id']
+        
+        for bill_date, quantity in [('2026-02-10', 10), ('2026-05-10', 5), ('2025-12-31', 7)]:
+            bill_id = client.post('/api/vendor-bills', headers=auth_headers, json={
+                'vendor_id': vendor_id,
+                'bill_date': bill_date,
+                'analytical_account_id': account_id,
+                'items': [{'product_id': product_id, 'quantity': quantity}]
+            }).get_json()['vendor_bill']['_id']
+            client.post(f'/api/vendor-bills/{bill_id}/post', headers=auth_headers)
+        
+        q1_id = client.post('/api/budgets', headers=auth_headers, json={
+            'name': 'Q1',
+            'analytical_account_id': account_id,
+            'budget_type': 'expense',
+            'period_start': '2026-01-01',
+            'period_end': '2026-03-31',
+            'budgeted_amount': 500
+        }).get_json()['budget']['_id']
+        client.post('/api/budgets', headers=auth_headers, json={
+            'name': 'Year',
+            'analytical_account_id': account_id,
+            'budget_type': 'expense',
+            'period_start': '2026-01-01',
+            'period_end': '2026-12-31',
+            'budgeted_amount': 10000
+        })
+        
+        response = client.get('/api/budgets/performance', headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        actuals = {p['budget_name']: p['actual_amount'] for p in data['budgets_performance']}
+        assert actuals == {'Q1': 1000, 'Year': 1500}
+        assert data['summary']['budgets_over'] == 1
+        assert all(p['analytical_account_code'] == 'ACC001' for p in data['budgets_performance'])
+        
+        single = client.get(f'/api/budgets/{q1_id}/performance', headers=auth_headers).get_json()
+        assert single['actual_amount'] == 1000
+        assert single['achievement_percentage'] == 200
+    
+    def test_budget_period_with_time_of_day_covers_whole_days(self, client, db, auth_headers):
+        account_id = self.create_analytical_account(client, auth_headers)
+        
+        vendor_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Vendor 1',
+            'contact_type': 'vendor'
+        }).get_json()['contact']['_id']
+        product_id = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Plank',
+            'sku': 'PL001',
+            'purchase_price': 100,
+            'tax_rate': 0
+        }).get_json()['product']['_id']
+        
+        for bill_date, quantity in [('2026-02-10', 1), ('2026-02-12', 2), ('2026-02-13', 4)]:
+            bill_id = client.post('/api/vendor-bills', headers=auth_headers, json={
+                'vendor_id': vendor_id,
+                'bill_date': bill_date,
+                'analytical_account_id': account_id,
+                'items': [{'product_id': product_id, 'quantity': quantity}]
+            }).get_json()['vendor_bill']['_id']
+            client.post(f'/api/vendor-bills/{bill_id}/post', headers=auth_headers)
+        
+        budget_id = client.post('/api/budgets', headers=auth_headers, json={
+            'name': 'Mid-February',
+            'analytical_account_id': account_id,
+            'budget_type': 'expense',
+            'period_start': '2026-02-10T09:00:00',
+            'period_end': '2026-02-12T09:00:00',
+            'budgeted_amount': 1000
+        }).get_json()['budget']['_id']
+        
+        response = client.get(f'/api/budgets/{budget_id}/performance', headers=auth_headers)
+        
+        assert response.get_json()['actual_amount'] == 300
+    
+    def test_cancel_recomputes_drifted_rollup_day(self, client, db, auth_headers):
+        account_id = self.create_analytical_account(client, auth_headers)
+        
+        vendor_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Vendor 1',
+            'contact_type': 'vendor'
+        }).get_json()['contact']['_id']
+        product_id = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Plank',
+            'sku': 'PL001',
+            'purchase_price': 100,
+            'tax_rate': 0
+        }).get_json()['product']['_id']
+        
+        bill_ids = []
+        for quantity in (1, 2):
+            bill_id = client.post('/api/vendor-bills', headers=auth_headers, json={
+                'vendor_id': vendor_id,
+                'bill_date': '2026-02-10',
+                'analytical_account_id': account_id,
+                'items': [{'product_id': product_id, 'quantity': quantity}]
+            }).get_json()['vendor_bill']['_id']
+            client.post(f'/api/vendor-bills/{bill_id}/post', headers=auth_headers)
+            bill_ids.append(bill_id)
+        
+        # A lost rollup write leaves the day off
+        db.daily_rollups.update_many({'kind': 'expense'}, {'$inc': {'total_amount': 999, 'document_count': 5}})
+        client.post(f'/api/vendor-bills/{bill_ids[0]}/cancel', headers=auth_headers)
+        
+        rollup = db.daily_rollups.find_one({'kind': 'expense', 'date': datetime(2026, 2, 10)})
+        assert rollup['total_amount'] == 200
+        assert rollup['document_count'] == 1
@@ -1,4 +1,5 @@
 import pytest
+from bson import ObjectId
 
 class TestContacts:
     def test_create_contact(self, client, db, auth_headers):
@@ -119,3 +120,17 @@ class TestContacts:
         assert response.status_code == 200
         data = response.get_json()
         assert len(data['vendors']) == 1
+    
+    def test_delete_contact_revokes_portal_user_tokens(self, client, db, auth_headers, portal_user_headers):
+        contact_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Portal Customer',
+            'contact_type': 'customer'
+        }).get_json()['contact']['_id']
+        db.users.update_one({'email': 'portal@test.com'}, {'$set': {'contact_id': ObjectId(contact_id)}})
+        assert client.get('/api/notifications', headers=portal_user_headers).status_code == 200
+        
+        response = client.delete(f'/api/contacts/{contact_id}', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert db.users.find_one({'email': 'portal@test.com'}) is None
+        assert client.get('/api/notifications', headers=portal_user_headers).status_code == 401
@@ -0,0 +1,159 @@
+import socketserver
+import threading
+import pytest
+from app.services.email_delivery import EmailDelivery, SMTPConnectionPool
+from app.services.email_outbox import EmailOutbox
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: refuses recipients containing 'bounce'"""
+    
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+    
+    def handle(self):
+        self.server.sessions += 1
+        self.reply('220 stand-in ESMTP')
+        lines = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if lines is not None:
+                if line == b'.\r\n':
+                    self.server.messages.append(b''.join(lines))
+                    lines = None
+                    self.reply('250 OK')
+                else:
+                    lines.append(line)
+                continue
+            
+            command = line[:4].upper()
+            if command == b'RCPT' and b'bounce' in line:
+                self.reply('550 No such user')
+            elif command == b'DATA':
+                lines = []
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+@pytest.fixture
+def smtp_server(app):
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), StandInSMTPHandler)
+    server.daemon_threads = True
+    server.sessions = 0
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    app.config.update(SMTP_SERVER='127.0.0.1', SMTP_PORT=server.server_address[1], SMTP_USE_TLS=False,
+                      EMAIL_ADDRESS='erp@test.com', EMAIL_PASSWORD=None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestEmailOutbox:
+    def test_register_only_enqueues_welcome_email(self, client, db):
+        response = client.post('/api/auth/register', json={
+            'email': 'queued@test.com',
+            'password': 'Test@123456',
+            'full_name': 'Queued User'
+        })
+        
+        assert response.status_code == 201
+        message = db.email_outbox.find_one({'to': 'queued@test.com'})
+        assert message['status'] == EmailOutbox.STATUS_PENDING
+        assert message['attempts'] == 0
+    
+    def test_worker_sends_batch_over_pooled_connections(self, app, db, smtp_server):
+        for index in range(5):
+            EmailOutbox.enqueue(f'customer{index}@test.com', 'Invoice', '<p>Hello</p>',
+                                [{'filename': 'invoice.pdf', 'content': b'%PDF-1.4'}])
+        EmailOutbox.enqueue('bounce@test.com', 'Invoice', '<p>Hello</p>')
+        
+        pool = SMTPConnectionPool.from_config(app.config)
+        result = EmailDelivery(pool, 'erp@test.com').run_once()
+        pool.close()
+        
+        assert result == {'sent': 5, 'retrying': 0, 'failed': 1}
+        assert len(smtp_server.messages) == 5
+        assert smtp_server.sessions <= app.config['EMAIL_POOL_SIZE']
+        assert db.email_outbox.count_documents({'status': EmailOutbox.STATUS_SENT}) == 5
+        bounced = db.email_outbox.find_one({'to': 'bounce@test.com'})
+        assert bounced['status'] == EmailOutbox.STATUS_FAILED
+        assert '550' in bounced['last_error']
+    
+    def test_unreachable_server_schedules_retry(self, app, db, smtp_server):
+        message_id = EmailOutbox.enqueue('customer@test.com', 'Invoice', '<p>Hello</p>')
+        smtp_server.shutdown()
+        smtp_server.server_close()
+        
+        pool = SMTPConnectionPool.from_config(app.config)
+        result = EmailDelivery(pool, 'erp@test.com').run_once()
+        
+        assert result['retrying'] == 1
+        message = db.email_outbox.find_one({'_id': message_id})
+        assert message['status'] == EmailOutbox.STATUS_PENDING
+        assert message['attempts'] == 1
+        assert message['next_attempt_at'] > message['created_at']
+    
+    def test_non_ascii_recipient_fails_alone_and_frees_its_connection(self, app, db, smtp_server):
+        EmailOutbox.enqueue('kunde@test.com', 'Invoice', '<p>Hello</p>')
+        EmailOutbox.enqueue('rené@test.com', 'Invoice', '<p>Hello</p>')
+        
+        pool = SMTPConnectionPool.from_config(app.config)
+        result = EmailDelivery(pool, 'erp@test.com').run_once()
+        
+        assert result == {'sent': 1, 'retrying': 0, 'failed': 1}
+        assert db.email_outbox.find_one({'to': 'rené@test.com'})['status'] == EmailOutbox.STATUS_FAILED
+        for _ in range(pool.size):
+            assert pool._slots.acquire(blocking=False)
+        pool.close()
+    
+    def test_expired_lease_on_last_attempt_is_not_reclaimed(self, app, db):
+        from datetime import datetime, timedelta
+        
+        message_id = EmailOutbox.enqueue('customer@test.com', 'Invoice', '<p>Hello</p>')
+        db.email_outbox.update_one({'_id': message_id}, {'$set': {
+            'status': EmailOutbox.STATUS_SENDING,
+            'attempts': app.config['EMAIL_MAX_ATTEMPTS'],
+            'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)
+        }})
+        
+        assert EmailOutbox.claim_batch('worker-1', 10) == []
+        assert db.email_outbox.find_one({'_id': message_id})['status'] == EmailOutbox.STATUS_FAILED
+
+
+class TestEmailTemplates:
+    def test_render_uses_layout_and_escapes_fields(self, app):
+        from app.services.email_templates import EmailTemplates
+        
+        with app.app_context():
+            html = EmailTemplates.render('welcome.html', user_name='<Ravi>', temp_password=None)
+        
+        assert 'Welcome to Shiv Furniture ERP' in html
+        assert '.footer {' in html
+        assert '&lt;Ravi&gt;' in html
+        assert 'temporary password' not in html
+    
+    def test_daily_summary_queues_one_message_per_admin(self, app, db):
+        from app.services.email_service import EmailService
+        
+        admins = [{'email': f'admin{index}@test.com', 'full_name': f'Admin {index}'} for index in range(3)]
+        summary = {
+            'date': '2026-01-31', 'new_orders': 4, 'new_invoices': 2,
+            'incoming_payments': 1, 'incoming_amount': 1500, 'outgoing_payments': 0, 'outgoing_amount': 0,
+            'pending_invoices': 2, 'pending_amount': 2500.5
+        }
+        
+        assert EmailService.send_daily_summary(admins, summary) == 3
+        
+        messages = list(db.email_outbox.find({}).sort('to', 1))
+        assert [message['subject'] for message in messages] == ['Daily Summary - 2026-01-31 - Shiv Furniture'] * 3
+        assert 'Good morning Admin 2,' in messages[2]['html']
+        assert '₹2,500.50' in messages[2]['html']
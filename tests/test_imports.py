@@ -0,0 +1,80 @@
+import json
+import pytest
+
+class TestImports:
+    def _references(self, client, auth_headers):
+        customer_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Import Customer',
+            'contact_type': 'customer'
+        }).get_json()['contact']['_id']
+        client.post('/api/products', headers=auth_headers, json={
+            'name': 'Bench',
+            'sku': 'BN001',
+            'sale_price': 200
+        })
+        return customer_id
+    
+    def test_import_ndjson_reports_row_errors(self, client, db, auth_headers):
+        customer_id = self._references(client, auth_headers)
+        body = '\n'.join([
+            json.dumps({'ref': 'A1', 'customer_id': customer_id, 'items': [{'product_sku': 'BN001', 'quantity': 2}]}),
+            json.dumps({'ref': 'A2', 'customer_id': customer_id, 'items': [{'product_sku': 'NOPE'}]}),
+            'not json'
+        ])
+        
+        response = client.post('/api/imports/customer_invoices', headers=auth_headers, data=body,
+                               content_type='application/x-ndjson')
+        
+        assert response.status_code == 201
+        data = response.get_json()
+        assert data['imported'] == 1
+        assert [error['line'] for error in data['errors']] == [2, 3]
+        
+        invoice = db.customer_invoices.find_one({'invoice_number': data['numbers'][0]})
+        assert invoice['total_amount'] == pytest.approx(472)
+    
+    def test_import_csv_groups_lines_by_ref(self, client, db, auth_headers):
+        customer_id = self._references(client, auth_headers)
+        body = (
+            'ref,customer_id,product_sku,quantity\n'
+            f'S1,{customer_id},BN001,1\n'
+            'S1,,BN001,3\n'
+            f'S2,{customer_id},BN001,1\n'
+        )
+        
+        response = client.post('/api/imports/sales_orders?format=csv', headers=auth_headers, data=body)
+        
+        data = response.get_json()
+        assert data['imported'] == 2
+        order = db.sales_orders.find_one({'so_number': data['numbers'][0]})
+        assert len(order['items']) == 2
+    
+    def test_import_dry_run_writes_nothing(self, client, db, auth_headers):
+        customer_id = self._references(client, auth_headers)
+        body = json.dumps({'customer_id': customer_id, 'items': [{'product_sku': 'BN001'}]})
+        
+        response = client.post('/api/imports/customer_invoices?dry_run=true', headers=auth_headers, data=body)
+        
+        assert response.status_code == 200
+        assert response.get_json()['valid'] == 1
+        assert db.customer_invoices.count_documents({}) == 0
+    
+    def test_posted_import_updates_rollups_and_open_items(self, client, db, auth_headers):
+        customer_id = self._references(client, auth_headers)
+        body = '\n'.join(
+            json.dumps({'customer_id': customer_id, 'status': 'posted', 'invoice_date': '2026-03-02',
+                        'items': [{'product_sku': 'BN001', 'quantity': quantity}]})
+            for quantity in (1, 2, 3)
+        )
+        
+        data = client.post('/api/imports/customer_invoices', headers=auth_headers, data=body,
+                           content_type='application/x-ndjson').get_json()
+        
+        assert data['imported'] == 3
+        rollups = list(db.daily_rollups.find({'kind': 'income'}))
+        assert len(rollups) == 1
+        assert rollups[0]['document_count'] == 3
+        assert rollups[0]['total_amount'] == pytest.approx(sum(i['total_amount'] for i in db.customer_invoices.find()))
+        items = list(db.open_items.find({'kind': 'receivable'}))
+        assert sorted(item['document_number'] for item in items) == sorted(data['numbers'])
+        assert {item['contact_name'] for item in items} == {'Import Customer'}
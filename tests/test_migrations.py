@@ -0,0 +1,21 @@
+import pytest
+from app.migrations import LATEST_VERSION, current_version, migrate, pending_migrations
+
+class TestMigrations:
+    def test_startup_applies_migrations_in_test_config(self, app, db):
+        assert current_version(db) == LATEST_VERSION
+        assert pending_migrations(db) == []
+    
+    def test_migrate_is_idempotent(self, app, db):
+        assert migrate(db, log=lambda message: None) == []
+        assert db.schema_migrations.count_documents({}) == LATEST_VERSION
+    
+    def test_baseline_indexes_created(self, app, db):
+        index_names = db.customer_invoices.index_information()
+        assert 'invoice_number_1' in index_names
+        assert 'open_invoices' in index_names
+    
+    def test_notification_indexes_created(self, app, db):
+        indexes = db.notifications.index_information()
+        assert 'user_id_1_is_read_1_created_at_-1' in indexes
+        assert indexes['expires_at_1']['expireAfterSeconds'] == 0
@@ -0,0 +1,115 @@
+from bson import ObjectId
+from app.services.notification_service import NotificationService
+
+class TestBroadcastNotifications:
+    def _second_admin_headers(self, client, db):
+        client.post('/api/auth/register', json={
+            'email': 'admin2@test.com',
+            'password': 'Test@123456',
+            'full_name': 'Second Admin'
+        })
+        db.users.update_one({'email': 'admin2@test.com'}, {'$set': {'role': 'admin'}})
+        login_data = client.post('/api/auth/login', json={
+            'email': 'admin2@test.com',
+            'password': 'Test@123456'
+        }).get_json()
+        return {'Authorization': f"Bearer {login_data['access_token']}"}
+    
+    def test_notify_admins_writes_one_document(self, client, db, auth_headers, portal_user_headers):
+        other_headers = self._second_admin_headers(client, db)
+        
+        NotificationService.notify_admins('Overdue Invoices Alert', '3 invoices are overdue', 'warning')
+        
+        assert db.notifications.count_documents({}) == 1
+        for headers in (auth_headers, other_headers):
+            data = client.get('/api/notifications', headers=headers).get_json()
+            assert data['unread_count'] == 1
+            assert data['notifications'][0]['title'] == 'Overdue Invoices Alert'
+            assert data['notifications'][0]['is_read'] is False
+        
+        portal_data = client.get('/api/notifications', headers=portal_user_headers).get_json()
+        assert portal_data['notifications'] == []
+    
+    def test_read_state_is_per_user(self, client, db, auth_headers):
+        other_headers = self._second_admin_headers(client, db)
+        notification_id = NotificationService.notify_admins('New Payment', 'PAY-0001', 'success')
+        NotificationService.notify_admins('New Payment', 'PAY-0002', 'success')
+        
+        response = client.post(f'/api/notifications/{notification_id}/read', headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert client.get('/api/notifications/unread-count', headers=auth_headers).get_json()['unread_count'] == 1
+        assert client.get('/api/notifications/unread-count', headers=other_headers).get_json()['unread_count'] == 2
+    
+    def test_read_all_covers_personal_and_broadcast(self, client, db, auth_headers):
+        user_id = db.users.find_one({'email': 'admin@test.com'})['_id']
+        NotificationService.create_notification(user_id, 'Welcome', 'Hello')
+        NotificationService.notify_admins('Low Stock Alert', '2 products are below reorder level', 'warning')
+        
+        response = client.post('/api/notifications/read-all', headers=auth_headers)
+        
+        assert response.get_json()['count'] == 2
+        data = client.get('/api/notifications', headers=auth_headers).get_json()
+        assert data['unread_count'] == 0
+        assert all(n['is_read'] for n in data['notifications'])
+        assert client.get('/api/notifications?unread_only=true', headers=auth_headers).get_json()['notifications'] == []
+    
+    def test_reading_in_order_advances_watermark(self, client, db, auth_headers):
+        from datetime import datetime, timedelta
+        
+        base = datetime.utcnow().replace(microsecond=0) + timedelta(seconds=10)
+        ids = []
+        for index in range(3):
+            notification_id = NotificationService.notify_admins('New Payment', f'PAY-000{index}', 'success')
+            db.notifications.update_one({'_id': ObjectId(notification_id)}, {'$set': {'created_at': base + timedelta(seconds=index)}})
+            ids.append(notification_id)
+        user_id = db.users.find_one({'email': 'admin@test.com'})['_id']
+        
+        client.post(f'/api/notifications/{ids[1]}/read', headers=auth_headers)
+        assert db.notification_reads.find_one({'_id': user_id})['read_ids'] == [ObjectId(ids[1])]
+        
+        client.post(f'/api/notifications/{ids[0]}/read', headers=auth_headers)
+        state = db.notification_reads.find_one({'_id': user_id})
+        assert state['watermark'] == base + timedelta(seconds=1)
+        assert state['read_ids'] == []
+        assert client.get('/api/notifications/unread-count', headers=auth_headers).get_json()['unread_count'] == 1
+    
+    def test_read_ids_of_removed_broadcasts_are_dropped(self, client, db, auth_headers):
+        first = NotificationService.notify_admins('New Payment', 'PAY-0001', 'success')
+        removed = NotificationService.notify_admins('New Payment', 'PAY-0002', 'success')
+        last = NotificationService.notify_admins('New Payment', 'PAY-0003', 'success')
+        user_id = db.users.find_one({'email': 'admin@test.com'})['_id']
+        
+        client.post(f'/api/notifications/{removed}/read', headers=auth_headers)
+        db.notifications.delete_one({'_id': ObjectId(removed)})
+        client.post(f'/api/notifications/{last}/read', headers=auth_headers)
+        
+        assert db.notification_reads.find_one({'_id': user_id})['read_ids'] == [ObjectId(last)]
+        unread = client.get('/api/notifications?unread_only=true', headers=auth_headers).get_json()['notifications']
+        assert [n['_id'] for n in unread] == [first]
+
+
+class TestNotificationRetention:
+    def test_read_notification_gets_read_expiry(self, app, client, db, auth_headers):
+        user_id = db.users.find_one({'email': 'admin@test.com'})['_id']
+        notification_id = NotificationService.create_notification(user_id, 'Welcome', 'Hello')
+        created = db.notifications.find_one({'user_id': user_id})
+        
+        client.post(f'/api/notifications/{notification_id}/read', headers=auth_headers)
+        
+        read = db.notifications.find_one({'user_id': user_id})
+        assert created['expires_at'] > read['expires_at']
+        assert read['archive_at'] is None
+    
+    def test_archive_policy_moves_due_notifications(self, app, db, auth_headers):
+        from datetime import datetime, timedelta
+        
+        app.config['NOTIFICATION_RETENTION_POLICY'] = 'archive'
+        user_id = db.users.find_one({'email': 'admin@test.com'})['_id']
+        NotificationService.create_notification(user_id, 'Old', 'Due for archiving')
+        NotificationService.create_notification(user_id, 'New', 'Kept')
+        db.notifications.update_one({'title': 'Old'}, {'$set': {'archive_at': datetime.utcnow() - timedelta(minutes=1)}})
+        
+        assert NotificationService.archive_due() == 1
+        assert [n['title'] for n in db.notifications.find()] == ['New']
+        assert db.notifications_archive.find_one({'title': 'Old'})['expires_at'] is None
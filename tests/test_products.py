@@ -49,6 +49,145 @@ class TestProducts:
         data = response.get_json()
         assert data['total'] == 2
     
+    def test_get_products_with_cursor(self, client, db, auth_headers):
+        for index, name in enumerate(['Chair', 'Desk', 'Shelf', 'Table', 'Wardrobe']):
+            client.post('/api/products', headers=auth_headers, json={
+                'name': name,
+                'sku': f'CUR00{index}'
+            })
+        
+        first = client.get('/api/products?per_page=2', headers=auth_headers).get_json()
+        assert [p['name'] for p in first['products']] == ['Chair', 'Desk']
+        assert first['next_cursor']
+        
+        second = client.get(f"/api/products?per_page=2&cursor={first['next_cursor']}", headers=auth_headers).get_json()
+        assert [p['name'] for p in second['products']] == ['Shelf', 'Table']
+        
+        third = client.get(f"/api/products?per_page=2&cursor={second['next_cursor']}", headers=auth_headers).get_json()
+        assert [p['name'] for p in third['products']] == ['Wardrobe']
+        assert third['next_cursor'] is None
+    
+    def test_get_products_invalid_cursor(self, client, db, auth_headers):
+        response = client.get('/api/products?cursor=not-a-cursor', headers=auth_headers)
+        
+        assert response.status_code == 400
+    
+    def test_get_products_cursor_rejects_operators(self, client, db, auth_headers):
+        import base64
+        
+        for payload in ('[{"$ne": null}, {"$oid": "65a000000000000000000000"}]', '["Chair", {"$gt": ""}]', '{"a": 1, "b": 2}'):
+            cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+            response = client.get(f'/api/products?cursor={cursor}', headers=auth_headers)
+            
+            assert response.status_code == 400
+    
+    def test_get_products_total_modes(self, client, db, auth_headers):
+        for index in range(3):
+            client.post('/api/products', headers=auth_headers, json={
+                'name': f'Product {index}',
+                'sku': f'TM00{index}',
+                'category': 'Furniture'
+            })
+        
+        facet = client.get('/api/products?per_page=2&include_total=facet', headers=auth_headers).get_json()
+        assert facet['total'] == 3
+        assert facet['total_pages'] == 2
+        assert len(facet['products']) == 2
+        
+        approx = client.get('/api/products?category=Furniture&include_total=approx', headers=auth_headers).get_json()
+        assert approx['total'] == 3
+        
+        skipped = client.get('/api/products?include_total=false', headers=auth_headers).get_json()
+        assert skipped['total'] is None
+        assert skipped['total_pages'] is None
+        assert len(skipped['products']) == 3
+        
+        response = client.get('/api/products?include_total=sometimes', headers=auth_headers)
+        assert response.status_code == 400
+    
+    def test_search_products_by_prefix(self, client, db, auth_headers):
+        client.post('/api/products', headers=auth_headers, json={
+            'name': 'Teak Dining Table',
+            'sku': 'TBL-001'
+        })
+        client.post('/api/products', headers=auth_headers, json={
+            'name': 'Table Lamp',
+            'sku': 'LMP-001',
+            'description': 'Bedside table lamp'
+        })
+        client.post('/api/products', headers=auth_headers, json={
+            'name': 'Office Chair',
+            'sku': 'CHR-001'
+        })
+        
+        data = client.get('/api/products?search=tab', headers=auth_headers).get_json()
+        assert data['total'] == 2
+        assert data['products'][0]['name'] == 'Table Lamp'
+        
+        data = client.get('/api/products?search=tbl001', headers=auth_headers).get_json()
+        assert [p['name'] for p in data['products']] == ['Teak Dining Table']
+        
+        data = client.get('/api/products?search=din tea', headers=auth_headers).get_json()
+        assert [p['name'] for p in data['products']] == ['Teak Dining Table']
+    
+    def test_search_products_after_rename(self, client, db, auth_headers):
+        create_response = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Sofa',
+            'sku': 'SF001'
+        })
+        product_id = create_response.get_json()['product']['_id']
+        
+        client.put(f'/api/products/{product_id}', headers=auth_headers, json={'name': 'Recliner'})
+        
+        assert client.get('/api/products?search=sofa', headers=auth_headers).get_json()['total'] == 0
+        assert client.get('/api/products?search=recl', headers=auth_headers).get_json()['total'] == 1
+    
+    def test_search_products_with_non_ascii_names(self, client, db, auth_headers):
+        client.post('/api/products', headers=auth_headers, json={'name': 'Café Chair', 'sku': 'CF001'})
+        client.post('/api/products', headers=auth_headers, json={'name': 'लकड़ी की मेज़', 'sku': 'LM001'})
+        
+        assert client.get('/api/products?search=cafe', headers=auth_headers).get_json()['total'] == 1
+        assert client.get('/api/products?search=CAFÉ', headers=auth_headers).get_json()['total'] == 1
+        data = client.get('/api/products?search=लकड़ी', headers=auth_headers).get_json()
+        assert [p['sku'] for p in data['products']] == ['LM001']
+    
+    def test_accented_search_ranks_exact_match_first(self, client, db, auth_headers):
+        client.post('/api/products', headers=auth_headers, json={'name': 'Café Chair', 'sku': 'CF001'})
+        client.post('/api/products', headers=auth_headers, json={'name': 'Cafe', 'sku': 'CF002'})
+        
+        data = client.get('/api/products?search=CAFÉ', headers=auth_headers).get_json()
+        
+        assert [p['sku'] for p in data['products']] == ['CF002', 'CF001']
+    
+    def test_short_search_terms_are_not_ranked(self):
+        from app.services.search_service import SearchService
+        
+        assert SearchService.rank_stages('products', 'in') == []
+        assert '_search_rank' in SearchService.rank_stages('products', 'inlay')[0]['$addFields']
+    
+    def test_ranked_search_pages_reach_every_match(self, client, db, auth_headers):
+        for index in range(25):
+            client.post('/api/products', headers=auth_headers, json={'name': f'Oak Shelf {index:02d}', 'sku': f'OS{index:03d}'})
+        client.post('/api/products', headers=auth_headers, json={'name': 'Oak', 'sku': 'OAK'})
+        
+        first = client.get('/api/products?search=oak&per_page=10', headers=auth_headers).get_json()
+        last = client.get('/api/products?search=oak&per_page=10&page=3', headers=auth_headers).get_json()
+        
+        assert first['total'] == 26
+        assert first['products'][0]['name'] == 'Oak'
+        assert [p['name'] for p in last['products']] == [f'Oak Shelf {index:02d}' for index in range(19, 25)]
+    
+    def test_search_products_with_cursor(self, client, db, auth_headers):
+        for name in ['Oak Desk', 'Oak', 'Oak Chair']:
+            client.post('/api/products', headers=auth_headers, json={'name': name, 'sku': name.upper().replace(' ', '')})
+        
+        first = client.get('/api/products?search=oak&per_page=2&cursor=', headers=auth_headers).get_json()
+        assert [p['name'] for p in first['products']] == ['Oak', 'Oak Chair']
+        
+        second = client.get(f"/api/products?search=oak&per_page=2&cursor={first['next_cursor']}", headers=auth_headers)
+        assert second.status_code == 200
+        assert [p['name'] for p in second.get_json()['products']] == ['Oak Desk']
+    
     def test_get_products_by_category(self, client, db, auth_headers):
         client.post('/api/products', headers=auth_headers, json={
             'name': 'Chair',
@@ -83,6 +222,25 @@ class TestProducts:
         assert response.status_code == 200
         assert response.get_json()['product']['sale_price'] == 150
     
+    def test_get_product_conditional(self, client, db, auth_headers):
+        create_response = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Stool',
+            'sku': 'ST001'
+        })
+        product_id = create_response.get_json()['product']['_id']
+        
+        first = client.get(f'/api/products/{product_id}', headers=auth_headers)
+        etag = first.headers['ETag']
+        
+        cached = client.get(f'/api/products/{product_id}', headers={**auth_headers, 'If-None-Match': etag})
+        assert cached.status_code == 304
+        
+        client.put(f'/api/products/{product_id}', headers=auth_headers, json={'sale_price': 80})
+        
+        changed = client.get(f'/api/products/{product_id}', headers={**auth_headers, 'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+    
     def test_archive_product(self, client, db, auth_headers):
         create_response = client.post('/api/products', headers=auth_headers, json={
             'name': 'To Archive',
@@ -118,3 +276,90 @@ class TestProducts:
         categories = response.get_json()['categories']
         assert 'Furniture' in categories
         assert 'Tools' in categories
+    
+    def test_serialize_matches_to_dict(self, client, db, auth_headers):
+        from app.models.product import Product
+        
+        client.post('/api/products', headers=auth_headers, json={
+            'name': 'Bookshelf',
+            'sku': 'BS001',
+            'sale_price': 2500
+        })
+        document = db.products.find_one({'sku': 'BS001'})
+        
+        assert Product.serialize(document) == Product.from_db(document).to_dict()
+
+
+class TestLinePricing:
+    def test_invoice_lines_priced_from_products(self, client, db, auth_headers):
+        customer_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Pricing Customer',
+            'contact_type': 'customer'
+        }).get_json()['contact']['_id']
+        chair_id = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Chair', 'sku': 'CH100', 'sale_price': 100, 'tax_rate': 10
+        }).get_json()['product']['_id']
+        desk_id = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Desk', 'sku': 'DK100', 'sale_price': 500, 'tax_rate': 0
+        }).get_json()['product']['_id']
+        
+        response = client.post('/api/customer-invoices', headers=auth_headers, json={
+            'customer_id': customer_id,
+            'items': [
+                {'product_id': chair_id, 'quantity': 4},
+                {'product_id': desk_id, 'quantity': 1, 'unit_price': 450}
+            ]
+        })
+        
+        assert response.status_code == 201
+        invoice = response.get_json()['customer_invoice']
+        assert [item['product_sku'] for item in invoice['items']] == ['CH100', 'DK100']
+        assert invoice['subtotal'] == 850
+        assert invoice['tax_amount'] == 40
+        assert invoice['total_amount'] == 890
+    
+    def test_unknown_product_is_not_found(self, client, db, auth_headers):
+        customer_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Pricing Customer',
+            'contact_type': 'customer'
+        }).get_json()['contact']['_id']
+        
+        response = client.post('/api/customer-invoices', headers=auth_headers, json={
+            'customer_id': customer_id,
+            'items': [{'product_id': '507f1f77bcf86cd799439011'}]
+        })
+        
+        assert response.status_code == 404
+        assert db.customer_invoices.count_documents({}) == 0
+
+
+class TestInvoiceDocumentETag:
+    def test_generated_pdf_invalidates_invoice_etag(self, client, db, auth_headers, monkeypatch):
+        from app.services.file_service import FileService
+        
+        monkeypatch.setattr(FileService, 'upload_file_with_sas_url', staticmethod(
+            lambda file_data, filename, folder='documents', content_type=None: {
+                'success': True, 'url': f'https://files.test/{filename}', 'blob_name': f'{folder}/{filename}'
+            }
+        ))
+        customer_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'PDF Customer',
+            'contact_type': 'customer'
+        }).get_json()['contact']['_id']
+        product_id = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Stool', 'sku': 'ST100', 'sale_price': 50
+        }).get_json()['product']['_id']
+        invoice_id = client.post('/api/customer-invoices', headers=auth_headers, json={
+            'customer_id': customer_id,
+            'items': [{'product_id': product_id}]
+        }).get_json()['customer_invoice']['_id']
+        
+        detail = client.get(f'/api/customer-invoices/{invoice_id}', headers=auth_headers)
+        etag = detail.headers['ETag']
+        
+        pdf = client.get(f'/api/customer-invoices/{invoice_id}/pdf', headers=auth_headers)
+        assert pdf.status_code == 200
+        
+        response = client.get(f'/api/customer-invoices/{invoice_id}', headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.get_json()['document_url'] == pdf.get_json()['url']
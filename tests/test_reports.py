@@ -0,0 +1,140 @@
+import pytest
+
+class TestReports:
+    def create_analytical_account(self, client, auth_headers, code='ACC001'):
+        response = client.post('/api/analytical-accounts',
+            headers=auth_headers,
+            json={
+                'code': code,
+                'name': 'Test Account',
+                'account_type': 'both'
+            }
+        )
+        return response.get_json()['analytical_account']['_id']
+    
+    def test_dashboard_summary(self, client, db, auth_headers):
+        client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Customer 1',
+            'contact_type': 'customer'
+        })
+        client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Both 1',
+            'contact_type': 'both'
+        })
+        client.post('/api/products', headers=auth_headers, json={
+            'name': 'Chair',
+            'sku': 'CH001'
+        })
+        account_id = self.create_analytical_account(client, auth_headers)
+        client.post('/api/budgets', headers=auth_headers, json={
+            'name': 'Expense Budget',
+            'analytical_account_id': account_id,
+            'budget_type': 'expense',
+            'period_start': '2026-01-01',
+            'period_end': '2026-12-31',
+            'budgeted_amount': 100000
+        })
+        
+        response = client.get('/api/reports/dashboard', headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['total_customers'] == 2
+        assert data['total_vendors'] == 1
+        assert data['total_products'] == 1
+        assert data['pending_invoices'] == 0
+        assert data['total_receivable'] == 0
+        assert data['budgets_on_track'] == 1
+        assert data['budgets_over'] == 0
+    
+    def test_monthly_trends_calendar_year(self, client, db, auth_headers):
+        response = client.get('/api/reports/monthly-trends?year=2026', headers=auth_headers)
+        
+        assert response.status_code == 200
+        trends = response.get_json()['trends']
+        assert len(trends) == 12
+        assert trends[0]['month'] == 1
+        assert trends[0]['year'] == 2026
+        assert all(t['sales'] == 0 and t['purchases'] == 0 for t in trends)
+    
+    def test_monthly_trends_fiscal_multi_year(self, client, db, auth_headers):
+        response = client.get('/api/reports/monthly-trends?year=2024&end_year=2026&fiscal=true', headers=auth_headers)
+        
+        assert response.status_code == 200
+        trends = response.get_json()['trends']
+        assert len(trends) == 36
+        assert (trends[0]['year'], trends[0]['month']) == (2024, 4)
+        assert (trends[-1]['year'], trends[-1]['month']) == (2027, 3)
+        assert trends[0]['period_label'] == 'FY 2024-25'
+        assert trends[-1]['period_label'] == 'FY 2026-27'
+    
+    def test_analytical_account_summary_follows_post_and_cancel(self, client, db, auth_headers):
+        account_id = self.create_analytical_account(client, auth_headers)
+        customer_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Customer 1',
+            'contact_type': 'customer'
+        }).get_json()['contact']['_id']
+        product_id = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Table',
+            'sku': 'TB001',
+            'sale_price': 1000,
+            'tax_rate': 0
+        }).get_json()['product']['_id']
+        
+        invoice_id = client.post('/api/customer-invoices', headers=auth_headers, json={
+            'customer_id': customer_id,
+            'analytical_account_id': account_id,
+            'items': [{'product_id': product_id, 'quantity': 2}]
+        }).get_json()['customer_invoice']['_id']
+        client.post(f'/api/customer-invoices/{invoice_id}/post', headers=auth_headers)
+        
+        response = client.get('/api/reports/analytical-account-summary', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.get_json()['totals']['total_income'] == 2000
+        
+        client.post(f'/api/customer-invoices/{invoice_id}/cancel', headers=auth_headers)
+        
+        response = client.get('/api/reports/analytical-account-summary', headers=auth_headers)
+        assert response.get_json()['totals']['total_income'] == 0
+    
+    def test_receivables_aging_tracks_open_items(self, client, db, auth_headers):
+        customer_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Aging Customer',
+            'contact_type': 'customer'
+        }).get_json()['contact']['_id']
+        product_id = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Sofa',
+            'sku': 'SF001',
+            'sale_price': 500,
+            'tax_rate': 0
+        }).get_json()['product']['_id']
+        
+        invoice_id = client.post('/api/customer-invoices', headers=auth_headers, json={
+            'customer_id': customer_id,
+            'invoice_date': '2020-01-01',
+            'due_date': '2020-01-31',
+            'items': [{'product_id': product_id, 'quantity': 2}]
+        }).get_json()['customer_invoice']['_id']
+        client.post(f'/api/customer-invoices/{invoice_id}/post', headers=auth_headers)
+        
+        data = client.get('/api/reports/receivables-aging', headers=auth_headers).get_json()
+        assert data['aging']['over_90'] == {'count': 1, 'amount': 1000}
+        assert data['details'][0]['customer_name'] == 'Aging Customer'
+        assert data['total_receivable'] == 1000
+        
+        client.post('/api/payments', headers=auth_headers, json={
+            'payment_type': 'incoming',
+            'invoice_id': invoice_id,
+            'amount': 400
+        })
+        data = client.get('/api/reports/receivables-aging', headers=auth_headers).get_json()
+        assert data['total_receivable'] == 600
+        
+        client.post('/api/payments', headers=auth_headers, json={
+            'payment_type': 'incoming',
+            'invoice_id': invoice_id,
+            'amount': 600
+        })
+        data = client.get('/api/reports/receivables-aging', headers=auth_headers).get_json()
+        assert data['total_receivable'] == 0
+        assert data['details'] == []
@@ -0,0 +1,114 @@
+import pytest
+
+class TestSystem:
+    def test_metrics_report_pool_checkouts(self, client, db, auth_headers):
+        response = client.get('/api/system/metrics', headers=auth_headers)
+        
+        assert response.status_code == 200
+        pool = response.get_json()['mongo_pool']
+        assert pool['checkouts'] > 0
+        assert pool['checked_out'] >= 0
+        assert sum(pool['wait_histogram'].values()) >= pool['checkouts']
+    
+    def test_metrics_require_admin(self, client, db, portal_user_headers):
+        response = client.get('/api/system/metrics', headers=portal_user_headers)
+        
+        assert response.status_code == 403
+    
+    def test_json_provider_encodes_bson_types(self, app):
+        from datetime import datetime
+        from bson import ObjectId
+        from bson.decimal128 import Decimal128
+        
+        object_id = ObjectId()
+        encoded = app.json.loads(app.json.dumps({
+            'id': object_id,
+            'at': datetime(2024, 1, 2, 3, 4, 5),
+            'amount': Decimal128('12.50')
+        }))
+        
+        assert encoded == {'id': str(object_id), 'at': '2024-01-02T03:04:05', 'amount': '12.50'}
+    
+    def test_streamed_list_is_valid_json(self, client, db, auth_headers):
+        response = client.get('/api/customer-invoices?per_page=5', headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['customer_invoices'] == []
+        assert data['total'] == 0
+    
+    def test_large_responses_are_gzipped(self, client, db, auth_headers):
+        import gzip
+        import json
+        
+        for i in range(10):
+            client.post('/api/products', headers=auth_headers, json={'name': f'Chair {i}', 'sku': f'CH{i:03d}'})
+        
+        response = client.get('/api/products', headers={**auth_headers, 'Accept-Encoding': 'gzip'})
+        
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert len(json.loads(gzip.decompress(response.data))['products']) == 10
+    
+    def test_streamed_responses_are_gzipped(self, client, db, auth_headers):
+        import gzip
+        import json
+        
+        response = client.get('/api/customer-invoices', headers={**auth_headers, 'Accept-Encoding': 'gzip'})
+        
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.data))['customer_invoices'] == []
+    
+    def test_reference_cache_sees_product_updates(self, client, db, auth_headers):
+        customer_id = client.post('/api/contacts', headers=auth_headers, json={
+            'name': 'Cache Customer',
+            'contact_type': 'customer'
+        }).get_json()['contact']['_id']
+        product_id = client.post('/api/products', headers=auth_headers, json={
+            'name': 'Desk',
+            'sku': 'DK001',
+            'sale_price': 100
+        }).get_json()['product']['_id']
+        
+        def invoice_price():
+            response = client.post('/api/customer-invoices', headers=auth_headers, json={
+                'customer_id': customer_id,
+                'items': [{'product_id': product_id, 'quantity': 1}]
+            })
+            return response.get_json()['customer_invoice']['items'][0]['unit_price']
+        
+        assert invoice_price() == 100
+        client.put(f'/api/products/{product_id}', headers=auth_headers, json={'sale_price': 120})
+        assert invoice_price() == 120
+        
+        metrics = client.get('/api/system/metrics', headers=auth_headers).get_json()['reference_cache']
+        assert metrics['hits'] + metrics['misses'] > 0
+    
+    def test_sequence_blocks_and_gapless_prefixes(self, app, db):
+        from app.utils.helpers import generate_number, generate_numbers
+        
+        first = generate_number('SO', 'sales_orders')
+        second = generate_number('SO', 'sales_orders')
+        assert int(second.rsplit('-', 1)[1]) == int(first.rsplit('-', 1)[1]) + 1
+        counter = db.counters.find_one({'_id': {'$regex': '^sales_orders_'}})
+        assert counter['seq'] >= app.config['SEQUENCE_BLOCK_SIZE']
+        
+        generate_number('INV', 'customer_invoices')
+        assert db.counters.find_one({'_id': {'$regex': '^customer_invoices_'}})['seq'] == 1
+        
+        numbers = generate_numbers('PO', 'purchase_orders', 3)
+        assert [n.rsplit('-', 1)[1] for n in numbers] == ['0001', '0002', '0003']
+    
+    def test_collection_growth_compares_snapshots(self, app, db):
+        from app.services.collection_stats_service import CollectionStatsService
+        
+        first = CollectionStatsService.report()
+        assert first['since'] is None
+        
+        db.products.insert_many([{'name': f'Growth {i}', 'sku': f'GR{i:03d}'} for i in range(10)])
+        report = CollectionStatsService.report(save=False)
+        
+        products = next(row for row in report['collections'] if row['name'] == 'products')
+        assert products['count_delta'] == 10
+        assert products['size_delta'] > 0
+        assert db.collection_stats.count_documents({}) == 1